@@ -1,64 +1,155 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 from models import Cliente, Endereco
-from typing import List, Dict, Set
-from pydantic import ValidationError
-import io
+from cache_validacao import ResultCache, content_hash
+from error_store import ErrorStore
+from instrumentacao import Instrumentacao, instrumented, stage
+from relatorio_erros import FORMATOS, store_report_bytes
+from validacao import MODELOS
+from validacao_lote import WORKERS_LOTE, batch_totals, summary_frame, top_fields, upload_labels, validate_batch
+from functools import partial
 
 st.set_page_config(page_title="Validador de Dados", layout="wide")
 
-def get_required_fields(model_class) -> Set[str]:
+@st.cache_resource
+def get_result_cache() -> ResultCache:
     """
-    Retorna o conjunto de campos obrigatórios do modelo Pydantic
+    Cache de dataframes e resultados compartilhado entre reruns e sessões
     """
-    return {name for name, field in model_class.model_fields.items() if field.is_required}
+    return ResultCache()
 
-def validate_columns(df: pd.DataFrame, model_class) -> List[str]:
+TAMANHOS_PAGINA = [50, 100, 500, 1000]
+
+def page_controls(total: int, chave: str, rotulo: str = "Erros") -> slice:
     """
-    Valida se todas as colunas obrigatórias existem no dataframe
-    Retorna lista de erros encontrados
+    Seletores de tamanho e número da página; retorna a faixa de posições da página atual
     """
-    required_fields = get_required_fields(model_class)
-    df_columns = set(df.columns)
-    missing_columns = required_fields - df_columns
-    
-    errors = []
-    if missing_columns:
-        errors.append(f"Colunas obrigatórias faltando: {', '.join(missing_columns)}")
-    
-    return errors
+    col1, col2 = st.columns(2)
+    with col1:
+        tamanho_pagina = st.selectbox(f"{rotulo} por página", TAMANHOS_PAGINA, key=f"tamanho_{chave}")
+    total_paginas = max(1, -(-total // tamanho_pagina))
+    with col2:
+        pagina = st.number_input(f"Página (de {total_paginas})", min_value=1, max_value=total_paginas, value=1,
+                                 key=f"pagina_{chave}")
+    inicio = (pagina - 1) * tamanho_pagina
+    return slice(inicio, inicio + tamanho_pagina)
 
-def validate_dataframe(df: pd.DataFrame, model_class) -> List[Dict]:
+def display_dataframe_page(df: pd.DataFrame, chave: str):
     """
-    Valida cada linha do dataframe usando o modelo Pydantic especificado.
-    Retorna uma lista de dicionários com os erros encontrados.
+    Exibe uma página do dataframe, com o índice 'Nº Linha' começando em 1.
+    Só as linhas da página vão para o navegador, então arquivos grandes não travam a tela.
     """
-    errors = []
-    
-    # Primeiro valida as colunas
-    column_errors = validate_columns(df, model_class)
-    if column_errors:
-        return [{'linha': 0, 'erros': [{'loc': ('colunas',), 'msg': error}]} for error in column_errors]
-    
-    # Depois valida os dados
-    for idx, row in df.iterrows():
-        try:
-            model_class(**row.to_dict())
-        except ValidationError as e:
-            errors.append({
-                'linha': idx + 1,  # Índice começa em 0, mas mostramos começando em 1
-                'erros': e.errors()
-            })
-    
-    return errors
+    pagina = page_controls(len(df), chave, "Linhas")
+    df_display = df.iloc[pagina]
+    df_display.index = pd.RangeIndex(pagina.start + 1, pagina.start + len(df_display) + 1, name='Nº Linha')
+    st.caption(f"{len(df)} linhas no arquivo")
+    st.dataframe(df_display)
+
+def display_errors(erros: ErrorStore, df: pd.DataFrame, chave: str):
+    """
+    Exibe os erros numa tabela paginada, filtrável por campo e por tipo de erro,
+    e os dados brutos apenas das linhas com erro
+    """
+    if 0 in erros.error_rows():
+        # Erro de colunas
+        for err in erros.expand_row(0)['erros']:
+            st.error(err['msg'])
+        return
+
+    st.subheader("Erros por Campo")
+    st.dataframe(erros.errors_per_field())
 
-def display_dataframe_with_index(df: pd.DataFrame):
+    st.subheader("Erros Encontrados")
+    col1, col2 = st.columns(2)
+    with col1:
+        campos = st.multiselect("Filtrar por campo", list(erros.errors_per_field().index), key=f"campos_{chave}")
+    with col2:
+        mensagens = st.multiselect("Filtrar por tipo de erro", list(erros.top_error_types(len(erros.mensagens))['mensagem']),
+                                   key=f"mensagens_{chave}")
+    selecao = erros.select(campos or None, mensagens or None)
+
+    pagina = page_controls(len(selecao), chave)
+    st.caption(f"{len(selecao)} erros selecionados")
+    st.dataframe(erros.to_frame(selecao[pagina], df), hide_index=True)
+
+    # O relatório completo só é gerado quando o botão é clicado, fora da renderização da página
+    col1, col2 = st.columns(2)
+    with col1:
+        formato = st.selectbox("Formato do relatório", list(FORMATOS), key=f"formato_{chave}")
+    with col2:
+        st.download_button(f"Baixar {len(selecao)} erros selecionados",
+                           data=partial(store_report_bytes, erros, df, formato, selecao),
+                           file_name=f"erros_{chave}.{formato}", mime=FORMATOS[formato],
+                           on_click='ignore', key=f"download_{chave}")
+
+    st.subheader("Dados Brutos das Linhas com Erro")
+    # Busca direta por posição: só as linhas da página atual são copiadas
+    linhas = np.unique(erros.linhas[selecao[pagina]])
+    dados = df.iloc[linhas - 1]
+    dados.index = pd.Index(linhas, name='Nº Linha')
+    st.dataframe(dados)
+
+def display_integrity(cache: ResultCache):
     """
-    Exibe o dataframe com uma coluna de índice começando em 1
+    Exibe a checagem de integridade entre Endereco.id_cliente e Cliente.id_cliente
     """
-    df_display = df.copy()
-    df_display.insert(0, 'Nº Linha', range(1, len(df) + 1))
-    return df_display
+    st.header("Integridade entre Clientes e Endereços")
+    df_clientes = st.session_state['df_clientes']
+    df_enderecos = st.session_state['df_enderecos']
+    if 'id_cliente' not in df_clientes.columns or 'id_cliente' not in df_enderecos.columns:
+        st.error("Os dois arquivos precisam da coluna id_cliente.")
+        return
+
+    resultado = cache.get_integrity(st.session_state['hash_clientes'], st.session_state['hash_enderecos'],
+                                    df_clientes, df_enderecos)
+    orfaos = resultado['enderecos_orfaos']
+    sem_endereco = resultado['clientes_sem_endereco']
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Endereços sem Cliente", len(orfaos))
+    with col2:
+        st.metric("Clientes sem Endereço", len(sem_endereco))
+    with col3:
+        st.metric("Máximo de Endereços por Cliente", int(resultado['enderecos_por_cliente'].max()) if len(df_clientes) else 0)
+
+    st.subheader("Clientes por Quantidade de Endereços")
+    distribuicao = resultado['enderecos_por_cliente'].value_counts().sort_index()
+    st.dataframe(distribuicao.rename_axis('enderecos').rename('clientes'))
+
+    limite = TAMANHOS_PAGINA[-1]
+    if len(orfaos):
+        st.subheader("Endereços sem Cliente")
+        dados = df_enderecos.iloc[orfaos[:limite] - 1]
+        dados.index = pd.Index(orfaos[:limite], name='Nº Linha')
+        st.dataframe(dados)
+    if len(sem_endereco):
+        st.subheader("Clientes sem Endereço")
+        dados = df_clientes.iloc[sem_endereco[:limite] - 1]
+        dados.index = pd.Index(sem_endereco[:limite], name='Nº Linha')
+        st.dataframe(dados)
+
+def display_performance(instrumentacao: Instrumentacao):
+    """
+    Painel recolhível com os tempos por etapa e por validador acumulados na sessão
+    """
+    with st.expander("Desempenho"):
+        if not instrumentacao.etapas:
+            st.caption("Nenhuma etapa medida ainda.")
+            return
+        st.subheader("Etapas")
+        st.dataframe(instrumentacao.stages_frame())
+        if instrumentacao.validadores:
+            st.subheader("Validadores")
+            st.dataframe(instrumentacao.validators_frame())
+        col1, col2 = st.columns(2)
+        with col1:
+            st.download_button("Baixar métricas (Prometheus)", instrumentacao.to_prometheus(),
+                               file_name="metricas.prom", mime="text/plain")
+        with col2:
+            if st.button("Zerar medições"):
+                instrumentacao.clear()
 
 def main():
     st.title("Validador de Dados de Clientes e Endereços")
@@ -75,11 +166,15 @@ def main():
         st.subheader("Arquivo de Endereços")
         enderecos_file = st.file_uploader("Selecione o arquivo CSV de endereços", type=['csv'])
     
+    cache = get_result_cache()
+
     if clientes_file is not None or enderecos_file is not None:
         # Processar arquivo de clientes
         if clientes_file is not None:
             try:
-                df_clientes = pd.read_csv(clientes_file)
+                conteudo = clientes_file.getvalue()
+                st.session_state['hash_clientes'] = content_hash(conteudo)
+                df_clientes = cache.get_frame(st.session_state['hash_clientes'], conteudo, Cliente)
                 st.session_state['df_clientes'] = df_clientes
             except Exception as e:
                 st.error(f"Erro ao ler arquivo de clientes: {str(e)}")
@@ -87,14 +182,16 @@ def main():
         # Processar arquivo de endereços
         if enderecos_file is not None:
             try:
-                df_enderecos = pd.read_csv(enderecos_file)
+                conteudo = enderecos_file.getvalue()
+                st.session_state['hash_enderecos'] = content_hash(conteudo)
+                df_enderecos = cache.get_frame(st.session_state['hash_enderecos'], conteudo, Endereco)
                 st.session_state['df_enderecos'] = df_enderecos
             except Exception as e:
                 st.error(f"Erro ao ler arquivo de endereços: {str(e)}")
         
         # Criar abas para visualização e validação
         if 'df_clientes' in st.session_state or 'df_enderecos' in st.session_state:
-            tab1, tab2 = st.tabs(["Clientes", "Endereços"])
+            tab1, tab2, tab3 = st.tabs(["Clientes", "Endereços", "Integridade"])
             
             with tab1:
                 if 'df_clientes' in st.session_state:
@@ -102,49 +199,45 @@ def main():
                     
                     # Mostrar dataframe com índice
                     st.subheader("Dados Brutos")
-                    df_clientes_display = display_dataframe_with_index(st.session_state['df_clientes'])
-                    st.dataframe(df_clientes_display, hide_index=True)
+                    with stage('renderizacao'):
+                        display_dataframe_page(st.session_state['df_clientes'], 'dados_clientes')
                     
                     # Mostrar colunas do arquivo
                     st.subheader("Colunas do Arquivo")
-                    st.write("Colunas encontradas:", ", ".join(df_clientes.columns))
+                    st.write("Colunas encontradas:", ", ".join(st.session_state['df_clientes'].columns))
                     
-                    # Botão para validar
+                    # Botão para validar; o resultado continua visível enquanto o arquivo não mudar
                     if st.button("Validar Dados dos Clientes"):
-                        erros_clientes = validate_dataframe(st.session_state['df_clientes'], Cliente)
+                        st.session_state['validado_clientes'] = st.session_state['hash_clientes']
+                    
+                    if st.session_state.get('validado_clientes') == st.session_state['hash_clientes']:
+                        erros_clientes = cache.get_errors(st.session_state['hash_clientes'], st.session_state['df_clientes'], Cliente)
                         
                         # Mostrar estatísticas
                         col1, col2, col3 = st.columns(3)
                         with col1:
                             st.metric("Total de Registros", len(st.session_state['df_clientes']))
                         with col2:
-                            st.metric("Registros com Erros", len(erros_clientes))
+                            st.metric("Registros com Erros", erros_clientes.rows_with_errors())
                         with col3:
-                            st.metric("Taxa de Erros", f"{(len(erros_clientes)/len(st.session_state['df_clientes'])*100):.1f}%")
+                            st.metric("Taxa de Erros", f"{(erros_clientes.rows_with_errors()/len(st.session_state['df_clientes'])*100):.1f}%")
                         
                         # Mostrar erros
-                        if erros_clientes:
-                            st.subheader("Erros Encontrados")
-                            for error in erros_clientes:
-                                with st.expander(f"Erros na Linha {error['linha']}"):
-                                    if error['linha'] == 0:
-                                        # Erro de colunas
-                                        for err in error['erros']:
-                                            st.error(err['msg'])
-                                    else:
-                                        # Mostrar a linha completa com os dados
-                                        linha_data = df_clientes_display[df_clientes_display['Nº Linha'] == error['linha']].iloc[0]
-                                        st.write("Dados da linha:")
-                                        st.dataframe(linha_data.to_frame().T, hide_index=True)
-                                        
-                                        # Mostrar os erros
-                                        st.write("Erros encontrados:")
-                                        for err in error['erros']:
-                                            campo = err['loc'][0]
-                                            msg = err['msg']
-                                            st.error(f"Campo '{campo}': {msg}")
+                        if len(erros_clientes):
+                            with stage('renderizacao'):
+                                display_errors(erros_clientes, st.session_state['df_clientes'], 'clientes')
                         else:
                             st.success("Nenhum erro encontrado nos dados dos clientes!")
+                        
+                        # Mostrar clientes possivelmente duplicados
+                        if 0 not in erros_clientes.error_rows():
+                            duplicados = cache.get_duplicates(st.session_state['hash_clientes'], st.session_state['df_clientes'])
+                            st.subheader("Possíveis Duplicados")
+                            if len(duplicados):
+                                st.write(f"{duplicados['cluster'].nunique()} grupos com {len(duplicados)} clientes")
+                                st.dataframe(duplicados.head(TAMANHOS_PAGINA[-1]), hide_index=True)
+                            else:
+                                st.success("Nenhum cliente duplicado encontrado!")
             
             with tab2:
                 if 'df_enderecos' in st.session_state:
@@ -152,49 +245,133 @@ def main():
                     
                     # Mostrar dataframe com índice
                     st.subheader("Dados Brutos")
-                    df_enderecos_display = display_dataframe_with_index(st.session_state['df_enderecos'])
-                    st.dataframe(df_enderecos_display, hide_index=True)
+                    with stage('renderizacao'):
+                        display_dataframe_page(st.session_state['df_enderecos'], 'dados_enderecos')
                     
                     # Mostrar colunas do arquivo
                     st.subheader("Colunas do Arquivo")
-                    st.write("Colunas encontradas:", ", ".join(df_enderecos.columns))
+                    st.write("Colunas encontradas:", ", ".join(st.session_state['df_enderecos'].columns))
                     
-                    # Botão para validar
+                    # Botão para validar; o resultado continua visível enquanto o arquivo não mudar
                     if st.button("Validar Dados dos Endereços"):
-                        erros_enderecos = validate_dataframe(st.session_state['df_enderecos'], Endereco)
+                        st.session_state['validado_enderecos'] = st.session_state['hash_enderecos']
+                    
+                    if st.session_state.get('validado_enderecos') == st.session_state['hash_enderecos']:
+                        if 'df_clientes' in st.session_state:
+                            # Inclui os endereços cujo id_cliente não existe no arquivo de clientes
+                            erros_enderecos = cache.get_address_errors(st.session_state['hash_clientes'], st.session_state['hash_enderecos'],
+                                                                       st.session_state['df_clientes'], st.session_state['df_enderecos'], Endereco)
+                        else:
+                            erros_enderecos = cache.get_errors(st.session_state['hash_enderecos'], st.session_state['df_enderecos'], Endereco)
                         
                         # Mostrar estatísticas
                         col1, col2, col3 = st.columns(3)
                         with col1:
                             st.metric("Total de Registros", len(st.session_state['df_enderecos']))
                         with col2:
-                            st.metric("Registros com Erros", len(erros_enderecos))
+                            st.metric("Registros com Erros", erros_enderecos.rows_with_errors())
                         with col3:
-                            st.metric("Taxa de Erros", f"{(len(erros_enderecos)/len(st.session_state['df_enderecos'])*100):.1f}%")
+                            st.metric("Taxa de Erros", f"{(erros_enderecos.rows_with_errors()/len(st.session_state['df_enderecos'])*100):.1f}%")
                         
                         # Mostrar erros
-                        if erros_enderecos:
-                            st.subheader("Erros Encontrados")
-                            for error in erros_enderecos:
-                                with st.expander(f"Erros na Linha {error['linha']}"):
-                                    if error['linha'] == 0:
-                                        # Erro de colunas
-                                        for err in error['erros']:
-                                            st.error(err['msg'])
-                                    else:
-                                        # Mostrar a linha completa com os dados
-                                        linha_data = df_enderecos_display[df_enderecos_display['Nº Linha'] == error['linha']].iloc[0]
-                                        st.write("Dados da linha:")
-                                        st.dataframe(linha_data.to_frame().T, hide_index=True)
-                                        
-                                        # Mostrar os erros
-                                        st.write("Erros encontrados:")
-                                        for err in error['erros']:
-                                            campo = err['loc'][0]
-                                            msg = err['msg']
-                                            st.error(f"Campo '{campo}': {msg}")
+                        if len(erros_enderecos):
+                            with stage('renderizacao'):
+                                display_errors(erros_enderecos, st.session_state['df_enderecos'], 'enderecos')
                         else:
                             st.success("Nenhum erro encontrado nos dados dos endereços!")
+            
+            with tab3:
+                if 'df_clientes' in st.session_state and 'df_enderecos' in st.session_state:
+                    with stage('renderizacao'):
+                        display_integrity(cache)
+                else:
+                    st.info("Envie os arquivos de clientes e de endereços para cruzar os IDs.")
+
+def display_batch(resumos):
+    """
+    Painel agregado do lote: totais, taxa de erros por arquivo e campos que mais falham
+    """
+    totais = batch_totals(resumos)
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Arquivos", totais['arquivos'], f"{totais['falhas']} com falha de leitura" if totais['falhas'] else None,
+                  delta_color='inverse')
+    with col2:
+        st.metric("Total de Registros", totais['registros'])
+    with col3:
+        st.metric("Registros com Erros", totais['registros_com_erros'])
+    with col4:
+        st.metric("Taxa de Erros", f"{totais['taxa_erros']:.1f}%")
+
+    resumo = summary_frame(resumos)
+    st.subheader("Resumo por Arquivo")
+    st.dataframe(resumo, hide_index=True)
+    st.download_button("Baixar resumo (CSV)", resumo.to_csv(index=False), file_name="resumo_lote.csv", mime="text/csv")
+
+    validos = resumo[resumo['Falha'].isna()]
+    if len(validos):
+        st.subheader("Taxa de Erros por Arquivo (%)")
+        st.bar_chart(validos.set_index('Arquivo')['Taxa de Erros (%)'])
+
+    st.subheader("Campos com Mais Erros no Lote")
+    st.dataframe(top_fields(resumos), hide_index=True)
+
+def main_batch():
+    st.title("Validação em Lote")
+    arquivos = st.file_uploader("Selecione os arquivos CSV de clientes e de endereços "
+                                "(o modelo de cada um é identificado pelo cabeçalho)", type=['csv'],
+                                accept_multiple_files=True)
+    if not arquivos:
+        st.info("Envie um ou mais arquivos para validar.")
+        return
+
+    cache = get_result_cache()
+    workers = st.slider("Arquivos validados ao mesmo tempo", min_value=1, max_value=16, value=WORKERS_LOTE)
+    lote = tuple(arquivo.file_id for arquivo in arquivos)  # Na ordem do envio: os resumos guardam o índice
+
+    # O resultado continua visível enquanto o conjunto de arquivos não mudar
+    if st.button(f"Validar {len(arquivos)} arquivos"):
+        barra = st.progress(0.0, text="Validando...")
+        parcial = st.empty()
+        resumos = []
+        with stage('validacao_lote', len(arquivos)):
+            for resumo in validate_batch([(arquivo.name, arquivo.getvalue()) for arquivo in arquivos], cache, workers):
+                resumos.append(resumo)
+                barra.progress(len(resumos) / len(arquivos),
+                               text=f"{len(resumos)} de {len(arquivos)} arquivos validados ({resumo['arquivo']})")
+                parcial.dataframe(summary_frame(resumos), hide_index=True)
+        barra.empty()
+        parcial.empty()
+        st.session_state['lote'] = (lote, resumos)
+
+    if st.session_state.get('lote', (None,))[0] != lote:
+        return
+    resumos = st.session_state['lote'][1]
+    display_batch(resumos)
+
+    # Detalhe de um arquivo: o dataframe e os erros vêm do cache preenchido pelo lote
+    st.header("Erros de um Arquivo")
+    detalhaveis = {resumo['indice']: resumo for resumo in resumos if resumo['erro'] is None and resumo['total_erros']}
+    if not detalhaveis:
+        st.success("Nenhum erro encontrado nos arquivos do lote!")
+        return
+    rotulos = upload_labels(resumos)
+    indice = st.selectbox("Arquivo", sorted(detalhaveis, key=lambda i: (detalhaveis[i]['arquivo'], i)),
+                          format_func=rotulos.get)
+    resumo = detalhaveis[indice]
+    conteudo = arquivos[indice].getvalue()
+    model_class = MODELOS[resumo['modelo']]
+    df = cache.get_frame(resumo['hash'], conteudo, model_class)
+    with stage('renderizacao'):
+        display_errors(cache.get_errors(resumo['hash'], df, model_class), df, f"lote_{resumo['hash'][:12]}")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    # As medições se acumulam na sessão e aparecem no painel "Desempenho"
+    instrumentacao = st.session_state.setdefault('instrumentacao', Instrumentacao())
+    modo = st.sidebar.radio("Modo", ["Clientes e Endereços", "Lote de arquivos"])
+    with instrumented(instrumentacao):
+        if modo == "Lote de arquivos":
+            main_batch()
+        else:
+            main()
+    display_performance(instrumentacao)
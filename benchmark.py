@@ -0,0 +1,198 @@
+import pandas as pd
+import numpy as np
+import argparse
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Dict, List
+from models import Cliente, Endereco
+from validacao import MODELOS, validate_columns, validate_dataframe_columnar, error_inputs
+from error_store import ErrorStore
+from leitura import read_csv_typed
+from gerador_dados import TAXA_ERRO_PADRAO, build_pools, customers_chunk, addresses_chunk, uuids
+
+TAMANHOS = {'10k': 10_000, '1M': 1_000_000, '10M': 10_000_000}
+TAMANHOS_PADRAO = ['10k', '1M']
+TOLERANCIA_PADRAO = 0.2  # queda de vazão aceita antes de acusar regressão
+BASELINE_PADRAO = 'benchmark_baseline.json'
+LINHAS_POR_BLOCO = 1_000_000
+ETAPAS = ['leitura_csv', 'colunas', 'validacao', 'coleta_erros']
+TEMPO_MINIMO = 0.05  # etapas mais rápidas que isso (segundos) só têm ruído; ficam fora da comparação
+
+
+def _fixture_clientes(rng: np.random.Generator, pools: Dict[str, np.ndarray], n: int, taxa: float) -> pd.DataFrame:
+    return customers_chunk(rng, pools, n, taxa, taxa_duplicados=0.0)
+
+
+def _fixture_enderecos(rng: np.random.Generator, pools: Dict[str, np.ndarray], n: int, taxa: float) -> pd.DataFrame:
+    return addresses_chunk(rng, pools, uuids(rng, n), taxa, chance_endereco=1.0, taxa_orfaos=0.0)
+
+
+_FIXTURES = {Cliente: _fixture_clientes, Endereco: _fixture_enderecos}
+
+
+def fixture_path(diretorio: str, modelo: str, linhas: int, taxa_erro: float, seed: int) -> str:
+    return os.path.join(diretorio, f'{modelo}_{linhas}_{taxa_erro:g}_{seed}.csv')
+
+
+def generate_fixture(caminho: str, model_class, linhas: int, taxa_erro: float = TAXA_ERRO_PADRAO, seed: int = 0):
+    """
+    Gera um CSV sintético de `linhas` registros do modelo, em blocos, com a semente fixa
+    (o mesmo arquivo a cada execução). Os erros seguem old/create_users.py, com `taxa_erro` por campo.
+    Os pools vêm das listas fixas do gerador, sem o Faker, para não depender de nada além do repositório.
+    """
+    rng = np.random.default_rng(seed)
+    pools = build_pools(seed, usar_faker=False)
+    temporario = caminho + '.parcial'
+    for inicio in range(0, linhas, LINHAS_POR_BLOCO):
+        bloco = _FIXTURES[model_class](rng, pools, min(LINHAS_POR_BLOCO, linhas - inicio), taxa_erro)
+        bloco.to_csv(temporario, mode='w' if inicio == 0 else 'a', header=inicio == 0, index=False)
+    os.replace(temporario, caminho)
+
+
+def _pico_rss_mb() -> float:
+    """
+    Pico de memória residente do processo. No Linux usa VmHWM, que recomeça no exec;
+    o ru_maxrss herdaria o pico do processo pai.
+    """
+    try:
+        with open('/proc/self/status', encoding='ascii') as status:
+            for linha in status:
+                if linha.startswith('VmHWM:'):
+                    return round(int(linha.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def _medir(funcao):
+    inicio = time.perf_counter()
+    resultado = funcao()
+    return resultado, time.perf_counter() - inicio
+
+
+def run_case(caminho: str, modelo: str) -> Dict:
+    """
+    Mede cada etapa sobre o arquivo; roda num processo próprio para que o pico de RSS seja só deste caso
+    """
+    model_class = MODELOS[modelo]
+    etapas = {}
+    df, etapas['leitura_csv'] = _medir(lambda: read_csv_typed(caminho, model_class))
+    _, etapas['colunas'] = _medir(lambda: validate_columns(df, model_class))
+    resultado, etapas['validacao'] = _medir(lambda: validate_dataframe_columnar(df, model_class))
+
+    def coletar():
+        posicoes, indices_campos, codigos, modelos, campos = resultado
+        store = ErrorStore(campos)
+        store.append_arrays(posicoes + 1, indices_campos, codigos, modelos, campos)
+        error_inputs(df, posicoes, indices_campos, campos)
+        return store
+
+    store, etapas['coleta_erros'] = _medir(coletar)
+    linhas = len(df)
+    return {
+        'linhas': linhas,
+        'erros': len(store),
+        'segundos': {etapa: round(segundos, 4) for etapa, segundos in etapas.items()},
+        'linhas_por_segundo': {etapa: round(linhas / max(segundos, 1e-9)) for etapa, segundos in etapas.items()},
+        'pico_rss_mb': _pico_rss_mb(),
+    }
+
+
+def run_benchmarks(tamanhos: List[str], taxa_erro: float, diretorio: str, seed: int = 0) -> Dict[str, Dict]:
+    """
+    Roda todos os casos (modelo x tamanho), gerando as fixtures que ainda não existem
+    """
+    os.makedirs(diretorio, exist_ok=True)
+    resultados = {}
+    for modelo, model_class in MODELOS.items():
+        for tamanho in tamanhos:
+            caminho = fixture_path(diretorio, modelo, TAMANHOS[tamanho], taxa_erro, seed)
+            if not os.path.exists(caminho):
+                print(f"Gerando {caminho}...")
+                generate_fixture(caminho, model_class, TAMANHOS[tamanho], taxa_erro, seed)
+            with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as executor:
+                resultado = executor.submit(run_case, caminho, modelo).result()
+            resultados[f'{modelo}/{tamanho}'] = resultado
+            vazao = ', '.join(f"{etapa} {resultado['linhas_por_segundo'][etapa]:,} l/s" for etapa in ETAPAS)
+            print(f"{modelo}/{tamanho}: {vazao}; pico RSS {resultado['pico_rss_mb']} MB")
+    return resultados
+
+
+def find_regressions(resultados: Dict[str, Dict], baseline: Dict[str, Dict], tolerancia: float) -> List[str]:
+    """
+    Etapas cuja vazão caiu mais que `tolerancia` em relação ao baseline
+    (só as que levaram pelo menos TEMPO_MINIMO no baseline)
+    """
+    regressoes = []
+    for caso, resultado in resultados.items():
+        if caso not in baseline:
+            continue
+        for etapa in ETAPAS:
+            atual = resultado['linhas_por_segundo'][etapa]
+            anterior = baseline[caso]['linhas_por_segundo'].get(etapa)
+            if baseline[caso]['segundos'].get(etapa, 0) < TEMPO_MINIMO:
+                continue
+            if anterior and atual < anterior * (1 - tolerancia):
+                regressoes.append(f"{caso} {etapa}: {atual:,} l/s (baseline {anterior:,} l/s, {atual / anterior - 1:+.0%})")
+    return regressoes
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark da validação com fixtures sintéticas, comparado ao baseline")
+    parser.add_argument('--tamanhos', nargs='+', choices=list(TAMANHOS), default=TAMANHOS_PADRAO, help="Tamanhos das fixtures")
+    parser.add_argument('--taxa-erro', type=float, default=TAXA_ERRO_PADRAO, help="Chance de erro por campo")
+    parser.add_argument('--dados', default=os.path.join(tempfile.gettempdir(), 'validador_benchmark'),
+                        help="Diretório das fixtures geradas")
+    parser.add_argument('--baseline', default=BASELINE_PADRAO, help="JSON com o baseline")
+    parser.add_argument('--tolerancia', type=float, default=TOLERANCIA_PADRAO, help="Queda de vazão aceita (0.2 = 20%%)")
+    parser.add_argument('--salvar-baseline', action='store_true', help="Grava os resultados como novo baseline")
+    parser.add_argument('--saida', help="JSON onde os resultados desta execução são gravados")
+    parser.add_argument('--sem-baseline', action='store_true',
+                        help="Só mede, sem falhar quando não há baseline para comparar")
+    args = parser.parse_args()
+
+    # Sem baseline não há como detectar regressões: falha antes de gastar tempo medindo
+    if not args.salvar_baseline and not args.sem_baseline and not os.path.exists(args.baseline):
+        print(f"Sem baseline em {args.baseline}; rode com --salvar-baseline para criar "
+              f"ou com --sem-baseline para só medir")
+        sys.exit(2)
+
+    resultados = run_benchmarks(args.tamanhos, args.taxa_erro, args.dados)
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as arquivo:
+            json.dump(resultados, arquivo, indent=2)
+
+    if args.salvar_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding='utf-8') as arquivo:
+                baseline = json.load(arquivo)
+        baseline.update(resultados)
+        with open(args.baseline, 'w', encoding='utf-8') as arquivo:
+            json.dump(baseline, arquivo, indent=2)
+        print(f"Baseline gravado em {args.baseline}")
+        sys.exit(0)
+
+    if not os.path.exists(args.baseline):
+        print(f"Sem baseline em {args.baseline}; nada a comparar")
+        sys.exit(0)
+    with open(args.baseline, encoding='utf-8') as arquivo:
+        baseline = json.load(arquivo)
+    sem_referencia = [caso for caso in resultados if caso not in baseline]
+    if sem_referencia and not args.sem_baseline:
+        print(f"Casos sem baseline em {args.baseline}: {', '.join(sem_referencia)}; "
+              f"rode com --salvar-baseline para incluí-los")
+        sys.exit(2)
+    regressoes = find_regressions(resultados, baseline, args.tolerancia)
+    if regressoes:
+        print("Regressões de desempenho:")
+        for regressao in regressoes:
+            print(f"  - {regressao}")
+        sys.exit(1)
+    print("Sem regressões em relação ao baseline")
@@ -0,0 +1,137 @@
+import pandas as pd
+import numpy as np
+import hashlib
+import inspect
+import io
+import json
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Callable, Dict, Hashable
+from error_store import ErrorStore
+from integridade import check_referential_integrity, integrity_errors
+from deduplicacao import find_duplicates
+from leitura import read_csv_typed
+
+ORCAMENTO_PADRAO = 512 * 1024 * 1024  # bytes
+
+
+def content_hash(conteudo: bytes) -> str:
+    """
+    Hash do conteúdo do arquivo enviado
+    """
+    return hashlib.blake2b(conteudo, digest_size=20).hexdigest()
+
+
+@lru_cache(maxsize=None)
+def schema_version(model_class) -> str:
+    """
+    Versão do schema do modelo: muda quando os campos ou o código dos validadores mudam
+    """
+    schema = json.dumps(model_class.model_json_schema(), sort_keys=True)
+    codigo = inspect.getsource(model_class)
+    return hashlib.blake2b((schema + codigo).encode('utf-8'), digest_size=12).hexdigest()
+
+
+def _tamanho(valor) -> int:
+    if isinstance(valor, pd.DataFrame):
+        return int(valor.memory_usage(index=True, deep=True).sum())
+    if isinstance(valor, ErrorStore):
+        return valor.nbytes + sum(len(msg) for _, msg in valor.mensagens)
+    if isinstance(valor, dict):
+        return sum(_tamanho(item) for item in valor.values())
+    if isinstance(valor, np.ndarray):
+        return valor.nbytes
+    if isinstance(valor, pd.Series):
+        return int(valor.memory_usage(index=True, deep=True))
+    return 0
+
+
+class ResultCache:
+    """
+    Cache LRU dos dataframes lidos e dos resultados de validação,
+    limitado por um orçamento de memória em bytes.
+    As chaves usam o hash do conteúdo do arquivo (e a versão do schema, para os resultados).
+    """
+
+    def __init__(self, max_bytes: int = ORCAMENTO_PADRAO):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._entradas: OrderedDict = OrderedDict()  # chave -> (valor, tamanho)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entradas)
+
+    def get_or_compute(self, chave: Hashable, calcular: Callable):
+        with self._lock:
+            if chave in self._entradas:
+                self._entradas.move_to_end(chave)
+                return self._entradas[chave][0]
+
+        valor = calcular()
+        tamanho = _tamanho(valor)
+
+        with self._lock:
+            if chave in self._entradas or tamanho > self.max_bytes:
+                return valor
+            self._entradas[chave] = (valor, tamanho)
+            self.total_bytes += tamanho
+            # Remove os itens usados há mais tempo até caber no orçamento
+            while self.total_bytes > self.max_bytes:
+                _, (_, tamanho_removido) = self._entradas.popitem(last=False)
+                self.total_bytes -= tamanho_removido
+
+        return valor
+
+    def get_frame(self, hash_arquivo: str, conteudo: bytes, model_class=None) -> pd.DataFrame:
+        """
+        Dataframe lido do CSV, reaproveitado enquanto o conteúdo não mudar.
+        Com `model_class`, só as colunas do modelo são lidas, todas como texto.
+        """
+        if model_class is None:
+            return self.get_or_compute(('frame', hash_arquivo), lambda: pd.read_csv(io.BytesIO(conteudo)))
+        return self.get_or_compute(('frame', hash_arquivo, model_class.__name__),
+                                   lambda: read_csv_typed(conteudo, model_class))
+
+    def get_errors(self, hash_arquivo: str, df: pd.DataFrame, model_class) -> ErrorStore:
+        """
+        Resultado da validação do arquivo, reaproveitado enquanto o conteúdo e o schema não mudarem
+        """
+        chave = ('erros', hash_arquivo, model_class.__name__, schema_version(model_class))
+        return self.get_or_compute(chave, lambda: ErrorStore.from_dataframe(df, model_class))
+
+    def get_integrity(self, hash_clientes: str, hash_enderecos: str,
+                      df_clientes: pd.DataFrame, df_enderecos: pd.DataFrame) -> Dict:
+        """
+        Resultado da checagem de integridade entre os dois arquivos
+        """
+        return self.get_or_compute(('integridade', hash_clientes, hash_enderecos),
+                                   lambda: check_referential_integrity(df_clientes, df_enderecos))
+
+    def get_address_errors(self, hash_clientes: str, hash_enderecos: str,
+                           df_clientes: pd.DataFrame, df_enderecos: pd.DataFrame, model_class) -> ErrorStore:
+        """
+        Erros do modelo de endereço somados aos endereços sem cliente correspondente
+        """
+        chave = ('erros_integridade', hash_clientes, hash_enderecos, schema_version(model_class))
+
+        def calcular():
+            erros = self.get_errors(hash_enderecos, df_enderecos, model_class)
+            if 0 in erros.error_rows() or 'id_cliente' not in df_clientes.columns:
+                return erros  # Sem as colunas obrigatórias não há como cruzar os IDs
+            resultado = self.get_integrity(hash_clientes, hash_enderecos, df_clientes, df_enderecos)
+            return erros.with_errors(integrity_errors(resultado, df_enderecos))
+
+        return self.get_or_compute(chave, calcular)
+
+    def get_duplicates(self, hash_arquivo: str, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Clusters de clientes possivelmente duplicados
+        """
+        return self.get_or_compute(('duplicados', hash_arquivo), lambda: find_duplicates(df))
+
+    def clear(self):
+        with self._lock:
+            self._entradas.clear()
+            self.total_bytes = 0
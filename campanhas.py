@@ -0,0 +1,131 @@
+import pandas as pd
+import numpy as np
+import argparse
+import os
+from typing import List, Optional
+from models import Anuncio
+from validacao_tipada import validate_typed
+from leitura import read_csv_typed
+from instrumentacao import stage
+
+CHAVES_ROLLUP = ['AdSet_name', 'Segmentação', 'Fase', 'Date']
+MEDIDAS = ['Amount_spent', 'Link_clicks', 'Impressions', 'Conversions']
+METRICAS = ['CTR', 'CPC', 'CPA']
+ESTADO_PADRAO = 'output/rollup_campanhas.parquet'
+
+
+# --- Rollups ---
+
+def aggregate(tipado: pd.DataFrame) -> pd.DataFrame:
+    """
+    Somas das medidas por AdSet/Segmentação/Fase/dia, só com as linhas válidas.
+    As chaves de texto viram categorias antes do groupby.
+    """
+    with stage('rollup', len(tipado)):
+        validas = tipado.loc[tipado['valida'], CHAVES_ROLLUP + MEDIDAS]
+        chaves = {chave: validas[chave].astype('category') for chave in CHAVES_ROLLUP if chave != 'Date'}
+        chaves['Date'] = validas['Date'].dt.normalize()
+        grupos = validas[MEDIDAS].groupby([chaves[chave] for chave in CHAVES_ROLLUP], observed=True, sort=False)
+        somas = grupos.sum().astype({'Link_clicks': 'int64', 'Impressions': 'int64', 'Conversions': 'int64'})
+        somas['linhas'] = grupos.size()
+        return somas
+
+
+def add_metrics(somas: pd.DataFrame) -> pd.DataFrame:
+    """
+    CTR, CPC e CPA a partir das somas; vazios quando o denominador é zero
+    """
+    metricas = somas.copy()
+    metricas['CTR'] = somas['Link_clicks'] / somas['Impressions'].where(somas['Impressions'] > 0)
+    metricas['CPC'] = somas['Amount_spent'] / somas['Link_clicks'].where(somas['Link_clicks'] > 0)
+    metricas['CPA'] = somas['Amount_spent'] / somas['Conversions'].where(somas['Conversions'] > 0)
+    return metricas
+
+
+class CampaignRollup:
+    """
+    Somas por AdSet/Segmentação/Fase/dia e as métricas derivadas, atualizadas de forma incremental:
+    cada append substitui os dias do arquivo e recalcula só as métricas dos grupos desses dias.
+    As somas são aditivas, então os níveis mais agregados (por AdSet, por Fase...) saem delas.
+    """
+
+    def __init__(self, somas: Optional[pd.DataFrame] = None):
+        if somas is None:
+            indice = pd.MultiIndex.from_arrays([[] for _ in CHAVES_ROLLUP], names=CHAVES_ROLLUP)
+            somas = pd.DataFrame({medida: pd.Series(dtype='float64' if medida == 'Amount_spent' else 'int64')
+                                  for medida in MEDIDAS + ['linhas']}).set_axis(indice)
+        self.somas = somas
+        self.metricas = add_metrics(somas)
+
+    def loaded_days(self, tipado: pd.DataFrame) -> np.ndarray:
+        """
+        Dias de `tipado` que já estão no estado
+        """
+        dias = tipado['Date'].dropna().dt.normalize().unique()
+        return np.intersect1d(dias, self.somas.index.get_level_values('Date').unique())
+
+    def append(self, tipado: pd.DataFrame) -> pd.MultiIndex:
+        """
+        Acrescenta as linhas válidas de `tipado` e retorna os grupos afetados.
+        Os dias do arquivo substituem os mesmos dias no estado, então recarregar um arquivo
+        (ou uma versão corrigida dele) não soma nada duas vezes.
+        """
+        novos = aggregate(tipado)
+        dias = tipado['Date'].dropna().dt.normalize().unique()
+        with stage('rollup_incremental', len(novos)):
+            mantidos = ~self.somas.index.get_level_values('Date').isin(dias)
+            removidos = self.somas.index[~mantidos]
+            self.somas = pd.concat([self.somas[mantidos], novos])
+            self.metricas = pd.concat([self.metricas[mantidos], add_metrics(novos)])
+        return removidos.union(novos.index)
+
+    def rollup(self, chaves: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Métricas no nível de `chaves` (um subconjunto de CHAVES_ROLLUP; por padrão, o nível mais fino)
+        """
+        if not chaves or chaves == CHAVES_ROLLUP:
+            return self.metricas
+        return add_metrics(self.somas.groupby(level=chaves, observed=True).sum())
+
+    def save(self, caminho: str):
+        self.somas.to_parquet(caminho)
+
+    @classmethod
+    def load(cls, caminho: str) -> 'CampaignRollup':
+        return cls(pd.read_parquet(caminho))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Valida o relatório de anúncios e atualiza os rollups de CTR/CPC/CPA")
+    parser.add_argument('arquivo', nargs='?', default='data.csv', help="CSV de anúncios (um dia ou um período)")
+    parser.add_argument('--estado', default=ESTADO_PADRAO,
+                        help="Parquet com as somas acumuladas; os dias do arquivo substituem os mesmos "
+                             "dias nele (append diário)")
+    parser.add_argument('--recriar', action='store_true', help="Ignora o estado existente e recalcula do zero")
+    parser.add_argument('--nivel', nargs='+', choices=CHAVES_ROLLUP, help="Chaves do rollup exibido/gravado")
+    parser.add_argument('--saida', help="CSV onde o rollup no nível pedido é gravado")
+    args = parser.parse_args()
+
+    df = read_csv_typed(args.arquivo, Anuncio)
+    errors, tipado = validate_typed(df, Anuncio)
+    print(f"Linhas: {len(df)}; com erro: {len(errors)}")
+    for error in errors[:20]:
+        for err in error['erros']:
+            print(f"  - Linha {error['linha']}, campo '{err['loc'][0]}': {err['msg']}")
+    if tipado is None:
+        raise SystemExit(1)
+
+    estado = CampaignRollup.load(args.estado) if os.path.exists(args.estado) and not args.recriar else CampaignRollup()
+    repetidos = estado.loaded_days(tipado)
+    if len(repetidos):
+        print(f"{len(repetidos)} dia(s) do arquivo já estão no estado e serão substituídos")
+    afetados = estado.append(tipado)
+    estado.save(args.estado)
+    print(f"Grupos afetados: {len(afetados)} de {len(estado.somas)}; estado gravado em {args.estado}")
+
+    resultado = estado.rollup(args.nivel)
+    if args.saida:
+        resultado.to_csv(args.saida)
+        print(f"Rollup gravado em {args.saida}")
+    else:
+        print(resultado[['Amount_spent', 'Link_clicks', 'Impressions', 'Conversions'] + METRICAS].head(20))
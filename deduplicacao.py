@@ -0,0 +1,128 @@
+import pandas as pd
+import numpy as np
+from typing import Dict, List
+from instrumentacao import stage
+
+# Partículas ignoradas na chave do nome
+_PARTICULAS = r'\b(da|de|do|das|dos|e)\b'
+
+# Regras fonéticas simplificadas para nomes em português, aplicadas em ordem.
+# 'gue'/'gui' vêm antes de 'ge'/'gi', senão 'Miguel' e 'Migel' acabariam com chaves diferentes.
+_REGRAS_FONETICAS = [
+    ('ph', 'f'), ('th', 't'), ('ch', 'x'), ('lh', 'li'), ('nh', 'ni'),
+    ('ce', 'se'), ('ci', 'si'), ('gue', 'ge'), ('gui', 'gi'), ('ge', 'je'), ('gi', 'ji'), ('qu', 'c'),
+    ('y', 'i'), ('w', 'v'), ('k', 'c'), ('z', 's'), ('h', ''),
+    ('ss', 's'), ('rr', 'r'), ('ll', 'l'), ('nn', 'n'), ('mm', 'm'), ('tt', 't'), ('pp', 'p'),
+]
+
+CHAVES = ['cpf', 'email', 'nome']
+
+
+def normalize_cpf(cpf: pd.Series) -> pd.Series:
+    """
+    Só os dígitos do CPF; vazio quando não sobram 11 dígitos
+    """
+    digitos = cpf.astype('string').str.replace(r'[^0-9]', '', regex=True)
+    return digitos.where(digitos.str.len() == 11)
+
+
+def normalize_email(email: pd.Series) -> pd.Series:
+    """
+    Email sem espaços nas pontas e em minúsculas; vazio quando não tem '@'
+    """
+    normalizado = email.astype('string').str.strip().str.lower()
+    return normalizado.where(normalizado.str.contains('@', regex=False))
+
+
+def phonetic_name(nome: pd.Series) -> pd.Series:
+    """
+    Chave fonética do nome: sem acentos, minúsculas, sem partículas e com regras
+    fonéticas simplificadas, tudo com operações de string sobre a coluna inteira
+    """
+    chave = nome.astype('string').str.normalize('NFKD').str.replace('[\u0300-\u036f]', '', regex=True)
+    chave = chave.str.lower().str.replace(r'[^a-z ]', ' ', regex=True)
+    chave = chave.str.replace(_PARTICULAS, ' ', regex=True)
+    for de, para in _REGRAS_FONETICAS:
+        chave = chave.str.replace(de, para, regex=False)
+    chave = chave.str.split().str.join(' ')
+    return chave.where(chave.str.len() > 0)
+
+
+def blocking_keys(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Chaves de bloqueio de cada cliente: CPF normalizado, email em minúsculas e
+    nome fonético combinado com a data de nascimento (nomes comuns sozinhos geram falsos positivos)
+    """
+    n = len(df)
+    vazio = pd.Series(pd.NA, index=df.index, dtype='string')
+    chaves = pd.DataFrame(index=df.index)
+    chaves['cpf'] = normalize_cpf(df['cpf']) if 'cpf' in df.columns else vazio
+    chaves['email'] = normalize_email(df['email']) if 'email' in df.columns else vazio
+    if 'nome' in df.columns and 'data_nascimento' in df.columns and n:
+        data = df['data_nascimento'].astype('string')
+        data = data.where(data.str.fullmatch(r'[0-9]{4}-[0-9]{2}-[0-9]{2}').fillna(False))
+        chaves['nome'] = phonetic_name(df['nome']) + '|' + data
+    else:
+        chaves['nome'] = vazio
+    return chaves
+
+
+def _componentes(codigos: List[np.ndarray], n: int) -> np.ndarray:
+    """
+    Componentes conexos do grafo "compartilham alguma chave", por propagação do menor rótulo
+    dentro de cada grupo de chave, com pointer jumping; sem comparações par a par
+    """
+    rotulo = np.arange(n)
+    while True:
+        anterior = rotulo.copy()
+        for codigo in codigos:
+            validos = codigo >= 0
+            if not validos.any():
+                continue
+            minimo = np.full(codigo.max() + 1, n, dtype=rotulo.dtype)
+            np.minimum.at(minimo, codigo[validos], rotulo[validos])
+            rotulo[validos] = np.minimum(rotulo[validos], minimo[codigo[validos]])
+        rotulo = rotulo[rotulo]
+        if np.array_equal(rotulo, anterior):
+            return rotulo
+
+
+def find_duplicates(df: pd.DataFrame, chaves: List[str] = CHAVES) -> pd.DataFrame:
+    """
+    Encontra clusters de clientes duplicados que compartilham alguma chave de bloqueio.
+    Retorna um registro por cliente duplicado: 'Nº Linha', 'cluster', 'id_cliente'
+    e as chaves que coincidiram com outro cliente do cluster.
+    """
+    with stage('duplicados', len(df)):
+        n = len(df)
+        colunas = ['Nº Linha', 'cluster', 'id_cliente', 'chaves']
+        if n == 0:
+            return pd.DataFrame(columns=colunas)
+
+        tabela = blocking_keys(df)
+        codigos: Dict[str, np.ndarray] = {}
+        coincide: Dict[str, np.ndarray] = {}
+        for chave in chaves:
+            codigo, _ = pd.factorize(tabela[chave])
+            codigos[chave] = codigo
+            contagem = np.bincount(codigo[codigo >= 0], minlength=1)
+            coincide[chave] = (codigo >= 0) & (contagem[np.maximum(codigo, 0)] > 1)
+
+        rotulo = _componentes(list(codigos.values()), n)
+        tamanho = np.bincount(rotulo, minlength=n)
+        duplicados = np.flatnonzero(tamanho[rotulo] > 1)
+        if len(duplicados) == 0:
+            return pd.DataFrame(columns=colunas)
+
+        cluster = pd.factorize(rotulo[duplicados])[0]
+        chaves_coincidentes = pd.Series('', index=range(len(duplicados)), dtype=object)
+        for chave in chaves:
+            marca = np.where(coincide[chave][duplicados], chave + ',', '')
+            chaves_coincidentes = chaves_coincidentes + marca
+
+        return pd.DataFrame({
+            'Nº Linha': duplicados + 1,
+            'cluster': cluster,
+            'id_cliente': df['id_cliente'].iloc[duplicados].to_numpy() if 'id_cliente' in df.columns else None,
+            'chaves': chaves_coincidentes.str.rstrip(',').to_numpy(),
+        }).sort_values(['cluster', 'Nº Linha'], kind='stable').reset_index(drop=True)
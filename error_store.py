@@ -0,0 +1,240 @@
+import pandas as pd
+import numpy as np
+from typing import List, Dict, Optional, Tuple
+from validacao import (ValidationMemo, validate_columns, validate_dataframe_columnar, suporta_validacao_vetorizada,
+                       validate_dataframe_pydantic)
+from instrumentacao import stage
+
+
+class ErrorStore:
+    """
+    Armazena os erros de validação em arrays paralelos (linha, id do campo, id do erro)
+    e numa tabela de mensagens internadas, em vez de uma lista de dicionários com o
+    payload completo de e.errors().
+    As linhas são numeradas a partir de 1, como em validate_dataframe; a linha 0 guarda erros de colunas.
+    """
+
+    def __init__(self, campos: List[str]):
+        self.campos: List[str] = list(campos)
+        self.mensagens: List[Tuple[str, str]] = []  # (tipo, mensagem)
+        self._id_campo: Dict[str, int] = {campo: i for i, campo in enumerate(self.campos)}
+        self._id_mensagem: Dict[Tuple[str, str], int] = {}
+        self._blocos: List[Tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+        self._arrays: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None
+
+    # --- Construção ---
+
+    def _campo(self, campo: str) -> int:
+        if campo not in self._id_campo:
+            self._id_campo[campo] = len(self.campos)
+            self.campos.append(campo)
+        return self._id_campo[campo]
+
+    def _mensagem(self, tipo: str, msg: str) -> int:
+        chave = (tipo, msg)
+        if chave not in self._id_mensagem:
+            self._id_mensagem[chave] = len(self.mensagens)
+            self.mensagens.append(chave)
+        return self._id_mensagem[chave]
+
+    def append_arrays(self, linhas: np.ndarray, indices_campos: np.ndarray, codigos: np.ndarray,
+                      modelos: List[Tuple], campos: List[str]):
+        """
+        Acrescenta erros no formato de validate_dataframe_columnar.
+        `linhas` já deve estar numerada a partir de 1.
+        """
+        if len(linhas) == 0:
+            return
+        mapa_campos = np.array([self._campo(campo) for campo in campos], dtype=np.int16)
+        mapa_mensagens = np.array([self._mensagem(tipo, msg) for tipo, msg, _ in modelos], dtype=np.int32)
+        self._blocos.append((np.asarray(linhas, dtype=np.int64),
+                             mapa_campos[indices_campos],
+                             mapa_mensagens[codigos]))
+        self._arrays = None
+
+    def append_dicts(self, errors: List[Dict]):
+        """
+        Acrescenta erros no formato [{'linha', 'erros'}] (ex.: do caminho linha a linha do Pydantic)
+        """
+        linhas, campos, codigos = [], [], []
+        for error in errors:
+            for err in error['erros']:
+                linhas.append(error['linha'])
+                campos.append(self._campo(str(err['loc'][0])))
+                codigos.append(self._mensagem(err.get('type', ''), err['msg']))
+        if linhas:
+            self._blocos.append((np.array(linhas, dtype=np.int64),
+                                 np.array(campos, dtype=np.int16),
+                                 np.array(codigos, dtype=np.int32)))
+            self._arrays = None
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame, model_class, memo: Optional[ValidationMemo] = None) -> 'ErrorStore':
+        """
+        Valida o dataframe e guarda só os erros compactos.
+        Com `memo`, os valores já validados em blocos anteriores são reaproveitados.
+        """
+        store = cls(list(model_class.model_fields))
+
+        column_errors = validate_columns(df, model_class)
+        if column_errors:
+            store.append_dicts([{'linha': 0, 'erros': [{'loc': ('colunas',), 'msg': error, 'type': 'missing'}]}
+                                for error in column_errors])
+            return store
+
+        if not suporta_validacao_vetorizada(model_class):
+            store.append_dicts(validate_dataframe_pydantic(df, model_class))
+            return store
+
+        posicoes, indices_campos, codigos, modelos, campos = validate_dataframe_columnar(df, model_class, memo)
+        with stage('coleta_erros', len(posicoes)):
+            linhas = df.index.to_numpy()[posicoes].astype(np.int64) + 1
+            store.append_arrays(linhas, indices_campos, codigos, modelos, campos)
+        return store
+
+    def with_errors(self, errors: List[Dict]) -> 'ErrorStore':
+        """
+        Novo store com os erros deste mais `errors` (formato [{'linha', 'erros'}]);
+        os arrays deste store não são alterados
+        """
+        novo = ErrorStore(self.campos)
+        novo.mensagens = list(self.mensagens)
+        novo._id_mensagem = dict(self._id_mensagem)
+        novo._blocos = [self._consolidar()]
+        novo.append_dicts(errors)
+        return novo
+
+    # --- Acesso aos arrays ---
+
+    def _consolidar(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        if self._arrays is None:
+            if self._blocos:
+                linhas, ids_campos, ids_mensagens = (np.concatenate(partes) for partes in zip(*self._blocos))
+                if len(linhas) > 1 and (np.diff(linhas) < 0).any():
+                    # Blocos fora de ordem (ex.: erros de integridade): ordenação estável por linha
+                    ordem = np.argsort(linhas, kind='stable')
+                    linhas, ids_campos, ids_mensagens = linhas[ordem], ids_campos[ordem], ids_mensagens[ordem]
+                self._arrays = (linhas, ids_campos, ids_mensagens)
+                self._blocos = [self._arrays]
+            else:
+                self._arrays = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int16),
+                                np.empty(0, dtype=np.int32))
+        return self._arrays
+
+    @property
+    def linhas(self) -> np.ndarray:
+        return self._consolidar()[0]
+
+    @property
+    def ids_campos(self) -> np.ndarray:
+        return self._consolidar()[1]
+
+    @property
+    def ids_mensagens(self) -> np.ndarray:
+        return self._consolidar()[2]
+
+    def __len__(self) -> int:
+        return len(self.linhas)
+
+    def error_rows(self) -> np.ndarray:
+        """
+        Retorna as linhas com erro, em ordem
+        """
+        return np.unique(self.linhas)
+
+    def rows_with_errors(self) -> int:
+        return len(self.error_rows())
+
+    @property
+    def nbytes(self) -> int:
+        return sum(array.nbytes for array in self._consolidar())
+
+    # --- Consultas agregadas ---
+
+    def errors_per_field(self) -> pd.Series:
+        """
+        Quantidade de erros por campo, em ordem decrescente
+        """
+        contagem = np.bincount(self.ids_campos, minlength=len(self.campos))
+        serie = pd.Series(contagem, index=self.campos, name='erros')
+        return serie[serie > 0].sort_values(ascending=False)
+
+    def top_error_types(self, n: int = 10) -> pd.DataFrame:
+        """
+        Os `n` erros (tipo, mensagem) mais frequentes
+        """
+        contagem = np.bincount(self.ids_mensagens, minlength=len(self.mensagens))
+        ordem = np.argsort(-contagem, kind='stable')[:n]
+        ordem = ordem[contagem[ordem] > 0]
+        return pd.DataFrame({
+            'tipo': [self.mensagens[i][0] for i in ordem],
+            'mensagem': [self.mensagens[i][1] for i in ordem],
+            'erros': contagem[ordem],
+        })
+
+    # --- Filtros e paginação ---
+
+    def select(self, campos: Optional[List[str]] = None, mensagens: Optional[List[str]] = None) -> np.ndarray:
+        """
+        Posições (no store) dos erros dos campos e mensagens escolhidos; None não filtra
+        """
+        selecao = np.ones(len(self), dtype=bool)
+        if campos is not None:
+            ids = [self._id_campo[campo] for campo in campos if campo in self._id_campo]
+            selecao &= np.isin(self.ids_campos, ids)
+        if mensagens is not None:
+            escolhidas = set(mensagens)
+            ids = [i for i, (_, msg) in enumerate(self.mensagens) if msg in escolhidas]
+            selecao &= np.isin(self.ids_mensagens, ids)
+        return np.flatnonzero(selecao)
+
+    def to_frame(self, indices: Optional[np.ndarray] = None, df: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+        """
+        Tabela com um erro por linha (Nº Linha, campo, tipo, mensagem e, com `df`, valor).
+        Os valores são buscados por posição direta, uma vez por campo.
+        """
+        if indices is None:
+            indices = np.arange(len(self))
+        linhas = self.linhas[indices]
+        ids_campos = self.ids_campos[indices]
+        ids_mensagens = self.ids_mensagens[indices]
+        tabela = pd.DataFrame({
+            'Nº Linha': linhas,
+            'campo': np.array(self.campos, dtype=object)[ids_campos],
+            'tipo': np.array([tipo for tipo, _ in self.mensagens], dtype=object)[ids_mensagens],
+            'mensagem': np.array([msg for _, msg in self.mensagens], dtype=object)[ids_mensagens],
+        })
+        if df is not None:
+            valores = np.full(len(indices), None, dtype=object)
+            for id_campo in np.unique(ids_campos).tolist():
+                campo = self.campos[id_campo]
+                selecao = (ids_campos == id_campo) & (linhas > 0)
+                if campo in df.columns and selecao.any():
+                    valores[selecao] = df[campo].iloc[linhas[selecao] - 1].to_numpy(dtype=object)
+            tabela['valor'] = valores
+        return tabela
+
+    # --- Expansão sob demanda ---
+
+    def expand_row(self, linha: int, df: Optional[pd.DataFrame] = None) -> Dict:
+        """
+        Monta o dicionário {'linha', 'erros'} de uma linha, no formato de validate_dataframe.
+        Com `df`, o valor de entrada de cada campo é buscado na posição da linha.
+        """
+        linhas = self.linhas
+        inicio, fim = np.searchsorted(linhas, [linha, linha + 1])
+        erros = []
+        for id_campo, id_mensagem in zip(self.ids_campos[inicio:fim].tolist(), self.ids_mensagens[inicio:fim].tolist()):
+            campo = self.campos[id_campo]
+            tipo, msg = self.mensagens[id_mensagem]
+            erro = {'type': tipo, 'loc': (campo,), 'msg': msg}
+            if df is not None and linha > 0 and campo in df.columns:
+                erro['input'] = df[campo].iat[linha - 1]
+            erros.append(erro)
+        return {'linha': linha, 'erros': erros}
+
+    def to_dicts(self, df: Optional[pd.DataFrame] = None) -> List[Dict]:
+        """
+        Expande todos os erros no formato [{'linha', 'erros'}]
+        """
+        return [self.expand_row(linha, df) for linha in self.error_rows().tolist()]
@@ -0,0 +1,356 @@
+import pandas as pd
+import numpy as np
+import argparse
+import csv
+import os
+import tempfile
+from typing import Dict, Iterator, List, Tuple
+from models import ClientePedido, Pedido, Item, LinhaPedido
+from validacao import validate_columns, error_inputs
+from validacao_tipada import validate_typed_columnar
+from validacao_streaming import CHUNKSIZE_PADRAO, COLUNAS_RELATORIO, read_csv_chunks
+from leitura import columnar_format, iter_columnar_batches, read_columns, read_typed
+from integridade import MSG_CLIENTE_INEXISTENTE
+from exportacao import ChunkWriter
+from instrumentacao import stage
+
+# Esquema estrela de old/gerar_dados.py: linhas de pedido (fato) -> pedidos -> clientes, e -> itens
+ARQUIVOS = {'clientes': ClientePedido, 'pedidos': Pedido, 'itens': Item, 'linhas_pedido': LinhaPedido}
+COLUNAS_ERROS = ['arquivo'] + COLUNAS_RELATORIO
+PARTICOES_DUPLICADOS = 64  # arquivos temporários da checagem de (PedidoId, Line) únicos
+
+MSG_CHAVE_DUPLICADA = 'Chave primária duplicada'
+MSG_PEDIDO_INEXISTENTE = 'Pedido não encontrado no arquivo de pedidos'
+MSG_PEDIDO_REJEITADO = 'Pedido rejeitado na validação'
+MSG_ITEM_INEXISTENTE = 'Item não encontrado no arquivo de itens'
+
+
+class KeyIndex:
+    """
+    Índice de uma chave: as chaves ordenadas e a posição original de cada uma.
+    A busca é binária (np.searchsorted), sem tabela hash: só dois arrays do tamanho da tabela.
+    Com chaves repetidas, a busca encontra a primeira ocorrência.
+    """
+
+    def __init__(self, chaves: np.ndarray):
+        self.ordem = np.argsort(chaves, kind='stable')
+        self.chaves = chaves[self.ordem]
+
+    def duplicates(self) -> np.ndarray:
+        """
+        Posições (na tabela original) das ocorrências repetidas, sem contar a primeira de cada chave
+        """
+        repetidas = np.zeros(len(self.chaves), dtype=bool)
+        repetidas[1:] = self.chaves[1:] == self.chaves[:-1]
+        return np.sort(self.ordem[repetidas])
+
+    def lookup(self, chaves: np.ndarray) -> np.ndarray:
+        """
+        Posição de cada chave na tabela original, ou -1 quando ela não existe.
+        Chaves de texto são buscadas uma vez por valor distinto.
+        """
+        if chaves.dtype == object:
+            codigos, unicos = pd.factorize(chaves)
+            posicoes_unicos = self._buscar(np.asarray(unicos, dtype=object))
+            return np.where(codigos >= 0, posicoes_unicos[np.maximum(codigos, 0)], -1)
+        return self._buscar(chaves)
+
+    def _buscar(self, chaves: np.ndarray) -> np.ndarray:
+        if len(self.chaves) == 0:
+            return np.full(len(chaves), -1, dtype=np.int64)
+        posicoes = np.minimum(np.searchsorted(self.chaves, chaves), len(self.chaves) - 1)
+        return np.where(self.chaves[posicoes] == chaves, self.ordem[posicoes], -1)
+
+
+class _ChavesParticionadas:
+    """
+    Checagem de unicidade de (PedidoId, Line) em arquivos maiores que a memória:
+    as chaves de cada bloco vão para arquivos temporários particionados por PedidoId,
+    e cada partição é ordenada separadamente no fim.
+    """
+
+    def __init__(self, diretorio: str, particoes: int = PARTICOES_DUPLICADOS):
+        self.caminhos = [os.path.join(diretorio, f'chaves_{i:03d}.bin') for i in range(particoes)]
+
+    def add(self, pedidos: np.ndarray, linhas_pedido: np.ndarray, linhas: np.ndarray):
+        triplas = np.column_stack([pedidos, linhas_pedido, linhas]).astype(np.int64)
+        particao = pedidos % len(self.caminhos)
+        ordem = np.argsort(particao, kind='stable')
+        limites = np.searchsorted(particao[ordem], np.arange(len(self.caminhos) + 1))
+        for i, caminho in enumerate(self.caminhos):
+            if limites[i] < limites[i + 1]:
+                with open(caminho, 'ab') as arquivo:
+                    triplas[ordem[limites[i]:limites[i + 1]]].tofile(arquivo)
+
+    def duplicates(self) -> np.ndarray:
+        """
+        Triplas (PedidoId, Line, linha) das linhas cuja chave já apareceu numa linha anterior,
+        ordenadas pela linha
+        """
+        duplicadas = [np.empty((0, 3), dtype=np.int64)]
+        for caminho in self.caminhos:
+            if not os.path.exists(caminho):
+                continue
+            triplas = np.fromfile(caminho, dtype=np.int64).reshape(-1, 3)
+            triplas = triplas[np.lexsort((triplas[:, 2], triplas[:, 1], triplas[:, 0]))]
+            repetida = (triplas[1:, 0] == triplas[:-1, 0]) & (triplas[1:, 1] == triplas[:-1, 1])
+            duplicadas.append(triplas[1:][repetida])
+        duplicadas = np.concatenate(duplicadas)
+        return duplicadas[np.argsort(duplicadas[:, 2], kind='stable')]
+
+
+def _caminho(diretorio: str, nome: str) -> str:
+    """
+    O arquivo da tabela em `diretorio`, em CSV ou Parquet
+    """
+    for extensao in ('.csv', '.parquet'):
+        if os.path.exists(os.path.join(diretorio, nome + extensao)):
+            return os.path.join(diretorio, nome + extensao)
+    raise FileNotFoundError(f"Arquivo {nome}.csv ou {nome}.parquet não encontrado em {diretorio}")
+
+
+def _blocos(caminho: str, model_class, chunksize: int) -> Iterator[pd.DataFrame]:
+    if columnar_format(caminho) is None:
+        return read_csv_chunks(caminho, chunksize, model_class)
+    return iter_columnar_batches(caminho, model_class, chunksize)
+
+
+class _RelatorioErros:
+    """
+    Grava os erros (arquivo, linha, campo, tipo, mensagem, valor) à medida que aparecem
+    """
+
+    def __init__(self, caminho: str):
+        self._arquivo = open(caminho, 'w', newline='', encoding='utf-8')
+        self._writer = csv.writer(self._arquivo)
+        self._writer.writerow(COLUNAS_ERROS)
+        self.total = 0
+
+    def validation(self, nome: str, df: pd.DataFrame, resultado):
+        posicoes, indices_campos, codigos, modelos, campos = resultado
+        entradas = error_inputs(df, posicoes, indices_campos, campos)
+        linhas = df.index.to_numpy()[posicoes] + 1
+        for linha, i, codigo, entrada in zip(linhas.tolist(), indices_campos.tolist(), codigos.tolist(),
+                                             entradas.tolist()):
+            tipo, msg, _ = modelos[codigo]
+            self._writer.writerow([nome, linha, campos[i], tipo, msg, entrada])
+        self.total += len(posicoes)
+
+    def rows(self, nome: str, linhas: np.ndarray, campo: str, tipo: str, msg: str, valores: np.ndarray):
+        for linha, valor in zip(linhas.tolist(), valores.tolist()):
+            self._writer.writerow([nome, linha, campo, tipo, msg, valor])
+        self.total += len(linhas)
+
+    def close(self):
+        self._arquivo.close()
+
+
+def _validar_dimensao(nome: str, caminho: str, model_class, chave: str,
+                      relatorio: _RelatorioErros) -> Tuple[pd.DataFrame, KeyIndex]:
+    """
+    Lê e valida uma tabela de dimensão inteira; chaves repetidas rejeitam as ocorrências
+    depois da primeira. Retorna o dataframe tipado e o índice da chave.
+    """
+    df = read_typed(caminho, model_class)
+    resultado, tipado = validate_typed_columnar(df, model_class)
+    relatorio.validation(nome, df, resultado)
+    chaves = tipado[chave]
+    # Chaves vazias (já rejeitadas pela validação) viram -1 ou '' para que o índice possa ser ordenado
+    inteira = pd.api.types.is_integer_dtype(chaves.dtype)
+    indice = KeyIndex(chaves.to_numpy(dtype='int64' if inteira else object, na_value=-1 if inteira else ''))
+    duplicadas = indice.duplicates()
+    duplicadas = duplicadas[tipado['valida'].to_numpy()[duplicadas]]
+    relatorio.rows(nome, duplicadas + 1, chave, 'duplicate_key', MSG_CHAVE_DUPLICADA, df[chave].iloc[duplicadas].to_numpy())
+    tipado.iloc[duplicadas, tipado.columns.get_loc('valida')] = False
+    return tipado, indice
+
+
+def validate_orders(diretorio: str, destino: str, chunksize: int = CHUNKSIZE_PADRAO) -> Dict:
+    """
+    Primeira passada do ETL: valida as quatro tabelas e as chaves entre elas.
+    - tipos e regras de cada modelo, inclusive ValorTotal == Quantidade * PrecoUnitario;
+    - chaves primárias únicas, inclusive (PedidoId, Line) entre as linhas de pedido válidas;
+    - Pedido.ClienteId -> ClienteId, LinhaPedido.PedidoId -> PedidoId e ItemId -> Id,
+      com busca binária nos índices das dimensões.
+    As dimensões ficam em memória; as linhas de pedido são lidas em blocos.
+    Os erros vão para `destino`/erros_pedidos.csv. Retorna as dimensões tipadas, os índices
+    e a máscara das linhas de pedido válidas, usados por build_facts.
+    """
+    os.makedirs(destino, exist_ok=True)
+    caminhos = {nome: _caminho(diretorio, nome) for nome in ARQUIVOS}
+    for nome, model_class in ARQUIVOS.items():
+        column_errors = validate_columns(pd.DataFrame(columns=read_columns(caminhos[nome])), model_class)
+        if column_errors:
+            return {'erros_colunas': [f"{nome}: {error}" for error in column_errors]}
+
+    relatorio = _RelatorioErros(os.path.join(destino, 'erros_pedidos.csv'))
+    try:
+        with stage('integridade'):
+            clientes, indice_clientes = _validar_dimensao('clientes', caminhos['clientes'], ClientePedido,
+                                                          'ClienteId', relatorio)
+            itens, indice_itens = _validar_dimensao('itens', caminhos['itens'], Item, 'Id', relatorio)
+            pedidos, indice_pedidos = _validar_dimensao('pedidos', caminhos['pedidos'], Pedido, 'PedidoId', relatorio)
+
+            # Pedido.ClienteId -> ClienteId (só clientes válidos)
+            cliente_do_pedido = indice_clientes.lookup(pedidos['ClienteId'].to_numpy(dtype='int64', na_value=-1))
+            cliente_valido = clientes['valida'].to_numpy()
+            orfaos = pedidos['valida'].to_numpy() & ((cliente_do_pedido < 0) |
+                                                     ~cliente_valido[np.maximum(cliente_do_pedido, 0)])
+            relatorio.rows('pedidos', np.flatnonzero(orfaos) + 1, 'ClienteId', 'foreign_key', MSG_CLIENTE_INEXISTENTE,
+                           pedidos['ClienteId'].to_numpy()[orfaos])
+            pedidos.loc[orfaos, 'valida'] = False
+            pedidos['posicao_cliente'] = cliente_do_pedido
+
+        pedido_valido = pedidos['valida'].to_numpy()
+        item_valido = itens['valida'].to_numpy()
+        validas: List[np.ndarray] = []
+        with tempfile.TemporaryDirectory() as temporario:
+            chaves = _ChavesParticionadas(temporario)
+            for bloco in _blocos(caminhos['linhas_pedido'], LinhaPedido, chunksize):
+                resultado, tipado = validate_typed_columnar(bloco, LinhaPedido)
+                relatorio.validation('linhas_pedido', bloco, resultado)
+                valida = tipado['valida'].to_numpy().copy()
+                linhas = bloco.index.to_numpy() + 1
+
+                with stage('integridade', len(bloco)):
+                    ids_pedidos = tipado['PedidoId'].to_numpy(dtype='int64', na_value=-1)
+                    posicao_pedido = indice_pedidos.lookup(ids_pedidos)
+                    inexistente = valida & (posicao_pedido < 0)
+                    rejeitado = valida & (posicao_pedido >= 0) & ~pedido_valido[np.maximum(posicao_pedido, 0)]
+                    posicao_item = indice_itens.lookup(tipado['ItemId'].to_numpy(dtype=object, na_value=None))
+                    sem_item = valida & ((posicao_item < 0) | ~item_valido[np.maximum(posicao_item, 0)])
+                    for mascara, campo, msg in ((inexistente, 'PedidoId', MSG_PEDIDO_INEXISTENTE),
+                                                (rejeitado, 'PedidoId', MSG_PEDIDO_REJEITADO),
+                                                (sem_item, 'ItemId', MSG_ITEM_INEXISTENTE)):
+                        relatorio.rows('linhas_pedido', linhas[mascara], campo, 'foreign_key', msg,
+                                       bloco[campo].to_numpy()[mascara])
+                    valida &= ~(inexistente | rejeitado | sem_item)
+
+                    # Só as linhas válidas entram na checagem de chave: uma linha já rejeitada
+                    # não pode tornar duplicada a linha válida que vem depois dela
+                    chaves.add(ids_pedidos[valida], tipado['Line'].to_numpy(dtype='int64', na_value=-1)[valida],
+                               linhas[valida])
+                validas.append(valida)
+
+            with stage('duplicados'):
+                duplicadas = chaves.duplicates()
+        linha_valida = np.concatenate(validas) if validas else np.empty(0, dtype=bool)
+        relatorio.rows('linhas_pedido', duplicadas[:, 2], 'PedidoId, Line', 'duplicate_key', MSG_CHAVE_DUPLICADA,
+                       np.array([f'({pedido}, {line})' for pedido, line in duplicadas[:, :2].tolist()], dtype=object))
+        linha_valida[duplicadas[:, 2] - 1] = False
+    finally:
+        relatorio.close()
+
+    return {
+        'erros_colunas': [],
+        'total_erros': relatorio.total,
+        'caminhos': caminhos,
+        'clientes': clientes,
+        'itens': itens,
+        'pedidos': pedidos,
+        'indice_pedidos': indice_pedidos,
+        'indice_itens': indice_itens,
+        'linhas_validas': linha_valida,
+    }
+
+
+def build_facts(validacao: Dict, destino: str, formato: str = 'parquet', chunksize: int = CHUNKSIZE_PADRAO) -> Dict[str, int]:
+    """
+    Segunda passada do ETL: grava as tabelas fato desnormalizadas, só com registros válidos.
+    - fato_linhas_pedido: cada linha de pedido com a data e o cliente do pedido e o nome do item;
+    - fato_pedidos: cada pedido com o cliente e os totais das suas linhas.
+    As junções são buscas nos índices ordenados das dimensões (uma merge join contra a dimensão
+    ordenada), bloco a bloco, então só as dimensões e o bloco atual ficam em memória.
+    """
+    clientes, itens, pedidos = validacao['clientes'], validacao['itens'], validacao['pedidos']
+    linhas_validas = validacao['linhas_validas']
+    extensao = '.csv' if formato == 'csv' else '.parquet'
+    totais = {'fato_linhas_pedido': 0, 'fato_pedidos': 0}
+
+    quantidade_linhas = np.zeros(len(pedidos), dtype=np.int64)
+    quantidade_itens = np.zeros(len(pedidos), dtype=np.int64)
+    valor_pedido = np.zeros(len(pedidos), dtype=np.float64)
+    posicao_cliente = pedidos['posicao_cliente'].to_numpy()
+
+    with ChunkWriter(os.path.join(destino, 'fato_linhas_pedido' + extensao), formato) as saida:
+        inicio = 0
+        for bloco in _blocos(validacao['caminhos']['linhas_pedido'], LinhaPedido, chunksize):
+            valida = linhas_validas[inicio:inicio + len(bloco)]
+            inicio += len(bloco)
+            _, tipado = validate_typed_columnar(bloco[valida], LinhaPedido)
+            with stage('fatos', len(tipado)):
+                posicao_pedido = validacao['indice_pedidos'].lookup(tipado['PedidoId'].to_numpy(dtype='int64'))
+                posicao_item = validacao['indice_itens'].lookup(tipado['ItemId'].to_numpy(dtype=object))
+                cliente = posicao_cliente[posicao_pedido]
+
+                quantidade = tipado['Quantidade'].to_numpy(dtype='int64')
+                valor = tipado['ValorTotal'].to_numpy(dtype='float64')
+                quantidade_linhas += np.bincount(posicao_pedido, minlength=len(pedidos))
+                quantidade_itens += np.bincount(posicao_pedido, weights=quantidade, minlength=len(pedidos)).astype(np.int64)
+                valor_pedido += np.bincount(posicao_pedido, weights=valor, minlength=len(pedidos))
+
+                fato = pd.DataFrame({
+                    'PedidoId': tipado['PedidoId'].to_numpy(dtype='int64'),
+                    'Line': tipado['Line'].to_numpy(dtype='int64'),
+                    'Data': pedidos['Data'].to_numpy()[posicao_pedido],
+                    'ClienteId': clientes['ClienteId'].to_numpy(dtype='int64', na_value=-1)[cliente],
+                    'ClienteNome': clientes['Nome'].to_numpy(dtype=object)[cliente],
+                    'ClienteEmail': clientes['Email'].to_numpy(dtype=object)[cliente],
+                    'ItemId': tipado['ItemId'].to_numpy(dtype=object),
+                    'ItemNome': itens['Nome'].to_numpy(dtype=object)[posicao_item],
+                    'Quantidade': quantidade,
+                    'PrecoUnitario': tipado['PrecoUnitario'].to_numpy(dtype='float64'),
+                    'ValorTotal': valor,
+                })
+                saida.write(fato)
+            totais['fato_linhas_pedido'] += len(fato)
+
+    with stage('fatos', len(pedidos)):
+        validos = pedidos['valida'].to_numpy()
+        cliente = posicao_cliente[validos]
+        fato_pedidos = pd.DataFrame({
+            'PedidoId': pedidos['PedidoId'].to_numpy(dtype='int64', na_value=-1)[validos],
+            'Data': pedidos['Data'].to_numpy()[validos],
+            'ClienteId': clientes['ClienteId'].to_numpy(dtype='int64', na_value=-1)[cliente],
+            'ClienteNome': clientes['Nome'].to_numpy(dtype=object)[cliente],
+            'ClienteEmail': clientes['Email'].to_numpy(dtype=object)[cliente],
+            'QuantidadeLinhas': quantidade_linhas[validos],
+            'QuantidadeItens': quantidade_itens[validos],
+            'ValorPedido': np.round(valor_pedido[validos], 2),
+        })
+        with ChunkWriter(os.path.join(destino, 'fato_pedidos' + extensao), formato) as saida:
+            for inicio in range(0, len(fato_pedidos), chunksize):
+                saida.write(fato_pedidos.iloc[inicio:inicio + chunksize])
+        totais['fato_pedidos'] = len(fato_pedidos)
+    return totais
+
+
+def run_etl(diretorio: str, destino: str, formato: str = 'parquet', chunksize: int = CHUNKSIZE_PADRAO) -> Dict:
+    """
+    Valida as tabelas de pedidos em `diretorio` e grava as tabelas fato em `destino`
+    """
+    validacao = validate_orders(diretorio, destino, chunksize)
+    if validacao['erros_colunas']:
+        return validacao
+    totais = build_facts(validacao, destino, formato, chunksize)
+    return {'erros_colunas': [], 'total_erros': validacao['total_erros'],
+            'linhas_rejeitadas': int((~validacao['linhas_validas']).sum()), **totais}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Valida clientes, pedidos, itens e linhas de pedido e grava as tabelas fato")
+    parser.add_argument('--origem', default='output', help="Diretório com clientes, pedidos, itens e linhas_pedido (.csv ou .parquet)")
+    parser.add_argument('--destino', default='output/estrela', help="Diretório das tabelas fato e do relatório de erros")
+    parser.add_argument('--formato', choices=['parquet', 'csv'], default='parquet', help="Formato das tabelas fato")
+    parser.add_argument('--chunksize', type=int, default=CHUNKSIZE_PADRAO, help="Linhas de pedido por bloco")
+    args = parser.parse_args()
+
+    totais = run_etl(args.origem, args.destino, args.formato, args.chunksize)
+    if totais['erros_colunas']:
+        for error in totais['erros_colunas']:
+            print(error)
+    else:
+        print(f"Erros: {totais['total_erros']} (relatório em {os.path.join(args.destino, 'erros_pedidos.csv')})")
+        print(f"Linhas de pedido rejeitadas: {totais['linhas_rejeitadas']}")
+        print(f"fato_linhas_pedido: {totais['fato_linhas_pedido']} linhas")
+        print(f"fato_pedidos: {totais['fato_pedidos']} linhas")
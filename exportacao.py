@@ -0,0 +1,170 @@
+import pandas as pd
+import numpy as np
+import argparse
+import os
+import uuid
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+import pyarrow as pa
+import pyarrow.parquet as pq
+from validacao import (MODELOS, ValidationMemo, validate_columns, validate_dataframe_columnar, normalize_dataframe,
+                       suporta_validacao_vetorizada, validate_dataframe_pydantic)
+from validacao_streaming import CHUNKSIZE_PADRAO, read_csv_chunks
+from leitura import columnar_format, iter_columnar_batches, read_columns
+
+PARTICAO_PADRAO = 'data_carga'
+
+
+def _erros_por_linha(df: pd.DataFrame, model_class, memo: Optional[ValidationMemo],
+                     normalizados: Dict[str, np.ndarray]) -> Tuple[np.ndarray, List[List[str]], List[List[str]]]:
+    """
+    Posições das linhas com erro e, para cada uma, os códigos ('campo:tipo') e as mensagens dos erros
+    """
+    if not suporta_validacao_vetorizada(model_class):
+        errors = validate_dataframe_pydantic(df, model_class)
+        posicoes = df.index.get_indexer([error['linha'] - 1 for error in errors])
+        codigos = [[f"{err['loc'][0]}:{err['type']}" for err in error['erros']] for error in errors]
+        mensagens = [[err['msg'] for err in error['erros']] for error in errors]
+        return posicoes, codigos, mensagens
+
+    posicoes, indices_campos, codigos, modelos, campos = validate_dataframe_columnar(df, model_class, memo, normalizados)
+    if len(posicoes) == 0:
+        return posicoes, [], []
+    # Os erros já vêm ordenados por linha: cada linha é uma fatia contígua
+    linhas, inicios = np.unique(posicoes, return_index=True)
+    rotulos = np.array([f'{campo}:{tipo}' for campo in campos for tipo, _, _ in modelos], dtype=object)
+    textos = np.array([msg for _, msg, _ in modelos], dtype=object)
+    por_erro = indices_campos * len(modelos) + codigos
+    codigos_linha = [fatia.tolist() for fatia in np.split(rotulos[por_erro], inicios[1:])]
+    mensagens_linha = [fatia.tolist() for fatia in np.split(textos[codigos], inicios[1:])]
+    return linhas, codigos_linha, mensagens_linha
+
+
+def split_validated(df: pd.DataFrame, model_class,
+                    memo: Optional[ValidationMemo] = None) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Separa o bloco validado em (limpos, rejeitados), ambos com a coluna 'linha' (a partir de 1).
+    Os limpos trazem os valores normalizados pelos validadores (CPF/CEP só com dígitos,
+    tipo_endereco em maiúsculas, email com domínio normalizado); os rejeitados trazem os
+    valores originais e as listas 'codigos_erro' ('campo:tipo') e 'mensagens_erro'.
+    """
+    normalizados: Dict[str, np.ndarray] = {}
+    posicoes, codigos, mensagens = _erros_por_linha(df, model_class, memo, normalizados)
+    linhas = df.index.to_numpy() + 1
+
+    validas = np.ones(len(df), dtype=bool)
+    validas[posicoes] = False
+    limpos = normalize_dataframe(df[validas], model_class,
+                                 {campo: valores[validas] for campo, valores in normalizados.items()})
+    limpos.insert(0, 'linha', linhas[validas])
+
+    rejeitados = df.iloc[posicoes].copy()
+    rejeitados.insert(0, 'linha', linhas[posicoes])
+    rejeitados['codigos_erro'] = pd.Series(codigos, index=rejeitados.index, dtype=object)
+    rejeitados['mensagens_erro'] = pd.Series(mensagens, index=rejeitados.index, dtype=object)
+    return limpos.reset_index(drop=True), rejeitados.reset_index(drop=True)
+
+
+def write_partitioned(df: pd.DataFrame, destino: str, particoes: List[str], nome_base: str):
+    """
+    Grava o dataframe como Parquet particionado (diretórios coluna=valor) em `destino`.
+    Arquivos de execuções anteriores são mantidos; `nome_base` identifica os deste bloco.
+    """
+    if len(df) == 0:
+        return
+    pq.write_to_dataset(pa.Table.from_pandas(df, preserve_index=False), destino, partition_cols=particoes,
+                        basename_template=f'{nome_base}-{{i}}.parquet',
+                        existing_data_behavior='overwrite_or_ignore')
+
+
+# --- Gravação em blocos ---
+
+class ChunkWriter:
+    """
+    Grava blocos de dataframe num CSV (acrescentando ao arquivo) ou num Parquet
+    (um row group por bloco), sem manter os blocos anteriores em memória
+    """
+
+    def __init__(self, caminho: str, formato: str = 'csv'):
+        self.caminho = caminho
+        self.formato = formato
+        self._parquet = None
+        self._schema = None
+        self._primeiro = True
+
+    def write(self, df: pd.DataFrame):
+        if self.formato == 'csv':
+            df.to_csv(self.caminho, mode='w' if self._primeiro else 'a', header=self._primeiro,
+                      index=False, encoding='utf-8')
+        else:
+            if self._parquet is None:
+                # Colunas de texto ficam string mesmo que o primeiro bloco tenha só nulos
+                schema = pa.Schema.from_pandas(df, preserve_index=False)
+                self._schema = pa.schema([pa.field(campo.name, pa.string())
+                                          if df[campo.name].dtype == object else campo for campo in schema])
+                self._parquet = pq.ParquetWriter(self.caminho, self._schema)
+            self._parquet.write_table(pa.Table.from_pandas(df, schema=self._schema, preserve_index=False))
+        self._primeiro = False
+
+    def close(self):
+        if self._parquet is not None:
+            self._parquet.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def export_validated(caminho: str, model_class, destino: str, chunksize: int = CHUNKSIZE_PADRAO,
+                     particoes: Optional[List[str]] = None) -> Dict:
+    """
+    Valida o arquivo (CSV, Parquet ou Arrow) em blocos e grava dois datasets Parquet particionados:
+    `destino`/limpos e `destino`/rejeitados. Por padrão a partição é a data da carga;
+    outras colunas do modelo (ex.: 'estado') podem ser acrescentadas em `particoes`.
+    Retorna os totais; com erro de colunas, nada é gravado.
+    """
+    totais = {'total_registros': 0, 'registros_limpos': 0, 'registros_rejeitados': 0, 'erros_colunas': []}
+    column_errors = validate_columns(pd.DataFrame(columns=read_columns(caminho)), model_class)
+    if column_errors:
+        totais['erros_colunas'] = column_errors
+        return totais
+
+    particoes = [PARTICAO_PADRAO] + [coluna for coluna in (particoes or []) if coluna != PARTICAO_PADRAO]
+    carga = date.today().isoformat()
+    lote = uuid.uuid4().hex[:12]
+    if columnar_format(caminho) is None:
+        blocos = read_csv_chunks(caminho, chunksize, model_class)
+    else:
+        blocos = iter_columnar_batches(caminho, model_class, chunksize)
+
+    memo = ValidationMemo()
+    for numero, bloco in enumerate(blocos):
+        limpos, rejeitados = split_validated(bloco, model_class, memo)
+        for tabela, subdiretorio in ((limpos, 'limpos'), (rejeitados, 'rejeitados')):
+            tabela[PARTICAO_PADRAO] = carga
+            write_partitioned(tabela, os.path.join(destino, subdiretorio), particoes, f'{lote}-{numero:05d}')
+        totais['total_registros'] += len(bloco)
+        totais['registros_limpos'] += len(limpos)
+        totais['registros_rejeitados'] += len(rejeitados)
+    return totais
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Valida um arquivo e grava os registros limpos e rejeitados em Parquet")
+    parser.add_argument('arquivo', help="CSV, Parquet ou Arrow de entrada")
+    parser.add_argument('modelo', choices=sorted(MODELOS), help="Modelo usado na validação")
+    parser.add_argument('destino', help="Diretório dos datasets limpos/ e rejeitados/")
+    parser.add_argument('--chunksize', type=int, default=CHUNKSIZE_PADRAO, help="Linhas por bloco")
+    parser.add_argument('--particao', action='append', default=[], help="Coluna extra de partição (pode repetir)")
+    args = parser.parse_args()
+
+    totais = export_validated(args.arquivo, MODELOS[args.modelo], args.destino, args.chunksize, args.particao)
+    if totais['erros_colunas']:
+        for error in totais['erros_colunas']:
+            print(error)
+    else:
+        print(f"Registros: {totais['total_registros']}")
+        print(f"Limpos: {totais['registros_limpos']}")
+        print(f"Rejeitados: {totais['registros_rejeitados']}")
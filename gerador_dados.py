@@ -0,0 +1,364 @@
+import pandas as pd
+import numpy as np
+import argparse
+import os
+from datetime import date
+from typing import Dict, Optional
+from exportacao import ChunkWriter
+
+try:
+    from faker import Faker
+except ImportError:  # Sem Faker, os pools vêm das listas fixas abaixo
+    Faker = None
+
+LINHAS_POR_BLOCO = 1_000_000
+TAMANHO_POOL = 10_000
+TAXA_ERRO_PADRAO = 0.1         # chance de erro por campo, como em introduce_errors
+TAXA_DUPLICADOS_PADRAO = 0.05  # 5 duplicados a cada 100 clientes
+CHANCE_ENDERECO_PADRAO = 0.8   # 80% dos clientes têm endereço
+TAXA_ORFAOS_PADRAO = 0.1       # 10 endereços sem cliente a cada 100 clientes
+FORMATOS = ['csv', 'parquet']
+
+# Erros injetados por campo, os mesmos de old/create_users.py
+ERROS_CLIENTES = {'nome': 'format', 'email': 'null', 'data_nascimento': 'invalid', 'cpf': 'format', 'telefone': 'null'}
+ERROS_ENDERECOS = {'tipo_endereco': 'format', 'endereco': 'null', 'numero': 'invalid', 'complemento': 'null',
+                   'bairro': 'format', 'cidade': 'format', 'estado': 'invalid', 'cep': 'format',
+                   'ponto_referencia': 'null'}
+
+# Listas de old/gerar_dados.py
+NOMES = ['João', 'Maria', 'Pedro', 'Ana', 'Carlos', 'Lucas', 'Mariana', 'Fernanda', 'Bruno', 'Juliana',
+         'Paulo', 'Camila', 'Eduardo', 'Larissa', 'Mateus', 'Patrícia', 'Thiago', 'Renata', 'Felipe', 'Aline',
+         'Ricardo', 'Beatriz', 'Gustavo', 'Tatiane', 'Danilo', 'Sabrina', 'Leandro', 'Natália', 'André', 'Débora',
+         'Vinícius', 'Viviane', 'Gabriel', 'Isabela', 'Fábio', 'Jéssica', 'Roberto', 'Amanda', 'Marcelo', 'Lívia']
+SOBRENOMES = ['Silva', 'Souza', 'Oliveira', 'Pereira', 'Costa', 'Rodrigues', 'Almeida', 'Nascimento', 'Lima', 'Gomes']
+ITENS = [('i1', 'Arroz'), ('i2', 'Feijão'), ('i3', 'Carne'), ('i4', 'Salada'), ('i5', 'Batata'),
+         ('i6', 'Pão'), ('i7', 'Queijo'), ('i8', 'Leite'), ('i9', 'Ovo'), ('i10', 'Banana')]
+PRECOS = [5.00, 8.50, 10.00, 12.00]
+
+TIPOS_ENDERECO = ['Residencial', 'Comercial']
+COMPLEMENTOS = ['', 'Apto 101', 'Casa 2', 'Sala 3']
+REFERENCIAS = ['Próximo ao shopping', 'Em frente à praça', 'Ao lado da escola', '']
+
+# Listas usadas quando o Faker não está instalado
+_ESTADOS = ['Acre', 'Alagoas', 'Amapá', 'Amazonas', 'Bahia', 'Ceará', 'Distrito Federal', 'Espírito Santo', 'Goiás',
+            'Maranhão', 'Mato Grosso', 'Mato Grosso do Sul', 'Minas Gerais', 'Pará', 'Paraíba', 'Paraná', 'Pernambuco',
+            'Piauí', 'Rio de Janeiro', 'Rio Grande do Norte', 'Rio Grande do Sul', 'Rondônia', 'Roraima',
+            'Santa Catarina', 'São Paulo', 'Sergipe', 'Tocantins']
+_LOGRADOUROS = ['Rua', 'Avenida', 'Travessa', 'Largo', 'Alameda', 'Praça', 'Condomínio', 'Esplanada', 'Campo']
+_SOBRENOMES_EXTRAS = ['Ribeiro', 'Carvalho', 'Araújo', 'Martins', 'Rocha', 'Barbosa', 'Cardoso', 'Teixeira',
+                      'Moreira', 'Melo', 'Cavalcante', 'Leão', 'Paz', 'Brito', 'Ramos', 'Nunes', 'Pires', 'Campos']
+_BAIRROS = ['Centro', 'Jardim América', 'Vila Nova', 'Santa Rosa', 'Lourdes', 'Pindorama', 'Boa Vista', 'Savassi',
+            'Vila Nova Paraíso', 'Jardim Leblon', 'São Bento', 'Floresta', 'Serra', 'Funcionários']
+_PREFIXOS_CIDADE = ['', 'Nova ', 'São José de ', 'Santa Rita de ', 'Vila ', 'Porto ']
+_SUFIXOS_CIDADE = ['', ' do Sul', ' do Norte', ' das Pedras', ' do Galho', ' Paulista']
+_DOMINIOS = ['example.org', 'example.com', 'example.net']
+
+_HEX = np.frombuffer(b'0123456789abcdef', dtype=np.uint8)
+
+
+# --- Colunas geradas de uma vez ---
+
+def _texto(matriz: np.ndarray) -> np.ndarray:
+    """
+    Converte uma matriz (n, k) de bytes ASCII em n strings de k caracteres
+    """
+    matriz = np.ascontiguousarray(matriz, dtype=np.uint8)
+    return matriz.view(f'S{matriz.shape[1]}').ravel().astype(f'U{matriz.shape[1]}').astype(object)
+
+
+def _digitos(rng: np.random.Generator, n: int, k: int) -> np.ndarray:
+    return rng.integers(0, 10, size=(n, k), dtype=np.uint8)
+
+
+def uuids(rng: np.random.Generator, n: int) -> np.ndarray:
+    """
+    UUIDs versão 4 aleatórios, gerados a partir do RNG (reprodutíveis com a mesma semente)
+    """
+    nibbles = rng.integers(0, 16, size=(n, 32))
+    nibbles[:, 12] = 4
+    nibbles[:, 16] = 8 + nibbles[:, 16] % 4
+    return _texto(np.insert(_HEX[nibbles], [8, 12, 16, 20], ord('-'), axis=1))
+
+
+def cpfs(rng: np.random.Generator, n: int) -> np.ndarray:
+    """
+    CPFs válidos no formato ###.###.###-##, com os dígitos verificadores calculados na matriz
+    """
+    digitos = _digitos(rng, n, 11).astype(np.int64)
+    for posicao in (9, 10):
+        pesos = np.arange(posicao + 1, 1, -1)
+        digitos[:, posicao] = digitos[:, :posicao] @ pesos * 10 % 11 % 10
+    caracteres = (digitos + ord('0')).astype(np.uint8)
+    return _texto(np.insert(caracteres, [3, 6, 9], [ord('.'), ord('.'), ord('-')], axis=1))
+
+
+def birth_dates(rng: np.random.Generator, n: int, idade_minima: int = 18, idade_maxima: int = 80) -> np.ndarray:
+    """
+    Datas de nascimento YYYY-MM-DD de pessoas entre `idade_minima` e `idade_maxima` anos
+    """
+    hoje = np.datetime64(date.today().isoformat())
+    dias = rng.integers(idade_minima * 365, idade_maxima * 365, size=n).astype('timedelta64[D]')
+    return (hoje - dias).astype('U10').astype(object)
+
+
+def _sortear(rng: np.random.Generator, pool, n: int) -> np.ndarray:
+    pool = np.asarray(pool, dtype=object)
+    return pool[rng.integers(0, len(pool), size=n)]
+
+
+def inject_errors(rng: np.random.Generator, valores: np.ndarray, tipo: str, taxa: float) -> np.ndarray:
+    """
+    introduce_errors (old/create_users.py) aplicado à coluna inteira: cada valor tem
+    chance `taxa` de virar nulo ('null'), maiúsculas ('format') ou 'INVALIDO' ('invalid')
+    """
+    sorteados = np.flatnonzero(rng.random(len(valores)) < taxa)
+    if len(sorteados) == 0 or tipo == 'duplicate':
+        return valores
+    valores = valores.astype(object, copy=True)
+    if tipo == 'null':
+        valores[sorteados] = np.nan
+    elif tipo == 'format':
+        valores[sorteados] = pd.Series(valores[sorteados], dtype=object).astype(str).str.upper().to_numpy(dtype=object)
+    elif tipo == 'invalid':
+        valores[sorteados] = 'INVALIDO'
+    return valores
+
+
+# --- Pools pré-sorteados ---
+
+def build_pools(seed: int = 0, tamanho: int = TAMANHO_POOL, usar_faker: bool = True) -> Dict[str, np.ndarray]:
+    """
+    Pools de valores textuais sorteados uma única vez; as colunas depois só sorteiam índices.
+    Com o Faker (pt_BR) instalado e `usar_faker`, os valores vêm dele; senão, de combinações
+    das listas fixas, o que mantém a geração offline e sem dependências.
+    """
+    if usar_faker and Faker is not None:
+        fake = Faker('pt_BR')
+        fake.seed_instance(seed)
+        return {
+            'nome': np.array([fake.name() for _ in range(tamanho)], dtype=object),
+            'usuario': np.array([fake.user_name() for _ in range(tamanho)], dtype=object),
+            'dominio': np.array([fake.free_email_domain() for _ in range(100)], dtype=object),
+            'telefone': np.array([fake.phone_number() for _ in range(tamanho)], dtype=object),
+            'endereco': np.array([fake.street_address() for _ in range(tamanho)], dtype=object),
+            'numero': np.array([fake.building_number() for _ in range(tamanho)], dtype=object),
+            'bairro': np.array([fake.bairro() for _ in range(tamanho)], dtype=object),
+            'cidade': np.array([fake.city() for _ in range(tamanho)], dtype=object),
+            'estado': np.array([fake.estado_nome() for _ in range(100)], dtype=object),
+            'cep': np.array([fake.postcode() for _ in range(tamanho)], dtype=object),
+        }
+
+    rng = np.random.default_rng(seed)
+    sobrenomes = SOBRENOMES + _SOBRENOMES_EXTRAS
+    nome = (pd.Series(_sortear(rng, NOMES, tamanho)) + ' ' + _sortear(rng, sobrenomes, tamanho)
+            + ' ' + _sortear(rng, sobrenomes, tamanho))
+    usuario = pd.Series(_sortear(rng, NOMES + sobrenomes, tamanho)).str.normalize('NFKD')
+    usuario = usuario.str.encode('ascii', 'ignore').str.decode('ascii').str.lower()
+    telefone = pd.Series(_sortear(rng, ['+55 ', '0', ''], tamanho)) + pd.Series(rng.integers(11, 100, tamanho)).astype(str)
+    telefone = telefone + ' ' + pd.Series(rng.integers(2000, 10000, tamanho)).astype(str) \
+        + '-' + pd.Series(rng.integers(0, 10000, tamanho)).astype(str).str.zfill(4)
+    endereco = (pd.Series(_sortear(rng, _LOGRADOUROS, tamanho)) + ' ' + _sortear(rng, sobrenomes, tamanho)
+                + ', ' + pd.Series(rng.integers(1, 100, tamanho)).astype(str))
+    cidade = (pd.Series(_sortear(rng, _PREFIXOS_CIDADE, tamanho)) + _sortear(rng, sobrenomes, tamanho)
+              + _sortear(rng, _SUFIXOS_CIDADE, tamanho))
+    cep = _texto(_digitos(rng, tamanho, 8) + ord('0'))
+    return {
+        'nome': nome.to_numpy(dtype=object),
+        'usuario': usuario.to_numpy(dtype=object),
+        'dominio': np.array(_DOMINIOS, dtype=object),
+        'telefone': telefone.to_numpy(dtype=object),
+        'endereco': endereco.to_numpy(dtype=object),
+        'numero': rng.integers(1, 2000, tamanho).astype(str).astype(object),
+        'bairro': np.array(_BAIRROS, dtype=object),
+        'cidade': cidade.to_numpy(dtype=object),
+        'estado': np.array(_ESTADOS, dtype=object),
+        'cep': cep,
+    }
+
+
+# --- Blocos de cada arquivo ---
+
+def customers_chunk(rng: np.random.Generator, pools: Dict[str, np.ndarray], n: int,
+                    taxa_erro: float = TAXA_ERRO_PADRAO, taxa_duplicados: float = TAXA_DUPLICADOS_PADRAO) -> pd.DataFrame:
+    """
+    Bloco de `n` clientes com os erros de old/create_users.py, mais os duplicados
+    (cópias de clientes do bloco com um novo id_cliente) no final
+    """
+    email = (pd.Series(_sortear(rng, pools['usuario'], n)) + pd.Series(rng.integers(0, 1000, n)).astype(str)
+             + '@' + _sortear(rng, pools['dominio'], n))
+    colunas = {
+        'id_cliente': uuids(rng, n),
+        'nome': _sortear(rng, pools['nome'], n),
+        'email': email.to_numpy(dtype=object),
+        'data_nascimento': birth_dates(rng, n),
+        'cpf': cpfs(rng, n),
+        'telefone': _sortear(rng, pools['telefone'], n),
+    }
+    for campo, tipo in ERROS_CLIENTES.items():
+        colunas[campo] = inject_errors(rng, colunas[campo], tipo, taxa_erro)
+    clientes = pd.DataFrame(colunas)
+
+    duplicados = int(round(n * taxa_duplicados))
+    if duplicados:
+        copias = clientes.iloc[rng.integers(0, n, duplicados)].copy()
+        copias['id_cliente'] = uuids(rng, duplicados)
+        clientes = pd.concat([clientes, copias], ignore_index=True)
+    return clientes
+
+
+def addresses_chunk(rng: np.random.Generator, pools: Dict[str, np.ndarray], ids_clientes: np.ndarray,
+                    taxa_erro: float = TAXA_ERRO_PADRAO, chance_endereco: float = CHANCE_ENDERECO_PADRAO,
+                    taxa_orfaos: float = TAXA_ORFAOS_PADRAO) -> pd.DataFrame:
+    """
+    Endereços de um bloco de clientes: cada cliente tem endereço com chance `chance_endereco`
+    (os demais ficam sem endereço); no final vêm os órfãos, sem erros injetados e com
+    id_cliente inexistente, na proporção `taxa_orfaos` do número de clientes
+    """
+    com_endereco = ids_clientes[rng.random(len(ids_clientes)) < chance_endereco]
+    orfaos = int(round(len(ids_clientes) * taxa_orfaos))
+
+    def gerar(ids: np.ndarray, taxa: float) -> pd.DataFrame:
+        n = len(ids)
+        colunas = {
+            'id_cliente': ids,
+            'tipo_endereco': _sortear(rng, TIPOS_ENDERECO, n),
+            'endereco': _sortear(rng, pools['endereco'], n),
+            'numero': _sortear(rng, pools['numero'], n),
+            'complemento': _sortear(rng, COMPLEMENTOS, n),
+            'bairro': _sortear(rng, pools['bairro'], n),
+            'cidade': _sortear(rng, pools['cidade'], n),
+            'estado': _sortear(rng, pools['estado'], n),
+            'cep': _sortear(rng, pools['cep'], n),
+            'ponto_referencia': _sortear(rng, REFERENCIAS, n),
+        }
+        for campo, tipo in ERROS_ENDERECOS.items():
+            colunas[campo] = inject_errors(rng, colunas[campo], tipo, taxa)
+        return pd.DataFrame(colunas)
+
+    return pd.concat([gerar(com_endereco, taxa_erro), gerar(uuids(rng, orfaos), 0.0)], ignore_index=True)
+
+
+def sales_customers_chunk(rng: np.random.Generator, inicio: int, n: int) -> pd.DataFrame:
+    """
+    Clientes de old/gerar_dados.py (ClienteId, Nome, Email), com ids a partir de `inicio`
+    """
+    nome = pd.Series(_sortear(rng, NOMES, n)) + ' ' + _sortear(rng, SOBRENOMES, n)
+    return pd.DataFrame({
+        'ClienteId': np.arange(inicio, inicio + n),
+        'Nome': nome.to_numpy(dtype=object),
+        'Email': (nome.str.lower().str.replace(' ', '.', regex=False) + '@gmail.com').to_numpy(dtype=object),
+    })
+
+
+def orders_chunk(rng: np.random.Generator, inicio: int, n: int, total_clientes: int) -> pd.DataFrame:
+    """
+    Pedidos com ids a partir de `inicio`, cada um de um cliente sorteado entre todos
+    e com data entre 2023-01-01 e 450 dias depois
+    """
+    return pd.DataFrame({
+        'PedidoId': np.arange(inicio, inicio + n),
+        'ClienteId': rng.integers(1, total_clientes + 1, n),
+        'Data': (np.datetime64('2023-01-01') + rng.integers(0, 451, n).astype('timedelta64[D]')).astype('U10'),
+    })
+
+
+def order_lines_chunk(rng: np.random.Generator, ids_pedidos: np.ndarray, linhas_por_pedido: float) -> pd.DataFrame:
+    """
+    Linhas dos pedidos do bloco: cada pedido recebe um número de linhas de média `linhas_por_pedido`
+    (Poisson, como sortear o pedido de cada linha) e Line numera as linhas de cada pedido a partir de 1
+    """
+    quantidade_linhas = rng.poisson(linhas_por_pedido, len(ids_pedidos))
+    pedido = np.repeat(ids_pedidos, quantidade_linhas)
+    n = len(pedido)
+    inicio_do_pedido = np.repeat(np.cumsum(quantidade_linhas) - quantidade_linhas, quantidade_linhas)
+    quantidade = rng.integers(1, 16, n)
+    preco = np.array(PRECOS)[rng.integers(0, len(PRECOS), n)]
+    return pd.DataFrame({
+        'PedidoId': pedido,
+        'Line': np.arange(n) - inicio_do_pedido + 1,
+        'ItemId': np.array([item for item, _ in ITENS], dtype=object)[rng.integers(0, len(ITENS), n)],
+        'Quantidade': quantidade,
+        'PrecoUnitario': preco,
+        'ValorTotal': np.round(quantidade * preco, 2),
+    })
+
+
+def generate_dataset(destino: str, clientes: int, formato: str = 'csv', seed: int = 0,
+                     taxa_erro: float = TAXA_ERRO_PADRAO, taxa_duplicados: float = TAXA_DUPLICADOS_PADRAO,
+                     chance_endereco: float = CHANCE_ENDERECO_PADRAO, taxa_orfaos: float = TAXA_ORFAOS_PADRAO,
+                     pedidos: Optional[int] = None, linhas_por_pedido: float = 1.0,
+                     linhas_por_bloco: int = LINHAS_POR_BLOCO, usar_faker: bool = True) -> Dict[str, int]:
+    """
+    Gera em `destino` os arquivos de old/create_users.py (clientes_com_erros, enderecos_com_erros)
+    e de old/gerar_dados.py (clientes, pedidos, itens, linhas_pedido), bloco a bloco.
+    A mesma semente produz os mesmos arquivos. Retorna o número de registros de cada arquivo.
+    """
+    os.makedirs(destino, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    pools = build_pools(seed, usar_faker=usar_faker)
+    pedidos = clientes if pedidos is None else pedidos
+    extensao = '.csv' if formato == 'csv' else '.parquet'
+
+    def caminho(nome: str) -> str:
+        return os.path.join(destino, nome + extensao)
+
+    totais = {nome: 0 for nome in ['clientes_com_erros', 'enderecos_com_erros', 'clientes', 'pedidos',
+                                   'itens', 'linhas_pedido']}
+
+    with ChunkWriter(caminho('clientes_com_erros'), formato) as saida_clientes, \
+            ChunkWriter(caminho('enderecos_com_erros'), formato) as saida_enderecos:
+        for inicio in range(0, clientes, linhas_por_bloco):
+            n = min(linhas_por_bloco, clientes - inicio)
+            bloco = customers_chunk(rng, pools, n, taxa_erro, taxa_duplicados)
+            enderecos = addresses_chunk(rng, pools, bloco['id_cliente'].to_numpy(), taxa_erro, chance_endereco,
+                                        taxa_orfaos)
+            saida_clientes.write(bloco)
+            saida_enderecos.write(enderecos)
+            totais['clientes_com_erros'] += len(bloco)
+            totais['enderecos_com_erros'] += len(enderecos)
+
+    with ChunkWriter(caminho('clientes'), formato) as saida:
+        for inicio in range(0, clientes, linhas_por_bloco):
+            bloco = sales_customers_chunk(rng, inicio + 1, min(linhas_por_bloco, clientes - inicio))
+            saida.write(bloco)
+            totais['clientes'] += len(bloco)
+
+    with ChunkWriter(caminho('pedidos'), formato) as saida_pedidos, \
+            ChunkWriter(caminho('linhas_pedido'), formato) as saida_linhas:
+        for inicio in range(0, pedidos, linhas_por_bloco):
+            bloco = orders_chunk(rng, inicio + 1, min(linhas_por_bloco, pedidos - inicio), clientes)
+            linhas = order_lines_chunk(rng, bloco['PedidoId'].to_numpy(), linhas_por_pedido)
+            saida_pedidos.write(bloco)
+            saida_linhas.write(linhas)
+            totais['pedidos'] += len(bloco)
+            totais['linhas_pedido'] += len(linhas)
+
+    with ChunkWriter(caminho('itens'), formato) as saida:
+        saida.write(pd.DataFrame(ITENS, columns=['Id', 'Nome']))
+        totais['itens'] = len(ITENS)
+
+    return totais
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gera dados sintéticos de clientes, endereços e pedidos em grande volume")
+    parser.add_argument('--clientes', type=int, default=100, help="Número de clientes (sem contar os duplicados)")
+    parser.add_argument('--pedidos', type=int, default=None, help="Número de pedidos (padrão: igual ao de clientes)")
+    parser.add_argument('--linhas-por-pedido', type=float, default=1.0, help="Média de linhas por pedido")
+    parser.add_argument('--destino', default='output', help="Diretório de saída")
+    parser.add_argument('--formato', choices=FORMATOS, default='csv', help="Formato dos arquivos")
+    parser.add_argument('--seed', type=int, default=0, help="Semente dos sorteios")
+    parser.add_argument('--taxa-erro', type=float, default=TAXA_ERRO_PADRAO, help="Chance de erro por campo")
+    parser.add_argument('--taxa-duplicados', type=float, default=TAXA_DUPLICADOS_PADRAO, help="Proporção de clientes duplicados")
+    parser.add_argument('--taxa-orfaos', type=float, default=TAXA_ORFAOS_PADRAO, help="Proporção de endereços sem cliente")
+    parser.add_argument('--linhas-por-bloco', type=int, default=LINHAS_POR_BLOCO, help="Registros gerados por bloco")
+    parser.add_argument('--sem-faker', action='store_true', help="Usa só as listas fixas, mesmo com o Faker instalado")
+    args = parser.parse_args()
+
+    totais = generate_dataset(args.destino, args.clientes, args.formato, args.seed, args.taxa_erro,
+                              args.taxa_duplicados, taxa_orfaos=args.taxa_orfaos, pedidos=args.pedidos,
+                              linhas_por_pedido=args.linhas_por_pedido, linhas_por_bloco=args.linhas_por_bloco,
+                              usar_faker=not args.sem_faker)
+    print("Arquivos gerados com sucesso!")
+    for nome, total in totais.items():
+        print(f"- {nome}: {total} registros")
@@ -0,0 +1,183 @@
+import pandas as pd
+import json
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional
+
+PREFIXO_PROMETHEUS = 'validador'
+
+# Instrumentação ativa no contexto atual (thread da sessão do Streamlit, tarefa asyncio etc.)
+_ativa: ContextVar[Optional['Instrumentacao']] = ContextVar('instrumentacao', default=None)
+_SEM_MEDICAO = nullcontext()
+
+
+class Instrumentacao:
+    """
+    Acumula tempos de parede e de CPU por etapa (leitura, colunas, validação, coleta de erros,
+    renderização...) e, por validador, o número de chamadas, de valores validados e o tempo total.
+    Pode ser compartilhada entre threads (ex.: a validação em lote); o tempo de CPU é o do processo,
+    então etapas simultâneas contam a CPU umas das outras.
+    """
+
+    def __init__(self):
+        self.etapas: Dict[str, Dict[str, float]] = {}
+        self.validadores: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def etapa(self, nome: str, linhas: int = 0) -> Iterator[None]:
+        inicio_parede, inicio_cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            segundos, cpu_segundos = time.perf_counter() - inicio_parede, time.process_time() - inicio_cpu
+            with self._lock:
+                metricas = self.etapas.setdefault(nome, {'chamadas': 0, 'segundos': 0.0, 'cpu_segundos': 0.0, 'linhas': 0})
+                metricas['chamadas'] += 1
+                metricas['segundos'] += segundos
+                metricas['cpu_segundos'] += cpu_segundos
+                metricas['linhas'] += linhas
+
+    def registrar_validador(self, nome: str, valores: int, segundos: float):
+        with self._lock:
+            metricas = self.validadores.setdefault(nome, {'chamadas': 0, 'valores': 0, 'segundos': 0.0})
+            metricas['chamadas'] += 1
+            metricas['valores'] += valores
+            metricas['segundos'] += segundos
+
+    def clear(self):
+        self.etapas.clear()
+        self.validadores.clear()
+
+    # --- Relatórios ---
+
+    def stages_frame(self) -> pd.DataFrame:
+        """
+        Uma linha por etapa, com linhas por segundo quando a etapa informa o número de linhas
+        """
+        tabela = pd.DataFrame.from_dict(self.etapas, orient='index',
+                                        columns=['chamadas', 'segundos', 'cpu_segundos', 'linhas'])
+        tabela.index.name = 'etapa'
+        tabela['linhas_por_segundo'] = (tabela['linhas'] / tabela['segundos'].where(tabela['segundos'] > 0)).round()
+        return tabela.sort_values('segundos', ascending=False)
+
+    def validators_frame(self) -> pd.DataFrame:
+        tabela = pd.DataFrame.from_dict(self.validadores, orient='index', columns=['chamadas', 'valores', 'segundos'])
+        tabela.index.name = 'validador'
+        return tabela.sort_values('segundos', ascending=False)
+
+    def to_dict(self) -> Dict:
+        etapas = {}
+        for nome, metricas in self.etapas.items():
+            etapas[nome] = dict(metricas)
+            if metricas['linhas'] and metricas['segundos'] > 0:
+                etapas[nome]['linhas_por_segundo'] = metricas['linhas'] / metricas['segundos']
+        return {'etapas': etapas, 'validadores': {nome: dict(metricas) for nome, metricas in self.validadores.items()}}
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), indent=2, ensure_ascii=False)
+
+    def to_prometheus(self) -> str:
+        """
+        Métricas no formato texto de exposição do Prometheus
+        """
+        linhas = []
+
+        def metrica(nome: str, tipo: str, ajuda: str, rotulo: str, valores: Dict[str, float]):
+            nome = f'{PREFIXO_PROMETHEUS}_{nome}'
+            linhas.append(f'# HELP {nome} {ajuda}')
+            linhas.append(f'# TYPE {nome} {tipo}')
+            for chave, valor in valores.items():
+                chave = chave.replace('\\', '\\\\').replace('"', '\\"')
+                texto = str(valor) if isinstance(valor, int) else f'{valor:.6g}'
+                linhas.append(f'{nome}{{{rotulo}="{chave}"}} {texto}')
+
+        dados = self.to_dict()
+        etapas, validadores = dados['etapas'], dados['validadores']
+        metrica('etapa_chamadas_total', 'counter', 'Execuções de cada etapa', 'etapa',
+                {nome: m['chamadas'] for nome, m in etapas.items()})
+        metrica('etapa_segundos_total', 'counter', 'Tempo de parede acumulado por etapa', 'etapa',
+                {nome: m['segundos'] for nome, m in etapas.items()})
+        metrica('etapa_cpu_segundos_total', 'counter', 'Tempo de CPU acumulado por etapa', 'etapa',
+                {nome: m['cpu_segundos'] for nome, m in etapas.items()})
+        metrica('etapa_linhas_total', 'counter', 'Linhas processadas por etapa', 'etapa',
+                {nome: m['linhas'] for nome, m in etapas.items() if m['linhas']})
+        metrica('etapa_linhas_por_segundo', 'gauge', 'Vazão média de cada etapa', 'etapa',
+                {nome: m['linhas_por_segundo'] for nome, m in etapas.items() if 'linhas_por_segundo' in m})
+        metrica('validador_chamadas_total', 'counter', 'Chamadas de cada validador', 'validador',
+                {nome: m['chamadas'] for nome, m in validadores.items()})
+        metrica('validador_valores_total', 'counter', 'Valores validados por cada validador', 'validador',
+                {nome: m['valores'] for nome, m in validadores.items()})
+        metrica('validador_segundos_total', 'counter', 'Tempo acumulado em cada validador', 'validador',
+                {nome: m['segundos'] for nome, m in validadores.items()})
+        return '\n'.join(linhas) + '\n'
+
+    def dump(self, caminho: str):
+        """
+        Grava as métricas em Prometheus (.prom/.txt) ou JSON (demais extensões)
+        """
+        conteudo = self.to_prometheus() if caminho.endswith(('.prom', '.txt')) else self.to_json()
+        with open(caminho, 'w', encoding='utf-8') as arquivo:
+            arquivo.write(conteudo)
+
+
+def current() -> Optional[Instrumentacao]:
+    return _ativa.get()
+
+
+@contextmanager
+def instrumented(instrumentacao: Optional[Instrumentacao] = None) -> Iterator[Instrumentacao]:
+    """
+    Ativa a instrumentação no contexto atual enquanto o bloco executa
+    """
+    instrumentacao = instrumentacao if instrumentacao is not None else Instrumentacao()
+    token = _ativa.set(instrumentacao)
+    try:
+        yield instrumentacao
+    finally:
+        _ativa.reset(token)
+
+
+def enable(instrumentacao: Optional[Instrumentacao] = None) -> Instrumentacao:
+    """
+    Ativa a instrumentação no contexto atual até o fim dele (ex.: um script headless)
+    """
+    instrumentacao = instrumentacao if instrumentacao is not None else Instrumentacao()
+    _ativa.set(instrumentacao)
+    return instrumentacao
+
+
+def stage(nome: str, linhas: int = 0):
+    """
+    Mede uma etapa na instrumentação ativa; sem instrumentação, é um contexto vazio
+    """
+    instrumentacao = _ativa.get()
+    if instrumentacao is None:
+        return _SEM_MEDICAO
+    return instrumentacao.etapa(nome, linhas)
+
+
+def count_rows(nome: str, linhas: int):
+    """
+    Soma `linhas` à etapa já medida (quando o número de linhas só é conhecido no fim, como na leitura)
+    """
+    instrumentacao = _ativa.get()
+    if instrumentacao is not None and nome in instrumentacao.etapas:
+        with instrumentacao._lock:
+            instrumentacao.etapas[nome]['linhas'] += linhas
+
+
+def timed_call(nome: str, funcao, valores):
+    """
+    Chama funcao(valores), registrando o tempo no validador `nome` se houver instrumentação ativa
+    """
+    instrumentacao = _ativa.get()
+    if instrumentacao is None:
+        return funcao(valores)
+    inicio = time.perf_counter()
+    try:
+        return funcao(valores)
+    finally:
+        instrumentacao.registrar_validador(nome, len(valores), time.perf_counter() - inicio)
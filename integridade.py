@@ -0,0 +1,51 @@
+import pandas as pd
+import numpy as np
+from typing import List, Dict
+from instrumentacao import stage
+
+MSG_CLIENTE_INEXISTENTE = 'Cliente não encontrado no arquivo de clientes'
+
+
+def check_referential_integrity(df_clientes: pd.DataFrame, df_enderecos: pd.DataFrame) -> Dict:
+    """
+    Confere Endereco.id_cliente contra Cliente.id_cliente com um único índice hash
+    (pd.factorize sobre as duas colunas), em tempo linear no total de chaves.
+    IDs vazios são ignorados aqui: já são apontados pela validação de cada modelo.
+    Retorna as linhas (a partir de 1) de endereços órfãos e de clientes sem endereço,
+    e a quantidade de endereços de cada cliente.
+    """
+    with stage('integridade', len(df_clientes) + len(df_enderecos)):
+        ids_clientes = df_clientes['id_cliente']
+        ids_enderecos = df_enderecos['id_cliente']
+        n_clientes = len(ids_clientes)
+
+        codigos, unicos = pd.factorize(pd.concat([ids_clientes, ids_enderecos], ignore_index=True))
+        codigos_clientes = codigos[:n_clientes]
+        codigos_enderecos = codigos[n_clientes:]
+
+        existe_cliente = np.zeros(len(unicos), dtype=bool)
+        existe_cliente[codigos_clientes[codigos_clientes >= 0]] = True
+
+        com_id = codigos_enderecos >= 0
+        orfaos = com_id & ~existe_cliente[np.where(com_id, codigos_enderecos, 0)]
+
+        contagem = np.bincount(codigos_enderecos[com_id], minlength=len(unicos))
+        enderecos_por_cliente = np.where(codigos_clientes >= 0, contagem[np.maximum(codigos_clientes, 0)], 0)
+
+        return {
+            'enderecos_orfaos': np.flatnonzero(orfaos) + 1,
+            'clientes_sem_endereco': np.flatnonzero((codigos_clientes >= 0) & (enderecos_por_cliente == 0)) + 1,
+            'enderecos_por_cliente': pd.Series(enderecos_por_cliente, index=ids_clientes.to_numpy(), name='enderecos'),
+        }
+
+
+def integrity_errors(resultado: Dict, df_enderecos: pd.DataFrame) -> List[Dict]:
+    """
+    Converte os endereços órfãos em erros no formato [{'linha', 'erros'}] de validate_dataframe,
+    para serem exibidos junto com os erros do modelo Endereco
+    """
+    ids = df_enderecos['id_cliente'].to_numpy(dtype=object)
+    return [{
+        'linha': linha,
+        'erros': [{'type': 'foreign_key', 'loc': ('id_cliente',), 'msg': MSG_CLIENTE_INEXISTENTE, 'input': ids[linha - 1]}]
+    } for linha in resultado['enderecos_orfaos'].tolist()]
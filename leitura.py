@@ -0,0 +1,138 @@
+import pandas as pd
+import io
+import os
+from typing import Iterator, List, Optional, Union
+from instrumentacao import stage, count_rows
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.dataset as pa_ds
+except ImportError:  # Sem pyarrow, a leitura usa o engine C do pandas
+    pa = None
+
+# Mesmos valores que o pandas lê como vazios por padrão
+VALORES_NULOS = ['', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+                 '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null']
+
+# Formatos colunares aceitos, pela extensão; diretórios são datasets Parquet particionados
+FORMATOS_COLUNARES = {'.parquet': 'parquet', '.pq': 'parquet', '.arrow': 'ipc', '.feather': 'ipc', '.ipc': 'ipc'}
+
+Fonte = Union[str, bytes]
+
+
+def _abrir(fonte: Fonte):
+    return io.BytesIO(fonte) if isinstance(fonte, bytes) else fonte
+
+
+def read_header(fonte: Fonte) -> List[str]:
+    """
+    Nomes das colunas do cabeçalho, sem ler os dados
+    """
+    return list(pd.read_csv(_abrir(fonte), nrows=0).columns)
+
+
+def _para_pandas(tabela) -> pd.DataFrame:
+    """
+    Converte a tabela Arrow mantendo o mesmo dtype de texto de pd.read_csv(dtype=str)
+    """
+    dtype_texto = pd.api.types.pandas_dtype(str)
+    if isinstance(dtype_texto, pd.api.extensions.ExtensionDtype):
+        return tabela.to_pandas(types_mapper={pa.string(): dtype_texto, pa.large_string(): dtype_texto}.get)
+    return tabela.to_pandas()
+
+
+def read_arrow_csv(fonte: Fonte, colunas: List[str], nomes: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Lê só `colunas` do CSV com o leitor multithread do Arrow, todas como string.
+    Com `nomes`, o arquivo não tem cabeçalho (ex.: um shard) e as colunas recebem esses nomes.
+    """
+    opcoes_leitura = pa_csv.ReadOptions(column_names=nomes) if nomes else pa_csv.ReadOptions()
+    opcoes_conversao = pa_csv.ConvertOptions(
+        include_columns=colunas,
+        column_types={coluna: pa.string() for coluna in colunas},
+        null_values=VALORES_NULOS,
+        strings_can_be_null=True,
+    )
+    tabela = pa_csv.read_csv(_abrir(fonte), read_options=opcoes_leitura, convert_options=opcoes_conversao)
+    return _para_pandas(tabela)
+
+
+def read_csv_typed(fonte: Fonte, model_class, engine: Optional[str] = None) -> pd.DataFrame:
+    """
+    Lê o CSV (caminho ou bytes) usando o modelo como schema: só as colunas do modelo
+    presentes no cabeçalho, todas como string, com o Arrow quando disponível.
+    Colunas do modelo ausentes no arquivo ficam de fora, para que validate_columns as aponte.
+    """
+    with stage('leitura_csv'):
+        colunas = [coluna for coluna in read_header(fonte) if coluna in model_class.model_fields]
+        if engine is None:
+            engine = 'pyarrow' if pa is not None else 'c'
+        if engine == 'pyarrow':
+            df = read_arrow_csv(fonte, colunas)
+        else:
+            df = pd.read_csv(_abrir(fonte), usecols=colunas, dtype=str, engine=engine)
+    count_rows('leitura_csv', len(df))
+    return df
+
+
+def columnar_format(caminho: str) -> Optional[str]:
+    """
+    'parquet' ou 'ipc' para arquivos colunares (e diretórios de Parquet), None para CSV
+    """
+    if os.path.isdir(caminho):
+        return 'parquet'
+    return FORMATOS_COLUNARES.get(os.path.splitext(caminho)[1].lower())
+
+
+def _dataset(caminho: str):
+    return pa_ds.dataset(caminho, format=columnar_format(caminho), partitioning='hive')
+
+
+def read_columns(caminho: str) -> List[str]:
+    """
+    Colunas do arquivo: o cabeçalho do CSV ou o schema do Parquet/Arrow
+    """
+    if columnar_format(caminho) is None:
+        return read_header(caminho)
+    return list(_dataset(caminho).schema.names)
+
+
+def read_columnar_typed(caminho: str, model_class) -> pd.DataFrame:
+    """
+    Lê um Parquet/Arrow (arquivo ou diretório particionado) projetando só as colunas do modelo.
+    Colunas de texto viram o mesmo dtype de read_csv_typed; colunas de outros tipos
+    são mantidas e a validação as aponta como não-string, como o Pydantic faria.
+    """
+    with stage('leitura_colunar'):
+        conjunto = _dataset(caminho)
+        colunas = [coluna for coluna in conjunto.schema.names if coluna in model_class.model_fields]
+        df = _para_pandas(conjunto.to_table(columns=colunas))
+    count_rows('leitura_colunar', len(df))
+    return df
+
+
+def iter_columnar_batches(caminho: str, model_class, linhas_por_lote: int) -> Iterator[pd.DataFrame]:
+    """
+    Lê o Parquet/Arrow em lotes de até `linhas_por_lote` linhas, só com as colunas do modelo.
+    O índice de cada lote continua a numeração do anterior, como em read_csv_chunks.
+    """
+    conjunto = _dataset(caminho)
+    colunas = [coluna for coluna in conjunto.schema.names if coluna in model_class.model_fields]
+    inicio = 0
+    for lote in conjunto.to_batches(columns=colunas, batch_size=linhas_por_lote):
+        if lote.num_rows == 0:
+            continue
+        df = _para_pandas(pa.Table.from_batches([lote]))
+        df.index = pd.RangeIndex(inicio, inicio + len(df))
+        inicio += len(df)
+        yield df
+
+
+def read_typed(caminho: str, model_class) -> pd.DataFrame:
+    """
+    Lê CSV, Parquet ou Arrow conforme a extensão, usando o modelo como schema
+    """
+    if columnar_format(caminho) is None:
+        return read_csv_typed(caminho, model_class)
+    return read_columnar_typed(caminho, model_class)
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field, EmailStr, field_validator
+from pydantic import BaseModel, Field, EmailStr, ValidationInfo, field_validator
 from typing import Optional
 from datetime import date
 import re
@@ -20,6 +20,15 @@ class Cliente(BaseModel):
         cpf = re.sub(r'[^\d]', '', v)
         if len(cpf) != 11:
             raise ValueError('CPF deve conter 11 dígitos')
+        digitos = [int(d) for d in cpf]
+        # Sequências repetidas (ex.: 111.111.111-11) passam no cálculo, mas não são CPFs válidos
+        if len(set(digitos)) == 1:
+            raise ValueError('CPF inválido')
+        # Confere os dois dígitos verificadores
+        for n in (9, 10):
+            soma = sum(d * peso for d, peso in zip(digitos[:n], range(n + 1, 1, -1)))
+            if soma * 10 % 11 % 10 != digitos[n]:
+                raise ValueError('CPF inválido')
         return cpf
 
     @field_validator('data_nascimento')
@@ -65,4 +74,82 @@ class Endereco(BaseModel):
         tipos_validos = ['RESIDENCIAL', 'COMERCIAL']
         if v.upper() not in tipos_validos:
             raise ValueError(f'Tipo de endereço deve ser um dos seguintes: {", ".join(tipos_validos)}')
-        return v.upper() 
\ No newline at end of file
+        return v.upper() 
+
+MESES = ['Janeiro', 'Fevereiro', 'Março', 'Abril', 'Maio', 'Junho',
+         'Julho', 'Agosto', 'Setembro', 'Outubro', 'Novembro', 'Dezembro']
+DIAS_DA_SEMANA = ['Segunda-Feira', 'Terça-Feira', 'Quarta-Feira', 'Quinta-Feira', 'Sexta-Feira', 'Sábado', 'Domingo']
+
+class Anuncio(BaseModel):
+    # Date e Impressions vêm antes dos campos que são conferidos contra eles (info.data só tem os anteriores)
+    Organizador: int = Field(..., description="Identificador da linha no relatório de anúncios")
+    Date: date = Field(..., description="Dia da veiculação")
+    Ano_Mes: str = Field(..., description="Ano e mês de Date, no formato 'AAAA | Mês'")
+    Dia_da_Semana: str = Field(..., description="Dia da semana de Date")
+    Tipo_Dia: Optional[str] = Field(None, description="Dia útil ou Final de Semana")
+    Objetivo: Optional[str] = Field(None, description="Objetivo da campanha")
+    AdSet_name: str = Field(..., description="Nome do conjunto de anúncios")
+    Amount_spent: float = Field(..., ge=0, description="Valor investido no dia")
+    Impressions: int = Field(..., ge=0, description="Impressões")
+    Link_clicks: Optional[int] = Field(None, ge=0, description="Cliques no link")
+    Conversions: Optional[int] = Field(None, ge=0, description="Conversões")
+    Segmentação: str = Field(..., description="Público da segmentação")
+    Tipo_de_Anúncio: Optional[str] = Field(None, description="Estático ou Video")
+    Fase: str = Field(..., description="Lançamento e fase da campanha")
+
+    @field_validator('Ano_Mes')
+    @classmethod
+    def validate_ano_mes(cls, v, info: ValidationInfo):
+        data = info.data.get('Date')
+        if data is not None and v != f'{data.year} | {MESES[data.month - 1]}':
+            raise ValueError('Ano_Mes não corresponde ao mês de Date')
+        return v
+
+    @field_validator('Dia_da_Semana')
+    @classmethod
+    def validate_dia_da_semana(cls, v, info: ValidationInfo):
+        data = info.data.get('Date')
+        if data is not None and v != DIAS_DA_SEMANA[data.weekday()]:
+            raise ValueError('Dia_da_Semana não corresponde ao dia de Date')
+        return v
+
+    @field_validator('Link_clicks')
+    @classmethod
+    def validate_link_clicks(cls, v, info: ValidationInfo):
+        impressoes = info.data.get('Impressions')
+        if v is not None and impressoes is not None and v > impressoes:
+            raise ValueError('Link_clicks não pode ser maior que Impressions')
+        return v
+
+# Tabelas de old/gerar_dados.py (clientes, pedidos, itens e linhas de pedido)
+TOLERANCIA_VALOR = 0.005  # meio centavo: ValorTotal é arredondado para 2 casas
+
+class ClientePedido(BaseModel):
+    ClienteId: int = Field(..., description="Identificador do cliente")
+    Nome: Optional[str] = Field(None, description="Nome do cliente")
+    Email: Optional[str] = Field(None, description="Email do cliente")
+
+class Pedido(BaseModel):
+    PedidoId: int = Field(..., description="Identificador do pedido")
+    ClienteId: int = Field(..., description="Cliente que fez o pedido")
+    Data: date = Field(..., description="Data do pedido")
+
+class Item(BaseModel):
+    Id: str = Field(..., description="Identificador do item")
+    Nome: Optional[str] = Field(None, description="Nome do item")
+
+class LinhaPedido(BaseModel):
+    PedidoId: int = Field(..., description="Pedido da linha")
+    Line: int = Field(..., ge=1, description="Número da linha dentro do pedido")
+    ItemId: str = Field(..., description="Item vendido")
+    Quantidade: int = Field(..., gt=0, description="Quantidade vendida")
+    PrecoUnitario: float = Field(..., ge=0, description="Preço unitário")
+    ValorTotal: float = Field(..., ge=0, description="Quantidade * PrecoUnitario")
+
+    @field_validator('ValorTotal')
+    @classmethod
+    def validate_valor_total(cls, v, info: ValidationInfo):
+        quantidade, preco = info.data.get('Quantidade'), info.data.get('PrecoUnitario')
+        if quantidade is not None and preco is not None and abs(v - quantidade * preco) > TOLERANCIA_VALOR:
+            raise ValueError('ValorTotal deve ser igual a Quantidade * PrecoUnitario')
+        return v
@@ -0,0 +1,216 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import re
+import shutil
+import time
+import unicodedata
+from concurrent.futures import Executor, ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from validacao import MODELOS, detect_model
+from validacao_streaming import CHUNKSIZE_PADRAO
+from exportacao import export_validated
+from leitura import read_columns
+
+INTERVALO_PADRAO = 2.0  # segundos entre as varreduras da pasta
+WORKERS_PADRAO = 2
+FILA_POR_WORKER = 2  # arquivos aguardando por worker antes de a varredura esperar
+ARQUIVO_ESTADO = '.monitor_estado.json'
+EXTENSOES = ('.csv',)
+
+Assinatura = Tuple[int, int]  # (tamanho em bytes, mtime em ns)
+
+
+def output_name(nome_arquivo: str) -> str:
+    """
+    Nome seguro e único para as saídas de um arquivo de entrada:
+    'enderecos_com_erros (Cópia).csv' -> 'enderecos_com_erros_copia_csv_<hash>'.
+    A extensão fica no nome e o hash curto do nome original separa arquivos que viram o mesmo
+    texto ('a b.csv' e 'a_b.csv', 'A.csv' e 'a.csv'): workers simultâneos nunca dividem uma pasta.
+    """
+    ascii_ = unicodedata.normalize('NFKD', nome_arquivo).encode('ascii', 'ignore').decode('ascii')
+    legivel = re.sub(r'[^0-9A-Za-z]+', '_', ascii_).strip('_').lower() or 'arquivo'
+    return f"{legivel}_{hashlib.blake2b(nome_arquivo.encode('utf-8'), digest_size=4).hexdigest()}"
+
+
+def process_file(caminho: str, destino: str, chunksize: int = CHUNKSIZE_PADRAO) -> Dict:
+    """
+    Identifica o modelo pelo cabeçalho, valida o arquivo em blocos e grava em `destino`/<nome>/
+    os datasets limpos/ e rejeitados/ e o relatorio.json com os totais.
+    Roda no processo do worker; devolve só o resumo.
+    """
+    inicio = time.perf_counter()
+    nome = output_name(os.path.basename(caminho))
+    pasta = os.path.join(destino, nome)
+    relatorio = {'arquivo': caminho, 'saida': pasta, 'modelo': None, 'processado_em': datetime.now().isoformat()}
+
+    colunas = read_columns(caminho)
+    relatorio['modelo'] = detect_model(colunas)
+    if relatorio['modelo'] is None:
+        relatorio['erros_colunas'] = [f"Cabeçalho não corresponde a nenhum modelo ({', '.join(sorted(MODELOS))}): "
+                                      f"{', '.join(colunas)}"]
+    else:
+        # Um arquivo alterado é reprocessado do zero: as saídas anteriores dele são descartadas
+        shutil.rmtree(pasta, ignore_errors=True)
+        relatorio.update(export_validated(caminho, MODELOS[relatorio['modelo']], pasta, chunksize))
+
+    relatorio['segundos'] = round(time.perf_counter() - inicio, 3)
+    os.makedirs(pasta, exist_ok=True)
+    with open(os.path.join(pasta, 'relatorio.json'), 'w', encoding='utf-8') as arquivo:
+        json.dump(relatorio, arquivo, indent=2, ensure_ascii=False)
+    return relatorio
+
+
+class FolderWatcher:
+    """
+    Acompanha a pasta de entrada por varreduras periódicas e valida os CSVs novos ou alterados.
+    Um arquivo só entra na fila quando tamanho e mtime ficam iguais entre duas varreduras
+    (a cópia terminou). A fila é limitada: com ela cheia, a varredura espera um worker
+    liberar espaço, então uma rajada de arquivos nunca fica toda em memória ao mesmo tempo;
+    no máximo `workers` arquivos são validados por vez, cada um lido em blocos.
+    Cada arquivo tem no máximo uma validação na fila ou em andamento: uma versão nova que
+    aparece nesse meio tempo é validada pelo mesmo worker logo depois, e nunca em paralelo
+    na mesma pasta de saída.
+    """
+
+    def __init__(self, origem: str, destino: str, executor: Executor, workers: int = WORKERS_PADRAO,
+                 intervalo: float = INTERVALO_PADRAO, chunksize: int = CHUNKSIZE_PADRAO):
+        self.origem = origem
+        self.destino = destino
+        self.executor = executor
+        self.workers = workers
+        self.intervalo = intervalo
+        self.chunksize = chunksize
+        self.caminho_estado = os.path.join(destino, ARQUIVO_ESTADO)
+        self.processados: Dict[str, Assinatura] = self._ler_estado()
+        self.vistos: Dict[str, Assinatura] = {}
+        self.pendentes: Dict[str, Assinatura] = {}   # na fila ou em validação, um por arquivo
+        self.alterados: Dict[str, Assinatura] = {}   # versão mais recente de um arquivo pendente
+        self.fila: Optional[asyncio.Queue] = None
+
+    def _ler_estado(self) -> Dict[str, Assinatura]:
+        try:
+            with open(self.caminho_estado, encoding='utf-8') as arquivo:
+                return {nome: tuple(assinatura) for nome, assinatura in json.load(arquivo).items()}
+        except (OSError, ValueError):
+            return {}
+
+    def _gravar_estado(self):
+        temporario = self.caminho_estado + '.tmp'
+        with open(temporario, 'w', encoding='utf-8') as arquivo:
+            json.dump(self.processados, arquivo, indent=2, ensure_ascii=False)
+        os.replace(temporario, self.caminho_estado)
+
+    def scan(self, esperar_estabilizar: bool = True) -> List[Tuple[str, Assinatura]]:
+        """
+        Arquivos prontos para validar: novos ou alterados desde o último processamento,
+        ainda não na fila e (com `esperar_estabilizar`) sem mudança desde a varredura anterior.
+        Um arquivo pendente que mudou fica em `alterados`, para depois da validação em andamento.
+        """
+        atuais: Dict[str, Assinatura] = {}
+        with os.scandir(self.origem) as entradas:
+            for entrada in entradas:
+                if entrada.is_file() and entrada.name.lower().endswith(EXTENSOES):
+                    info = entrada.stat()
+                    atuais[entrada.name] = (info.st_size, info.st_mtime_ns)
+
+        prontos = []
+        for nome, assinatura in sorted(atuais.items()):
+            if nome in self.pendentes:
+                if self.pendentes[nome] == assinatura:
+                    self.alterados.pop(nome, None)
+                elif not esperar_estabilizar or self.vistos.get(nome) == assinatura:
+                    self.alterados[nome] = assinatura
+                continue
+            if self.processados.get(nome) == assinatura:
+                continue
+            if esperar_estabilizar and self.vistos.get(nome) != assinatura:
+                continue
+            prontos.append((nome, assinatura))
+        self.vistos = atuais
+        return prontos
+
+    async def _enfileirar(self, esperar_estabilizar: bool = True):
+        for nome, assinatura in self.scan(esperar_estabilizar):
+            self.pendentes[nome] = assinatura
+            await self.fila.put((nome, assinatura))  # Espera aqui quando a fila está cheia
+
+    async def _processar(self, nome: str, assinatura: Assinatura):
+        caminho = os.path.join(self.origem, nome)
+        try:
+            relatorio = await asyncio.get_running_loop().run_in_executor(
+                self.executor, process_file, caminho, self.destino, self.chunksize)
+            self.processados[nome] = assinatura
+            self._gravar_estado()
+            _registrar(relatorio)
+        except Exception as erro:  # O arquivo pode ter sido removido ou estar malformado; o daemon continua
+            print(f"[{datetime.now():%H:%M:%S}] {nome}: falha na validação ({erro!r})", flush=True)
+
+    async def _worker(self):
+        while True:
+            nome, assinatura = await self.fila.get()
+            try:
+                while True:
+                    await self._processar(nome, assinatura)
+                    # O arquivo mudou durante a validação: valida a versão mais recente
+                    nova = self.alterados.pop(nome, None)
+                    if nova is None or nova == self.processados.get(nome):
+                        break
+                    assinatura = self.pendentes[nome] = nova
+            finally:
+                del self.pendentes[nome]
+                self.alterados.pop(nome, None)
+                self.fila.task_done()
+
+    async def run(self, uma_vez: bool = False):
+        """
+        Varre a pasta a cada `intervalo` segundos até ser interrompido.
+        Com `uma_vez`, processa o que já está na pasta (sem esperar estabilizar) e termina.
+        """
+        os.makedirs(self.destino, exist_ok=True)
+        self.fila = asyncio.Queue(maxsize=self.workers * FILA_POR_WORKER)
+        workers = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        try:
+            if uma_vez:
+                await self._enfileirar(esperar_estabilizar=False)
+                await self.fila.join()
+                return
+            while True:
+                await self._enfileirar()
+                await asyncio.sleep(self.intervalo)
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+
+def _registrar(relatorio: Dict):
+    nome = os.path.basename(relatorio['arquivo'])
+    if relatorio.get('erros_colunas'):
+        resumo = '; '.join(relatorio['erros_colunas'])
+    else:
+        resumo = (f"{relatorio['modelo']}: {relatorio['total_registros']} registros, "
+                  f"{relatorio['registros_rejeitados']} rejeitados ({relatorio['segundos']}s)")
+    print(f"[{datetime.now():%H:%M:%S}] {nome} -> {relatorio['saida']}: {resumo}", flush=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Monitora a pasta de entrada e valida cada CSV novo ou alterado")
+    parser.add_argument('--origem', default='input', help="Pasta monitorada")
+    parser.add_argument('--destino', default='output', help="Pasta dos relatórios e dos registros limpos/rejeitados")
+    parser.add_argument('--workers', type=int, default=WORKERS_PADRAO, help="Arquivos validados ao mesmo tempo")
+    parser.add_argument('--intervalo', type=float, default=INTERVALO_PADRAO, help="Segundos entre as varreduras")
+    parser.add_argument('--chunksize', type=int, default=CHUNKSIZE_PADRAO, help="Linhas por bloco")
+    parser.add_argument('--uma-vez', action='store_true', help="Processa os arquivos atuais e termina")
+    args = parser.parse_args()
+
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        watcher = FolderWatcher(args.origem, args.destino, executor, args.workers, args.intervalo, args.chunksize)
+        print(f"Monitorando {args.origem}/ ({args.workers} workers); saídas em {args.destino}/", flush=True)
+        try:
+            asyncio.run(watcher.run(args.uma_vez))
+        except KeyboardInterrupt:
+            print("Encerrado", flush=True)
@@ -0,0 +1,247 @@
+import pandas as pd
+import numpy as np
+import argparse
+import html
+import json
+import os
+from typing import Dict, Iterator, List, Optional
+from validacao_streaming import CHUNKSIZE_PADRAO, read_csv_chunks
+from instrumentacao import stage
+
+PRECISAO_HLL = 14  # 2^14 registradores por coluna (16 KB), erro padrão de ~0,8% na contagem de distintos
+TOP_K_PADRAO = 10
+FATOR_RESUMO = 50  # o resumo de frequências guarda FATOR_RESUMO * k candidatos por coluna
+
+
+def _zeros_a_esquerda(w: np.ndarray) -> np.ndarray:
+    """
+    Zeros à esquerda de cada uint64 (64 para zero), por busca binária vetorizada
+    """
+    w = w.copy()
+    zeros = np.zeros(len(w), dtype=np.uint8)
+    for bits in (32, 16, 8, 4, 2, 1):
+        vazios = (w >> np.uint64(64 - bits)) == 0
+        zeros[vazios] += bits
+        w[vazios] <<= np.uint64(bits)
+    zeros[w == 0] = 64
+    return zeros
+
+
+class HyperLogLog:
+    """
+    Contagem aproximada de valores distintos com memória fixa (2^precisao registradores)
+    """
+
+    def __init__(self, precisao: int = PRECISAO_HLL):
+        self.precisao = precisao
+        self.registradores = np.zeros(1 << precisao, dtype=np.uint8)
+
+    def update(self, hashes: np.ndarray):
+        if len(hashes) == 0:
+            return
+        indices = (hashes >> np.uint64(64 - self.precisao)).astype(np.intp)
+        resto = hashes << np.uint64(self.precisao)
+        postos = np.minimum(_zeros_a_esquerda(resto), 64 - self.precisao) + 1
+        np.maximum.at(self.registradores, indices, postos.astype(np.uint8))
+
+    def estimate(self) -> int:
+        m = len(self.registradores)
+        alfa = 0.7213 / (1 + 1.079 / m)
+        estimativa = alfa * m * m / np.sum(np.ldexp(1.0, -self.registradores.astype(np.int64)))
+        vazios = int(np.count_nonzero(self.registradores == 0))
+        if estimativa <= 2.5 * m and vazios:
+            # Correção para cardinalidades pequenas (contagem linear)
+            estimativa = m * np.log(m / vazios)
+        return int(round(estimativa))
+
+
+class FrequentValues:
+    """
+    Valores mais frequentes com memória limitada: resumo Misra-Gries mesclável, bloco a bloco.
+    Guarda até `capacidade` candidatos; a contagem de cada um é um limite inferior e o erro
+    máximo acumulado fica em `erro`.
+    """
+
+    def __init__(self, capacidade: int):
+        self.capacidade = capacidade
+        self.contagens = pd.Series(dtype='int64')
+        self.erro = 0
+
+    def _resumir(self, contagens: pd.Series) -> pd.Series:
+        if len(contagens) <= self.capacidade:
+            return contagens
+        maiores = contagens.nlargest(self.capacidade + 1)
+        corte = int(maiores.iloc[-1])
+        self.erro += corte
+        maiores = maiores.iloc[:-1] - corte
+        return maiores[maiores > 0]
+
+    def update(self, contagens_bloco: pd.Series):
+        # Resume o bloco antes de somar, para que a mescla seja entre dois resumos pequenos
+        bloco = self._resumir(contagens_bloco)
+        self.contagens = self._resumir(self.contagens.add(bloco, fill_value=0).astype('int64'))
+
+    def top(self, k: int) -> List[Dict]:
+        melhores = self.contagens.sort_values(ascending=False, kind='stable').head(k)
+        return [{'valor': valor, 'contagem': int(contagem)} for valor, contagem in melhores.items()]
+
+
+class ColumnProfile:
+    """
+    Estatísticas de uma coluna acumuladas bloco a bloco: nulos, tamanho do texto,
+    mínimo/máximo (numérico quando todos os valores são números, senão lexicográfico),
+    distintos aproximados e valores mais frequentes
+    """
+
+    def __init__(self, nome: str, top_k: int = TOP_K_PADRAO):
+        self.nome = nome
+        self.top_k = top_k
+        self.linhas = 0
+        self.nulos = 0
+        self.numericos = 0
+        self.soma_tamanhos = 0
+        self.tamanho_min: Optional[int] = None
+        self.tamanho_max: Optional[int] = None
+        self.texto_min: Optional[str] = None
+        self.texto_max: Optional[str] = None
+        self.numero_min: Optional[float] = None
+        self.numero_max: Optional[float] = None
+        self.distintos = HyperLogLog()
+        self.frequentes = FrequentValues(FATOR_RESUMO * top_k)
+
+    def update(self, serie: pd.Series):
+        self.linhas += len(serie)
+        valores = serie.dropna()
+        self.nulos += len(serie) - len(valores)
+        if len(valores) == 0:
+            return
+
+        tamanhos = valores.str.len()
+        self.soma_tamanhos += int(tamanhos.sum())
+        self.tamanho_min = _menor(self.tamanho_min, int(tamanhos.min()))
+        self.tamanho_max = _maior(self.tamanho_max, int(tamanhos.max()))
+        self.texto_min = _menor(self.texto_min, valores.min())
+        self.texto_max = _maior(self.texto_max, valores.max())
+
+        if self.numericos == self.linhas - self.nulos - len(valores):
+            # Enquanto a coluna só teve números; com o primeiro texto, min/max passam a ser lexicográficos
+            numeros = pd.to_numeric(valores, errors='coerce').dropna()
+            self.numericos += len(numeros)
+            if len(numeros):
+                self.numero_min = _menor(self.numero_min, float(numeros.min()))
+                self.numero_max = _maior(self.numero_max, float(numeros.max()))
+
+        # Hash e contagem uma vez por valor distinto do bloco
+        contagens = valores.value_counts(sort=False)
+        self.distintos.update(pd.util.hash_array(contagens.index.to_numpy(dtype=object)))
+        self.frequentes.update(contagens)
+
+    def to_dict(self) -> Dict:
+        preenchidos = self.linhas - self.nulos
+        numerica = preenchidos > 0 and self.numericos == preenchidos
+        return {
+            'linhas': self.linhas,
+            'nulos': self.nulos,
+            'percentual_nulos': round(100 * self.nulos / self.linhas, 2) if self.linhas else 0.0,
+            'distintos_aprox': min(self.distintos.estimate(), preenchidos),
+            'numerica': numerica,
+            'minimo': self.numero_min if numerica else self.texto_min,
+            'maximo': self.numero_max if numerica else self.texto_max,
+            'tamanho_min': self.tamanho_min,
+            'tamanho_max': self.tamanho_max,
+            'tamanho_medio': round(self.soma_tamanhos / preenchidos, 2) if preenchidos else None,
+            'mais_frequentes': self.frequentes.top(self.top_k),
+            'erro_max_frequencia': self.frequentes.erro,
+        }
+
+
+def _menor(atual, novo):
+    return novo if atual is None or novo < atual else atual
+
+
+def _maior(atual, novo):
+    return novo if atual is None or novo > atual else atual
+
+
+def profile_chunks(blocos: Iterator[pd.DataFrame], top_k: int = TOP_K_PADRAO) -> Dict:
+    """
+    Perfil de todas as colunas em uma única passada pelos blocos.
+    A memória não depende do tamanho do arquivo: só o bloco atual, os registradores do
+    HyperLogLog e os candidatos a mais frequentes de cada coluna.
+    """
+    colunas: Dict[str, ColumnProfile] = {}
+    linhas = 0
+    for bloco in blocos:
+        with stage('perfil', len(bloco)):
+            linhas += len(bloco)
+            for coluna in bloco.columns:
+                if coluna not in colunas:
+                    colunas[coluna] = ColumnProfile(coluna, top_k)
+                colunas[coluna].update(bloco[coluna])
+    return {'linhas': linhas, 'colunas': {nome: perfil.to_dict() for nome, perfil in colunas.items()}}
+
+
+def profile_csv(caminho: str, chunksize: int = CHUNKSIZE_PADRAO, top_k: int = TOP_K_PADRAO) -> Dict:
+    """
+    Perfil de um CSV de qualquer tamanho, lido em blocos e com todas as colunas como texto
+    """
+    perfil = profile_chunks(read_csv_chunks(caminho, chunksize), top_k)
+    perfil['arquivo'] = caminho
+    return perfil
+
+
+def _tabela_resumo(perfil: Dict) -> pd.DataFrame:
+    campos = ['nulos', 'percentual_nulos', 'distintos_aprox', 'minimo', 'maximo',
+              'tamanho_min', 'tamanho_max', 'tamanho_medio']
+    tabela = pd.DataFrame.from_dict(perfil['colunas'], orient='index', columns=campos)
+    tabela.index.name = 'coluna'
+    return tabela
+
+
+def to_html(perfil: Dict, titulo: str) -> str:
+    partes = [
+        '<!DOCTYPE html><html><head><meta charset="utf-8">',
+        f'<title>{html.escape(titulo)}</title>',
+        '<style>body{font-family:sans-serif;margin:2em}table{border-collapse:collapse;margin-bottom:1.5em}'
+        'th,td{border:1px solid #ccc;padding:4px 8px;text-align:left}th{background:#f0f0f0}</style>',
+        '</head><body>',
+        f'<h1>{html.escape(titulo)}</h1>',
+        f"<p>{perfil['linhas']} linhas, {len(perfil['colunas'])} colunas. "
+        'Distintos estimados com HyperLogLog; frequências com resumo Misra-Gries (limites inferiores).</p>',
+        '<h2>Resumo</h2>',
+        _tabela_resumo(perfil).to_html(na_rep=''),
+    ]
+    for nome, coluna in perfil['colunas'].items():
+        partes.append(f'<h2>{html.escape(nome)}</h2>')
+        frequentes = pd.DataFrame(coluna['mais_frequentes'], columns=['valor', 'contagem'])
+        partes.append(frequentes.to_html(index=False))
+    partes.append('</body></html>')
+    return '\n'.join(partes)
+
+
+def write_report(perfil: Dict, caminho: str, titulo: Optional[str] = None):
+    """
+    Grava o perfil em HTML (.html/.htm) ou JSON (demais extensões)
+    """
+    if caminho.endswith(('.html', '.htm')):
+        conteudo = to_html(perfil, titulo or f"Perfil de {perfil.get('arquivo', 'dados')}")
+    else:
+        conteudo = json.dumps(perfil, indent=2, ensure_ascii=False, default=str)
+    with open(caminho, 'w', encoding='utf-8') as arquivo:
+        arquivo.write(conteudo)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Perfil aproximado das colunas de um CSV, em uma passada e com memória limitada")
+    parser.add_argument('arquivo', help="CSV de entrada (ex.: data.csv, input/clientes_com_erros.csv)")
+    parser.add_argument('--saida', nargs='+', help="Relatórios a gravar (.html e/ou .json); "
+                                                    "padrão: output/perfil_<arquivo>.html e .json")
+    parser.add_argument('--chunksize', type=int, default=CHUNKSIZE_PADRAO, help="Linhas por bloco")
+    parser.add_argument('--top', type=int, default=TOP_K_PADRAO, help="Quantos valores mais frequentes listar")
+    args = parser.parse_args()
+
+    base = os.path.join('output', 'perfil_' + os.path.splitext(os.path.basename(args.arquivo))[0])
+    perfil = profile_csv(args.arquivo, args.chunksize, args.top)
+    for caminho in args.saida or [base + '.html', base + '.json']:
+        write_report(perfil, caminho)
+        print(f"Perfil gravado em {caminho}")
@@ -0,0 +1,209 @@
+import pandas as pd
+import numpy as np
+import argparse
+import io
+import os
+from typing import BinaryIO, Dict, Iterator, Optional, Union
+import pyarrow as pa
+import pyarrow.parquet as pq
+from validacao import MODELOS, ValidationMemo, validate_columns
+from validacao_streaming import CHUNKSIZE_PADRAO, COLUNAS_RELATORIO, read_csv_chunks
+from leitura import columnar_format, iter_columnar_batches, read_columns
+from error_store import ErrorStore
+from instrumentacao import stage
+
+FORMATOS = {'csv': 'text/csv', 'parquet': 'application/vnd.apache.parquet', 'jsonl': 'application/x-ndjson'}
+EXTENSOES = {'.csv': 'csv', '.parquet': 'parquet', '.pq': 'parquet', '.jsonl': 'jsonl', '.ndjson': 'jsonl'}
+ERROS_POR_LOTE = 50_000
+
+Destino = Union[str, BinaryIO]
+
+
+def report_format(caminho: str) -> str:
+    """
+    Formato do relatório pela extensão do arquivo (CSV quando não reconhecida)
+    """
+    return EXTENSOES.get(os.path.splitext(caminho)[1].lower(), 'csv')
+
+
+def report_frame(erros: ErrorStore, indices: np.ndarray, df: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """
+    Um erro por linha (linha, campo, tipo, mensagem, valor) seguido dos valores originais da linha.
+    As linhas do store são buscadas em `df` pelo rótulo (linha - 1), então `df` pode ser um bloco
+    de um arquivo maior, com o índice continuando a numeração. Erros de colunas (linha 0)
+    ficam sem valores. Todas as colunas de dados saem como texto, para o schema não variar entre lotes.
+    """
+    linhas = erros.linhas[indices]
+    ids_campos = erros.ids_campos[indices]
+    ids_mensagens = erros.ids_mensagens[indices]
+    tabela = pd.DataFrame({
+        'linha': linhas,
+        'campo': pd.array(np.array(erros.campos, dtype=object)[ids_campos], dtype='str'),
+        'tipo': pd.array(np.array([tipo for tipo, _ in erros.mensagens], dtype=object)[ids_mensagens], dtype='str'),
+        'mensagem': pd.array(np.array([msg for _, msg in erros.mensagens], dtype=object)[ids_mensagens], dtype='str'),
+    })
+    valores = np.full(len(indices), None, dtype=object)
+    if df is None:
+        tabela['valor'] = pd.array(valores, dtype='str')
+        return tabela
+
+    posicoes = np.where(linhas > 0, df.index.get_indexer(linhas - 1), -1)
+    for id_campo in np.unique(ids_campos).tolist():
+        campo = erros.campos[id_campo]
+        selecao = (ids_campos == id_campo) & (posicoes >= 0)
+        if campo in df.columns and selecao.any():
+            valores[selecao] = df[campo].iloc[posicoes[selecao]].to_numpy(dtype=object)
+    tabela['valor'] = pd.Series(valores, dtype=object).astype('str')
+
+    encontradas = np.flatnonzero(posicoes >= 0)
+    originais = df.iloc[posicoes[encontradas]].astype('str')
+    originais.columns = [f'{coluna}_original' if coluna in COLUNAS_RELATORIO else coluna for coluna in originais.columns]
+    return tabela.join(originais.set_axis(encontradas))
+
+
+def store_report_batches(erros: ErrorStore, df: Optional[pd.DataFrame] = None, indices: Optional[np.ndarray] = None,
+                         erros_por_lote: int = ERROS_POR_LOTE) -> Iterator[pd.DataFrame]:
+    """
+    O relatório de um store já calculado (ex.: o da tela), em lotes de até `erros_por_lote` erros.
+    `indices` restringe o relatório a uma seleção (ex.: ErrorStore.select).
+    """
+    if indices is None:
+        indices = np.arange(len(erros))
+    for inicio in range(0, len(indices), erros_por_lote):
+        yield report_frame(erros, indices[inicio:inicio + erros_por_lote], df)
+
+
+class ErrorReportWriter:
+    """
+    Grava o relatório em lotes, à medida que eles chegam, em CSV, Parquet ou JSONL.
+    `destino` é um caminho ou um arquivo binário aberto (ex.: io.BytesIO), que não é fechado.
+    Num caminho, os lotes vão para `destino`.tmp, que só substitui o destino quando o relatório
+    termina: se a validação falha no meio, um relatório anterior com o mesmo nome fica intacto.
+    O schema do Parquet é o do primeiro lote; os lotes seguintes são convertidos para ele.
+    """
+
+    def __init__(self, destino: Destino, formato: Optional[str] = None):
+        if formato is None:
+            formato = report_format(destino) if isinstance(destino, str) else 'csv'
+        if formato not in FORMATOS:
+            raise ValueError(f"Formato desconhecido: {formato} (use {', '.join(FORMATOS)})")
+        self.formato = formato
+        self.linhas = 0
+        self._proprio = isinstance(destino, str)
+        self._destino = destino if self._proprio else None
+        self._temporario = f'{destino}.tmp' if self._proprio else None
+        self._binario = open(self._temporario, 'wb') if self._proprio else destino
+        self._texto = None
+        self._parquet: Optional[pq.ParquetWriter] = None
+        if formato != 'parquet':
+            self._texto = io.TextIOWrapper(self._binario, encoding='utf-8', newline='')
+
+    def write(self, tabela: pd.DataFrame):
+        with stage('relatorio_erros', len(tabela)):
+            if self.formato == 'csv':
+                tabela.to_csv(self._texto, header=self.linhas == 0, index=False)
+            elif self.formato == 'jsonl':
+                if len(tabela):
+                    self._texto.write(tabela.to_json(orient='records', lines=True, force_ascii=False).rstrip('\n') + '\n')
+            else:
+                lote = pa.Table.from_pandas(tabela, preserve_index=False)
+                if self._parquet is None:
+                    self._parquet = pq.ParquetWriter(self._binario, lote.schema)
+                self._parquet.write_table(lote.cast(self._parquet.schema))
+            self.linhas += len(tabela)
+
+    def close(self, descartar: bool = False):
+        """
+        Finaliza o relatório; com `descartar`, o arquivo temporário é removido e o destino não muda
+        """
+        try:
+            if self._parquet is not None:
+                self._parquet.close()
+            if self._texto is not None:
+                self._texto.flush()
+                self._texto.detach()  # Devolve o arquivo binário sem fechá-lo
+        finally:
+            if self._proprio:
+                self._binario.close()
+                if descartar:
+                    os.remove(self._temporario)
+                else:
+                    os.replace(self._temporario, self._destino)
+
+    def __enter__(self) -> 'ErrorReportWriter':
+        return self
+
+    def __exit__(self, tipo_excecao, *exc):
+        self.close(descartar=tipo_excecao is not None)
+
+
+def write_store_report(erros: ErrorStore, destino: Destino, df: Optional[pd.DataFrame] = None,
+                       formato: Optional[str] = None, indices: Optional[np.ndarray] = None) -> int:
+    """
+    Grava o relatório de um store já calculado; retorna o número de erros gravados
+    """
+    with ErrorReportWriter(destino, formato) as writer:
+        for tabela in store_report_batches(erros, df, indices):
+            writer.write(tabela)
+        if writer.linhas == 0:
+            writer.write(report_frame(erros, np.empty(0, dtype=np.int64), df))  # Só o cabeçalho/schema
+    return writer.linhas
+
+
+def store_report_bytes(erros: ErrorStore, df: Optional[pd.DataFrame] = None, formato: str = 'csv',
+                       indices: Optional[np.ndarray] = None) -> bytes:
+    """
+    O relatório em memória, para um botão de download
+    """
+    buffer = io.BytesIO()
+    write_store_report(erros, buffer, df, formato, indices)
+    return buffer.getvalue()
+
+
+def export_error_report(caminho: str, model_class, destino: Destino, formato: Optional[str] = None,
+                        chunksize: int = CHUNKSIZE_PADRAO) -> Dict[str, int]:
+    """
+    Valida o arquivo (CSV, Parquet ou Arrow) em blocos e grava o relatório de cada bloco
+    assim que ele é validado: só o bloco atual e os seus erros ficam em memória.
+    Retorna os totais da validação.
+    """
+    totais = {'total_registros': 0, 'registros_com_erros': 0, 'total_erros': 0}
+    cabecalho = pd.DataFrame(columns=read_columns(caminho))  # Entrada ilegível falha antes de abrir o destino
+    with ErrorReportWriter(destino, formato) as writer:
+        if validate_columns(cabecalho, model_class):
+            erros = ErrorStore.from_dataframe(cabecalho, model_class)
+            writer.write(report_frame(erros, np.arange(len(erros))))
+            totais['total_erros'] = len(erros)
+            return totais
+
+        if columnar_format(caminho) is None:
+            blocos = read_csv_chunks(caminho, chunksize)  # Todas as colunas, para o relatório trazer a linha inteira
+        else:
+            blocos = iter_columnar_batches(caminho, model_class, chunksize)
+        memo = ValidationMemo()
+        for bloco in blocos:
+            erros = ErrorStore.from_dataframe(bloco, model_class, memo)
+            for tabela in store_report_batches(erros, bloco):
+                writer.write(tabela)
+            totais['total_registros'] += len(bloco)
+            totais['registros_com_erros'] += erros.rows_with_errors()
+            totais['total_erros'] += len(erros)
+        if writer.linhas == 0:
+            writer.write(report_frame(ErrorStore(list(model_class.model_fields)), np.empty(0, dtype=np.int64)))
+    return totais
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Valida um arquivo em blocos e grava o relatório de erros "
+                                                 "(um erro por linha, com os valores originais da linha)")
+    parser.add_argument('arquivo', help="CSV, Parquet ou Arrow de entrada")
+    parser.add_argument('modelo', choices=sorted(MODELOS), help="Modelo usado na validação")
+    parser.add_argument('saida', help="Relatório (.csv, .parquet ou .jsonl)")
+    parser.add_argument('--formato', choices=sorted(FORMATOS), help="Formato do relatório (padrão: pela extensão)")
+    parser.add_argument('--chunksize', type=int, default=CHUNKSIZE_PADRAO, help="Linhas por bloco")
+    args = parser.parse_args()
+
+    totais = export_error_report(args.arquivo, MODELOS[args.modelo], args.saida, args.formato, args.chunksize)
+    print(f"Registros: {totais['total_registros']}")
+    print(f"Registros com erros: {totais['registros_com_erros']}")
+    print(f"Erros gravados em {args.saida}: {totais['total_erros']}")
@@ -0,0 +1,59 @@
+import pandas as pd
+import pytest
+from models import Anuncio
+from leitura import read_csv_typed
+from validacao_tipada import validate_typed
+from campanhas import CHAVES_ROLLUP, CampaignRollup, aggregate
+
+
+@pytest.fixture(scope='module')
+def tipado():
+    _, tipado = validate_typed(read_csv_typed('data.csv', Anuncio), Anuncio)
+    return tipado
+
+
+def ordenado(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Somas comparáveis: as chaves voltam do Parquet/concat com dtypes diferentes (categoria ou texto)
+    """
+    tabela = df.reset_index()
+    tabela[CHAVES_ROLLUP[:-1]] = tabela[CHAVES_ROLLUP[:-1]].astype(str)
+    return tabela.set_index(CHAVES_ROLLUP).sort_index().astype('float64')
+
+
+def test_append_em_dias_separados_igual_a_carga_unica(tipado, tmp_path):
+    corte = tipado['Date'].sort_values().iloc[len(tipado) // 2]
+    estado = CampaignRollup()
+    estado.append(tipado[tipado['Date'] < corte])
+    caminho = str(tmp_path / 'estado.parquet')
+    estado.save(caminho)
+    estado = CampaignRollup.load(caminho)
+    estado.append(tipado[tipado['Date'] >= corte])
+
+    pd.testing.assert_frame_equal(ordenado(estado.somas), ordenado(aggregate(tipado)))
+
+
+def test_recarregar_um_arquivo_nao_soma_duas_vezes(tipado):
+    unico = CampaignRollup()
+    unico.append(tipado)
+    repetido = CampaignRollup()
+    repetido.append(tipado)
+    assert len(repetido.loaded_days(tipado)) == tipado['Date'].dt.normalize().nunique()
+    afetados = repetido.append(tipado)
+
+    assert len(afetados) == len(unico.somas)
+    pd.testing.assert_frame_equal(ordenado(repetido.somas), ordenado(unico.somas))
+    pd.testing.assert_frame_equal(repetido.rollup(['Fase']).sort_index(), unico.rollup(['Fase']).sort_index())
+
+
+def test_versao_corrigida_de_um_dia_substitui_a_anterior(tipado):
+    dia = tipado['Date'].dt.normalize().iloc[0]
+    do_dia = tipado[tipado['Date'].dt.normalize() == dia]
+    estado = CampaignRollup()
+    estado.append(tipado)
+    corrigido = do_dia.assign(Amount_spent=do_dia['Amount_spent'] * 2)
+    estado.append(corrigido)
+
+    somas_do_dia = estado.somas.xs(dia, level='Date')
+    assert somas_do_dia['Amount_spent'].sum() == pytest.approx(aggregate(corrigido)['Amount_spent'].sum())
+    assert len(estado.somas) == len(aggregate(tipado))
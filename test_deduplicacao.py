@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+from deduplicacao import _componentes, blocking_keys, find_duplicates, phonetic_name
+
+
+def clientes(*linhas) -> pd.DataFrame:
+    df = pd.DataFrame(linhas, columns=['nome', 'email', 'data_nascimento', 'cpf'], dtype=object)
+    df.insert(0, 'id_cliente', [f'id-{i}' for i in range(len(df))])
+    return df
+
+
+def test_grafias_foneticamente_iguais_tem_a_mesma_chave():
+    nomes = pd.Series(['Miguel', 'Migel', 'Guilherme Souza', 'Gilherme de Souza', 'Thaís Ferraz', 'Tais Ferras'])
+    chave = phonetic_name(nomes).tolist()
+    assert chave[0] == chave[1]
+    assert chave[2] == chave[3]
+    assert chave[4] == chave[5]
+
+
+def test_chaves_de_bloqueio_normalizadas():
+    df = clientes(
+        ('Ana Souza', ' ANA@Example.com ', '1990-01-31', '123.456.789-09'),
+        ('Ana de Souza', 'sem-arroba', '31/01/1990', '123.456'),
+    )
+    chaves = blocking_keys(df)
+    assert chaves['cpf'].tolist() == ['12345678909', pd.NA]
+    assert chaves['email'].tolist() == ['ana@example.com', pd.NA]
+    assert chaves['nome'][0] == 'ana sousa|1990-01-31'
+    assert pd.isna(chaves['nome'][1])  # Data inválida não forma chave de nome
+
+
+def test_componentes_seguem_cadeias_transitivas():
+    # 0-1 pelo cpf, 1-2 pelo email, 2-3 pelo nome: um componente só; 4 fica sozinho, 5-6 à parte
+    cpf = np.array([0, 0, -1, -1, 1, 2, 2])
+    email = np.array([-1, 0, 0, -1, -1, -1, -1])
+    nome = np.array([-1, -1, 0, 0, -1, 1, -1])
+    rotulo = _componentes([cpf, email, nome], 7)
+    assert rotulo.tolist() == [0, 0, 0, 0, 4, 5, 5]
+
+
+def test_cadeia_em_ordem_invertida_converge():
+    # O menor rótulo precisa atravessar a cadeia inteira, não só um salto por chave
+    n = 10
+    pares = np.arange(n) // 2
+    impares = (np.arange(n) + 1) // 2
+    rotulo = _componentes([pares[::-1].copy(), impares[::-1].copy()], n)
+    assert (rotulo == 0).all()
+
+
+def test_find_duplicates_lista_as_chaves_de_cada_membro():
+    df = clientes(
+        ('Miguel Lima', 'miguel@example.com', '1990-01-31', '123.456.789-09'),
+        ('Migel Lima', 'outro@example.com', '1990-01-31', '987.654.321-00'),
+        ('Bia Rocha', 'OUTRO@example.com', '1985-05-05', '111.222.333-44'),
+        ('Caio Reis', 'caio@example.com', '1970-07-07', '555.666.777-88'),
+    )
+    duplicados = find_duplicates(df)
+    assert duplicados['Nº Linha'].tolist() == [1, 2, 3]
+    assert duplicados['cluster'].nunique() == 1
+    assert duplicados['id_cliente'].tolist() == ['id-0', 'id-1', 'id-2']
+    assert duplicados['chaves'].tolist() == ['nome', 'email,nome', 'email']
+
+
+def test_sem_duplicados():
+    df = clientes(('Ana', 'a@x.com', '1990-01-01', '123.456.789-09'), ('Bia', 'b@x.com', '1991-01-01', np.nan))
+    assert find_duplicates(df).empty
+    assert find_duplicates(df.iloc[:0]).empty
@@ -0,0 +1,80 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from integridade import MSG_CLIENTE_INEXISTENTE
+from etl_pedidos import (MSG_CHAVE_DUPLICADA, MSG_ITEM_INEXISTENTE, MSG_PEDIDO_INEXISTENTE, MSG_PEDIDO_REJEITADO,
+                         _ChavesParticionadas, run_etl)
+
+LINHAS = [
+    # (PedidoId, Line, ItemId, Quantidade, PrecoUnitario, ValorTotal)
+    (10, 1, 'A', 2, 5.0, 10.0),
+    (10, 2, 'B', 1, 3.0, 3.0),
+    (10, 2, 'A', 1, 1.0, 1.0),    # 3: (10, 2) repetida
+    (11, 1, 'A', 1, 1.0, 1.0),    # 4: pedido de cliente inexistente
+    (99, 1, 'A', 1, 1.0, 1.0),    # 5: pedido inexistente
+    (12, 1, 'Z', 1, 1.0, 1.0),    # 6: item inexistente
+    (12, 1, 'A', 2, 5.0, 11.0),   # 7: ValorTotal errado
+    (12, 1, 'A', 2, 5.0, 10.0),   # 8: mesma chave das linhas 6 e 7, mas elas foram rejeitadas
+    (12, 2, 'B', 1, 3.0, 3.0),
+    (10, 1, 'B', 1, 3.0, 3.0),    # 10: (10, 1) repetida, em outro bloco
+]
+
+
+@pytest.fixture
+def origem(tmp_path):
+    diretorio = tmp_path / 'origem'
+    diretorio.mkdir()
+    pd.DataFrame({'ClienteId': [1, 2], 'Nome': ['Ana', 'Bia'], 'Email': ['ana@x.com', 'bia@x.com']}).to_csv(
+        diretorio / 'clientes.csv', index=False)
+    pd.DataFrame({'Id': ['A', 'B'], 'Nome': ['Caneta', 'Lápis']}).to_csv(diretorio / 'itens.csv', index=False)
+    pd.DataFrame({'PedidoId': [10, 11, 12], 'ClienteId': [1, 99, 2],
+                  'Data': ['2024-01-01', '2024-01-02', '2024-01-03']}).to_csv(diretorio / 'pedidos.csv', index=False)
+    pd.DataFrame(LINHAS, columns=['PedidoId', 'Line', 'ItemId', 'Quantidade', 'PrecoUnitario', 'ValorTotal']).to_csv(
+        diretorio / 'linhas_pedido.csv', index=False)
+    return str(diretorio)
+
+
+def test_erros_de_integridade_e_chaves(origem, tmp_path):
+    destino = str(tmp_path / 'estrela')
+    totais = run_etl(origem, destino, 'csv', chunksize=3)
+    erros = pd.read_csv(os.path.join(destino, 'erros_pedidos.csv'), dtype={'valor': str})
+    por_linha = {(arquivo, linha): (campo, msg) for arquivo, linha, campo, msg
+                 in erros[['arquivo', 'linha', 'campo', 'mensagem']].itertuples(index=False)}
+
+    assert por_linha == {
+        ('pedidos', 2): ('ClienteId', MSG_CLIENTE_INEXISTENTE),
+        ('linhas_pedido', 3): ('PedidoId, Line', MSG_CHAVE_DUPLICADA),
+        ('linhas_pedido', 4): ('PedidoId', MSG_PEDIDO_REJEITADO),
+        ('linhas_pedido', 5): ('PedidoId', MSG_PEDIDO_INEXISTENTE),
+        ('linhas_pedido', 6): ('ItemId', MSG_ITEM_INEXISTENTE),
+        ('linhas_pedido', 7): ('ValorTotal', 'Value error, ValorTotal deve ser igual a Quantidade * PrecoUnitario'),
+        ('linhas_pedido', 10): ('PedidoId, Line', MSG_CHAVE_DUPLICADA),
+    }
+    assert erros.loc[erros['linha'] == 3, 'valor'].tolist() == ['(10, 2)']
+    assert totais['total_erros'] == len(erros)
+    assert totais['linhas_rejeitadas'] == 6
+
+    fato = pd.read_csv(os.path.join(destino, 'fato_linhas_pedido.csv'))
+    assert list(zip(fato['PedidoId'], fato['Line'])) == [(10, 1), (10, 2), (12, 1), (12, 2)]
+    assert fato['ClienteNome'].tolist() == ['Ana', 'Ana', 'Bia', 'Bia']
+    pedidos = pd.read_csv(os.path.join(destino, 'fato_pedidos.csv'))
+    assert pedidos['PedidoId'].tolist() == [10, 12]
+    assert pedidos['ValorPedido'].tolist() == [13.0, 13.0]
+
+
+def test_duplicados_particionados_iguais_ao_pandas(tmp_path):
+    rng = np.random.default_rng(0)
+    n = 5_000
+    pedidos = rng.integers(0, 300, n)
+    linhas_pedido = rng.integers(1, 5, n)
+    chaves = _ChavesParticionadas(str(tmp_path), particoes=7)
+    for inicio in range(0, n, 1_000):  # Vários blocos, como na leitura do arquivo
+        fim = inicio + 1_000
+        chaves.add(pedidos[inicio:fim], linhas_pedido[inicio:fim], np.arange(inicio, fim) + 1)
+
+    duplicadas = chaves.duplicates()
+    esperado = pd.DataFrame({'p': pedidos, 'l': linhas_pedido}).duplicated()
+    assert duplicadas[:, 2].tolist() == (np.flatnonzero(esperado) + 1).tolist()
+    assert (duplicadas[:, 0] == pedidos[duplicadas[:, 2] - 1]).all()
+    assert len(os.listdir(tmp_path)) == 7
@@ -0,0 +1,62 @@
+import os
+from datetime import date
+import pandas as pd
+import pyarrow.parquet as pq
+from models import Cliente, Endereco
+from validacao import validate_dataframe
+from exportacao import PARTICAO_PADRAO, export_validated, split_validated
+
+CLIENTES = 'input/clientes_com_erros.csv'
+ENDERECOS = 'input/enderecos_com_erros.csv'
+
+
+def erros_por_linha(df, model_class):
+    return {error['linha']: error['erros'] for error in validate_dataframe(df, model_class)}
+
+
+def test_split_separa_limpos_e_rejeitados():
+    df = pd.read_csv(CLIENTES, dtype=str)
+    limpos, rejeitados = split_validated(df, Cliente)
+    esperado = erros_por_linha(df, Cliente)
+
+    assert len(limpos) + len(rejeitados) == len(df)
+    assert rejeitados['linha'].tolist() == sorted(esperado)
+    assert set(limpos['linha']).isdisjoint(rejeitados['linha'])
+    for linha, codigos, mensagens in zip(rejeitados['linha'], rejeitados['codigos_erro'], rejeitados['mensagens_erro']):
+        assert codigos == [f"{err['loc'][0]}:{err['type']}" for err in esperado[linha]]
+        assert mensagens == [err['msg'] for err in esperado[linha]]
+    # Os rejeitados mantêm os valores originais; os limpos, os normalizados
+    assert rejeitados['cpf'].tolist() == df['cpf'].iloc[rejeitados['linha'] - 1].tolist()
+    assert limpos['cpf'].dropna().str.fullmatch(r'[0-9]{11}').all()
+
+
+def test_export_grava_particoes_que_voltam_iguais(tmp_path):
+    destino = str(tmp_path / 'saida')
+    df = pd.read_csv(ENDERECOS, dtype=str)
+    totais = export_validated(ENDERECOS, Endereco, destino, chunksize=20, particoes=['tipo_endereco'])
+    limpos_esperados, rejeitados_esperados = split_validated(df, Endereco)
+
+    assert totais == {'total_registros': len(df), 'registros_limpos': len(limpos_esperados),
+                      'registros_rejeitados': len(rejeitados_esperados), 'erros_colunas': []}
+    carga = f'{PARTICAO_PADRAO}={date.today().isoformat()}'
+    assert os.listdir(os.path.join(destino, 'limpos')) == [carga]
+    assert sorted(os.listdir(os.path.join(destino, 'limpos', carga))) == ['tipo_endereco=COMERCIAL',
+                                                                         'tipo_endereco=RESIDENCIAL']
+
+    limpos = pq.read_table(os.path.join(destino, 'limpos')).to_pandas().sort_values('linha')
+    assert limpos['linha'].tolist() == limpos_esperados['linha'].tolist()
+    assert limpos['cep'].tolist() == limpos_esperados['cep'].tolist()
+
+    rejeitados = pq.read_table(os.path.join(destino, 'rejeitados')).to_pandas().sort_values('linha')
+    assert rejeitados['linha'].tolist() == rejeitados_esperados['linha'].tolist()
+    assert [list(codigos) for codigos in rejeitados['codigos_erro']] == rejeitados_esperados['codigos_erro'].tolist()
+    assert [list(msgs) for msgs in rejeitados['mensagens_erro']] == rejeitados_esperados['mensagens_erro'].tolist()
+
+
+def test_export_com_erro_de_colunas_nao_grava_nada(tmp_path):
+    entrada = tmp_path / 'sem_id.csv'
+    pd.read_csv(ENDERECOS, dtype=str).drop(columns='id_cliente').to_csv(entrada, index=False)
+    destino = tmp_path / 'saida'
+    totais = export_validated(str(entrada), Endereco, str(destino))
+    assert totais['erros_colunas'] and totais['total_registros'] == 0
+    assert not destino.exists()
@@ -0,0 +1,93 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import monitor_entrada
+from monitor_entrada import FolderWatcher
+
+
+class ValidacaoFalsa:
+    """
+    Substitui process_file: registra cada chamada e segura a primeira até `liberar`
+    """
+
+    def __init__(self):
+        self.liberar = threading.Event()
+        self.lock = threading.Lock()
+        self.chamadas = []
+        self.em_andamento = 0
+        self.maximo_simultaneo = 0
+
+    def __call__(self, caminho, destino, chunksize):
+        with self.lock:
+            self.chamadas.append(os.path.getsize(caminho))
+            self.em_andamento += 1
+            self.maximo_simultaneo = max(self.maximo_simultaneo, self.em_andamento)
+            primeira = len(self.chamadas) == 1
+        if primeira:
+            self.liberar.wait(10)
+        with self.lock:
+            self.em_andamento -= 1
+        return {'arquivo': caminho, 'saida': destino, 'erros_colunas': ['teste']}
+
+
+async def esperar(condicao, limite=10.0):
+    fim = time.monotonic() + limite
+    while not condicao():
+        assert time.monotonic() < fim, 'tempo esgotado'
+        await asyncio.sleep(0.01)
+
+
+def test_arquivo_alterado_durante_a_validacao(tmp_path, monkeypatch):
+    origem, destino = tmp_path / 'entrada', tmp_path / 'saida'
+    origem.mkdir()
+    arquivo = origem / 'a.csv'
+    arquivo.write_text('id_cliente\n1\n')
+    validacao = ValidacaoFalsa()
+    monkeypatch.setattr(monitor_entrada, 'process_file', validacao)
+
+    async def cenario():
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            watcher = FolderWatcher(str(origem), str(destino), executor, workers=2, intervalo=0.01)
+            tarefa = asyncio.create_task(watcher.run())
+            try:
+                await esperar(lambda: validacao.chamadas)
+                # Duas versões novas enquanto a primeira ainda está em validação
+                for conteudo in ('id_cliente\n1\n2\n', 'id_cliente\n1\n2\n3\n'):
+                    arquivo.write_text(conteudo)
+                    await asyncio.sleep(0.1)  # Várias varreduras: a versão estabiliza
+                assert len(validacao.chamadas) == 1
+                assert watcher.fila.qsize() == 0
+
+                validacao.liberar.set()
+                final = os.stat(arquivo)
+                await esperar(lambda: watcher.processados.get('a.csv') == (final.st_size, final.st_mtime_ns))
+                await asyncio.sleep(0.1)
+                return watcher
+            finally:
+                tarefa.cancel()
+                await asyncio.gather(tarefa, return_exceptions=True)
+
+    watcher = asyncio.run(cenario())
+    # A versão intermediária é pulada: só a mais recente é validada depois da primeira
+    assert validacao.chamadas == [len('id_cliente\n1\n'), len('id_cliente\n1\n2\n3\n')]
+    assert validacao.maximo_simultaneo == 1
+    assert watcher.pendentes == {} and watcher.alterados == {}
+
+
+def test_uma_vez_processa_cada_arquivo(tmp_path, monkeypatch):
+    origem, destino = tmp_path / 'entrada', tmp_path / 'saida'
+    origem.mkdir()
+    for nome in ('a.csv', 'b.CSV', 'c.txt'):
+        (origem / nome).write_text('id_cliente\n1\n')
+    validacao = ValidacaoFalsa()
+    validacao.liberar.set()
+    monkeypatch.setattr(monitor_entrada, 'process_file', validacao)
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        watcher = FolderWatcher(str(origem), str(destino), executor, workers=2)
+        asyncio.run(watcher.run(uma_vez=True))
+        assert sorted(watcher.processados) == ['a.csv', 'b.CSV']
+        # O estado gravado evita reprocessar na próxima execução
+        assert FolderWatcher(str(origem), str(destino), executor).scan(esperar_estabilizar=False) == []
@@ -0,0 +1,71 @@
+import io
+import os
+import pandas as pd
+import pytest
+from models import Cliente
+from validacao import validate_dataframe
+from relatorio_erros import ErrorReportWriter, export_error_report
+
+CLIENTES = 'input/clientes_com_erros.csv'
+
+
+def ler(caminho, formato):
+    if formato == 'csv':
+        return pd.read_csv(caminho, dtype=str)
+    if formato == 'parquet':
+        return pd.read_parquet(caminho)
+    return pd.read_json(caminho, lines=True, dtype=False)
+
+
+@pytest.mark.parametrize('formato', ['csv', 'parquet', 'jsonl'])
+def test_relatorio_volta_igual_aos_erros(tmp_path, formato):
+    destino = str(tmp_path / f'relatorio.{formato}')
+    totais = export_error_report(CLIENTES, Cliente, destino, chunksize=30)
+    esperado = [(e['linha'], err['loc'][0], err['msg']) for e in validate_dataframe(pd.read_csv(CLIENTES), Cliente)
+                for err in e['erros']]
+
+    relatorio = ler(destino, formato)
+    assert totais['total_erros'] == len(relatorio) == len(esperado)
+    assert list(zip(relatorio['linha'].astype(int), relatorio['campo'], relatorio['mensagem'])) == esperado
+    origem = pd.read_csv(CLIENTES, dtype=str)
+    assert relatorio['cpf'].tolist() == origem['cpf'].iloc[relatorio['linha'].astype(int) - 1].tolist()
+    assert os.listdir(tmp_path) == [f'relatorio.{formato}']  # Sem o .tmp
+
+
+def test_destino_so_e_substituido_no_fim(tmp_path):
+    destino = tmp_path / 'relatorio.csv'
+    destino.write_text('anterior')
+    writer = ErrorReportWriter(str(destino))
+    writer.write(pd.DataFrame({'linha': [1], 'campo': ['cpf']}))
+    assert destino.read_text() == 'anterior'
+    assert (tmp_path / 'relatorio.csv.tmp').exists()
+    writer.close()
+    assert destino.read_text().splitlines() == ['linha,campo', '1,cpf']
+    assert not (tmp_path / 'relatorio.csv.tmp').exists()
+
+
+@pytest.mark.parametrize('formato', ['csv', 'parquet'])
+def test_falha_no_meio_descarta_o_temporario(tmp_path, formato):
+    destino = tmp_path / f'relatorio.{formato}'
+    destino.write_bytes(b'anterior')
+    with pytest.raises(RuntimeError):
+        with ErrorReportWriter(str(destino)) as writer:
+            writer.write(pd.DataFrame({'linha': [1], 'campo': ['cpf']}))
+            raise RuntimeError('falha na validação')
+    assert destino.read_bytes() == b'anterior'
+    assert os.listdir(tmp_path) == [f'relatorio.{formato}']
+
+
+def test_entrada_ilegivel_nao_cria_o_destino(tmp_path):
+    destino = tmp_path / 'relatorio.csv'
+    with pytest.raises(FileNotFoundError):
+        export_error_report(str(tmp_path / 'nao_existe.csv'), Cliente, str(destino))
+    assert os.listdir(tmp_path) == []
+
+
+def test_destino_em_memoria_nao_e_fechado():
+    buffer = io.BytesIO()
+    with ErrorReportWriter(buffer, 'jsonl') as writer:
+        writer.write(pd.DataFrame({'linha': [1, 2], 'campo': ['cpf', 'email']}))
+    assert not buffer.closed
+    assert buffer.getvalue().decode().splitlines() == ['{"linha":1,"campo":"cpf"}', '{"linha":2,"campo":"email"}']
@@ -0,0 +1,178 @@
+import numpy as np
+import pandas as pd
+import pytest
+from pydantic import ValidationError
+from models import Cliente, Endereco
+from validacao import (_EMAIL_ADAPTER, ValidationMemo, _erro_dominio, _validar_cpf, _validar_email, expand_errors, validate_dataframe_columnar,
+                       validate_dataframe_pydantic)
+
+# Paridade do motor vetorizado com a validação linha a linha do Pydantic, em (linha, loc, msg)
+
+
+def chaves(errors):
+    return sorted({(e['linha'], err['loc'], err['msg']) for e in errors for err in e['erros']}, key=str)
+
+
+def vetorizado(df: pd.DataFrame, model_class, memo=None):
+    return chaves(expand_errors(df, *validate_dataframe_columnar(df, model_class, memo)))
+
+
+def referencia(df: pd.DataFrame, model_class):
+    return chaves(validate_dataframe_pydantic(df, model_class))
+
+
+def por_valor(regra, valores):
+    """
+    Mensagem de erro (ou None) de cada valor pela regra vetorizada
+    """
+    invalidos, codigos, modelos = regra(pd.Series(valores, dtype='str'))
+    return [modelos[codigo][1] if invalido else None for invalido, codigo in zip(invalidos, codigos)]
+
+
+def escalar(validador, valor):
+    """
+    Mensagem de erro (ou None) do field_validator do modelo, no formato do Pydantic
+    """
+    try:
+        validador(valor)
+        return None
+    except ValidationError as e:
+        return e.errors()[0]['msg']
+    except ValueError as e:
+        return f'Value error, {e}'
+
+
+def _cpf(base: str) -> str:
+    """
+    CPF formatado com os dígitos verificadores corretos para os 9 dígitos de `base`
+    """
+    digitos = [int(d) for d in base]
+    for n in (9, 10):
+        digitos.append(sum(d * peso for d, peso in zip(digitos[:n], range(n + 1, 1, -1))) * 10 % 11 % 10)
+    cpf = ''.join(map(str, digitos))
+    return f'{cpf[:3]}.{cpf[3:6]}.{cpf[6:9]}-{cpf[9:]}'
+
+
+def _clientes_com_casos_de_borda() -> pd.DataFrame:
+    valido = _cpf('123456789')
+    casos = [
+        # (nome, email, data_nascimento, cpf)
+        ('Ana Souza', 'ana@example.com', '1990-01-31', valido),
+        (np.nan, np.nan, np.nan, np.nan),
+        ('', '', '', ''),
+        ('Al', 'sem-arroba', '1990-02-30', valido[:-1] + str((int(valido[-1]) + 1) % 10)),
+        ('B' * 101, 'a@b', '31/01/1990', '111.111.111-11'),
+        ('Carla Dias', 'CARLA@Example.COM', '1990-1-31', '123.456.789'),
+        ('Davi Lima', 'davi@example.com', '0000-01-01', valido.replace('.', '').replace('-', '')),
+        ('Eva Rocha', ' eva@example.com ', 'INVALIDO', 'abc.def.ghi-jk'),
+        ('Fábio Reis', 'fabio@exa mple.com', '2024-02-29', _cpf('987654321')),
+        ('Gil Nunes', 'gil@example.com', '2023-02-29 ', ' ' + valido),
+    ]
+    df = pd.DataFrame(casos, columns=['nome', 'email', 'data_nascimento', 'cpf'], dtype=object)
+    df.insert(0, 'id_cliente', [f'id-{i}' for i in range(len(df))])
+    df['telefone'] = ['(11) 91234-5678', np.nan, '', '1', '2', '3', '4', '5', '6', '7']
+    return df
+
+
+def _enderecos_com_casos_de_borda() -> pd.DataFrame:
+    return pd.DataFrame({
+        'id_cliente': ['a', 'b', 'c', 'd', np.nan, ''],
+        'tipo_endereco': ['Residencial', 'comercial', 'Outro', '', np.nan, 'RESIDENCIAL '],
+        'cep': ['01310-100', '0131010', '01310100', '', np.nan, 'abcde-fgh'],
+        'numero': ['10', np.nan, '', 'S/N', '1a', '0'],
+    }, dtype=object)
+
+
+@pytest.mark.parametrize('caminho, model_class', [
+    ('input/clientes_com_erros.csv', Cliente),
+    ('input/enderecos_com_erros.csv', Endereco),
+])
+def test_paridade_arquivos_de_exemplo(caminho, model_class):
+    df = pd.read_csv(caminho)
+    assert vetorizado(df, model_class) == referencia(df, model_class)
+
+
+def test_paridade_casos_de_borda_clientes():
+    df = _clientes_com_casos_de_borda()
+    assert vetorizado(df, Cliente) == referencia(df, Cliente)
+
+
+def test_paridade_casos_de_borda_enderecos():
+    df = _enderecos_com_casos_de_borda()
+    assert vetorizado(df, Endereco) == referencia(df, Endereco)
+
+
+@pytest.mark.parametrize('dtype', [object, str])
+def test_paridade_com_nan_e_vazios_nos_dois_dtypes(dtype):
+    df = _clientes_com_casos_de_borda().astype(dtype)
+    assert vetorizado(df, Cliente) == referencia(df, Cliente)
+
+
+@pytest.mark.parametrize('coluna, valores', [
+    ('cep', [1310100, 22041001, 0]),        # inteiros inferidos pelo read_csv
+    ('numero', [1.5, np.nan, 3.0]),          # decimais com NaN
+    ('tipo_endereco', [np.nan, np.nan, np.nan]),  # coluna toda vazia
+])
+def test_paridade_coluna_sem_strings(coluna, valores):
+    df = pd.DataFrame({'id_cliente': ['a', 'b', 'c'], coluna: valores})
+    assert vetorizado(df, Endereco) == referencia(df, Endereco)
+
+
+def test_paridade_cpf_inteiro_inferido():
+    df = pd.DataFrame({'id_cliente': ['a', 'b'], 'nome': ['Ana Souza', 'Bia Lima'], 'cpf': [12345678909, 11111111111]})
+    assert vetorizado(df, Cliente) == referencia(df, Cliente)
+
+
+def test_paridade_com_memo_entre_blocos():
+    # Valores repetidos entre blocos saem do memo; o resultado não pode mudar
+    df = pd.concat([_clientes_com_casos_de_borda()] * 3, ignore_index=True)
+    memo = ValidationMemo()
+    for inicio in range(0, len(df), 7):
+        bloco = df.iloc[inicio:inicio + 7]
+        assert vetorizado(bloco, Cliente, memo) == referencia(bloco, Cliente)
+
+
+def test_cpf_escalar_e_vetorizado_concordam():
+    valido = _cpf('529982247')
+    errado = valido[:-1] + str((int(valido[-1]) + 1) % 10)
+    casos = [
+        valido, valido.replace('.', '').replace('-', ''), _cpf('000000001'),
+        errado, errado[:-2] + str((int(errado[-2]) + 1) % 10) + errado[-1],  # Os dois dígitos verificadores
+        '111.111.111-11', '00000000000', '999.999.999-99',
+        '123.456.789', '529.982.247-2a', ' ' + valido, '529 982 247 25',
+    ]
+    esperado = [escalar(Cliente.validate_cpf, caso) for caso in casos]
+    assert esperado[:3] == [None, None, None]
+    assert esperado[3:8] == ['Value error, CPF inválido'] * 5
+    assert por_valor(_validar_cpf, casos) == esperado
+
+
+EMAILS = [
+    'ana@example.com', 'ANA.Souza+tag@Example.COM', 'ana@example.com',
+    'sem-arroba', '@example.com', 'ana@', 'ana@@example.com', 'a b@example.com', 'ana@exa mple.com',
+    'ana@localhost', 'ana@example', 'ana@-example.com', 'ana@example..com', 'ana..souza@example.com',
+    '.ana@example.com', 'ana.@example.com', 'x' * 65 + '@example.com', 'ana@' + 'a' * 250 + '.com',
+    '"ana souza"@example.com', 'ana@münchen.de', 'ana@xn--mnchen-3ya.de', 'ana@test', 'ana@example.test',
+    'Ana <ana@example.com>', 'ana@[127.0.0.1]',
+]
+
+
+def test_email_mensagens_iguais_as_do_pydantic():
+    esperado = [escalar(_EMAIL_ADAPTER.validate_python, email) for email in EMAILS]
+    assert sum(erro is not None for erro in esperado) >= 10
+    assert por_valor(_validar_email, EMAILS) == esperado
+
+
+def test_email_cache_de_dominios_nao_muda_o_resultado():
+    # Segunda passada com o cache já populado, e domínios repetidos com partes locais diferentes
+    _erro_dominio.cache_clear()
+    repetidos = [f'{local}@{dominio}' for local in ('ana', 'bia', 'c.d') for dominio in ('example.com', 'localhost',
+                                                                                         'example', 'münchen.de')]
+    esperado = [escalar(_EMAIL_ADAPTER.validate_python, email) for email in repetidos]
+    assert por_valor(_validar_email, repetidos) == esperado
+    assert _erro_dominio.cache_info().misses == 3  # Um por domínio ASCII; münchen.de vai pelo EmailStr inteiro
+    assert por_valor(_validar_email, repetidos) == esperado
+    assert _erro_dominio.cache_info()[:2] == (3, 3)
+
+    df = pd.DataFrame({'id_cliente': [str(i) for i in range(len(repetidos))], 'nome': 'Ana Souza', 'email': repetidos})
+    assert vetorizado(df, Cliente) == referencia(df, Cliente)
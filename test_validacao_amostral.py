@@ -0,0 +1,111 @@
+import numpy as np
+import pandas as pd
+import pytest
+from models import Cliente
+from validacao_amostral import (_z_da_rodada, cluster_interval, gate_csv, gate_dataframe, stratified_order,
+                                wilson_interval)
+
+Z95 = 1.959963984540054
+
+
+@pytest.mark.parametrize('erros, total, esperado', [
+    (0, 10, (0.0, 0.27754)),
+    (1, 10, (0.01788, 0.40415)),
+    (5, 10, (0.23659, 0.76341)),
+    (10, 10, (0.72246, 1.0)),
+    (30, 1000, (0.02109, 0.04250)),
+])
+def test_wilson_valores_conhecidos(erros, total, esperado):
+    assert wilson_interval(erros, total, Z95) == pytest.approx(esperado, abs=1e-5)
+
+
+def test_wilson_sem_amostra():
+    assert wilson_interval(0, 0, Z95) == (0.0, 1.0)
+
+
+def test_cluster_com_um_grupo_por_linha_e_wilson():
+    erros = np.array([1] * 7 + [0] * 93)
+    # A correção n/(n-1) da variância entre grupos deixa o tamanho efetivo em n-1
+    intervalo = cluster_interval(erros, np.ones(100, dtype=np.int64), Z95)
+    assert intervalo == pytest.approx(wilson_interval(7, 99, Z95))
+    assert intervalo == pytest.approx(wilson_interval(7, 100, Z95), abs=2e-3)
+
+
+def test_cluster_com_grupos_correlacionados_e_mais_largo():
+    # Blocos inteiros bons ou ruins: 4 grupos equivalem a ~3 observações independentes, não 20
+    erros, linhas = np.array([5, 0, 5, 0]), np.array([5, 5, 5, 5])
+    inferior, superior = cluster_interval(erros, linhas, Z95)
+    assert (inferior, superior) == pytest.approx(wilson_interval(2, 3, Z95))
+    iid = wilson_interval(10, 20, Z95)
+    assert inferior < iid[0] and superior > iid[1]
+
+
+def test_cluster_sem_variacao_conta_cada_grupo_uma_vez():
+    erros, linhas = np.zeros(8, dtype=np.int64), np.full(8, 50)
+    assert cluster_interval(erros, linhas, Z95) == pytest.approx(wilson_interval(0, 8, Z95))
+
+
+def test_z_por_rodada_gasta_o_alfa_sem_ultrapassar():
+    assert _z_da_rodada(0.95, 1) == pytest.approx(2.1649, abs=1e-4)
+    z = [_z_da_rodada(0.95, rodada) for rodada in range(1, 50)]
+    assert all(a < b for a, b in zip(z, z[1:]))
+    alfas = [(1 - 0.95) * 6 / (np.pi ** 2 * rodada ** 2) for rodada in range(1, 100_000)]
+    assert sum(alfas) < 0.05
+
+
+def test_ordem_estratificada_cobre_todas_as_faixas_cedo():
+    ordem = stratified_order(1000, 10, np.random.default_rng(0))
+    assert sorted(ordem.tolist()) == list(range(1000))
+    assert sorted(ordem[:10] // 100) == list(range(10))
+
+
+def clientes(n: int, taxa: float, semente: int = 0) -> pd.DataFrame:
+    """
+    `n` clientes em que uma fração `taxa` (sorteada) tem o nome curto demais
+    """
+    com_erro = np.random.default_rng(semente).random(n) < taxa
+    return pd.DataFrame({'id_cliente': [str(i) for i in range(n)],
+                         'nome': np.where(com_erro, 'A', 'Ana Souza')})
+
+
+def test_portao_aprova_cedo_taxa_baixa():
+    resultado = gate_dataframe(clientes(20_000, 0.01), Cliente, limite=0.10, semente=1)
+    assert resultado['decisao'] == 'aprovar' and not resultado['exata']
+    assert resultado['amostra'] < 20_000
+    assert resultado['intervalo'][1] <= 0.10
+
+
+def test_portao_rejeita_cedo_taxa_alta():
+    resultado = gate_dataframe(clientes(20_000, 0.30), Cliente, limite=0.10, semente=1)
+    assert resultado['decisao'] == 'rejeitar' and not resultado['exata']
+    assert resultado['rodadas'] == 1
+    assert resultado['intervalo'][0] > 0.10
+    assert set(resultado['campos']) == {'nome'}
+
+
+def test_portao_inconclusivo_perto_do_limite():
+    resultado = gate_dataframe(clientes(20_000, 0.10), Cliente, limite=0.10, semente=1, amostra_maxima=3_000)
+    assert resultado['decisao'] == 'inconclusivo'
+    assert resultado['amostra'] == 3_000
+    assert resultado['intervalo'][0] <= 0.10 <= resultado['intervalo'][1]
+
+
+def test_portao_com_todas_as_linhas_usa_a_taxa_exata():
+    df = clientes(150, 0.0)  # Menos linhas que a amostra mínima
+    df.loc[:11, 'nome'] = 'A'
+    resultado = gate_dataframe(df, Cliente, limite=0.10, semente=1)
+    assert resultado['exata'] and resultado['decisao'] == 'aprovar'
+    assert resultado['taxa_erro'] == resultado['intervalo'][0] == 12 / 150
+
+
+def test_portao_csv_por_blocos(tmp_path):
+    caminho = str(tmp_path / 'clientes.csv')
+    df = clientes(40_000, 0.02)
+    df.iloc[36_000:, 1] = 'A'  # Um trecho ruim no fim do arquivo: 12% no total
+    df.to_csv(caminho, index=False)
+
+    resultado = gate_csv(caminho, Cliente, limite=0.05, tamanho_bloco=2048, semente=3)
+    assert resultado['decisao'] == 'rejeitar'
+    assert resultado['fracao_lida'] < 1.0
+    aprovado = gate_csv(caminho, Cliente, limite=0.30, tamanho_bloco=2048, semente=3)
+    assert aprovado['decisao'] == 'aprovar'
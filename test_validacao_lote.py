@@ -0,0 +1,80 @@
+import io
+import pandas as pd
+import pytest
+from models import Cliente, Endereco
+from cache_validacao import ResultCache
+from validacao import detect_model, validate_dataframe
+from validacao_lote import batch_totals, summary_frame, top_fields, upload_labels, validate_batch
+
+
+def ler(caminho: str) -> bytes:
+    with open(caminho, 'rb') as arquivo:
+        return arquivo.read()
+
+
+CLIENTES = ler('input/clientes_com_erros.csv')
+ENDERECOS = ler('input/enderecos_com_erros.csv')
+
+
+@pytest.mark.parametrize('colunas, modelo', [
+    (['id_cliente', 'nome', 'email', 'cpf'], 'clientes'),
+    (['id_cliente', 'tipo_endereco', 'cep', 'numero'], 'enderecos'),
+    (['id_cliente', 'nome', 'cep'], None),  # Empate: duas colunas em comum com cada modelo
+    (['nome', 'email'], None),  # Falta id_cliente
+])
+def test_detect_model(colunas, modelo):
+    assert detect_model(colunas) == modelo
+
+
+@pytest.mark.parametrize('workers', [1, 3])
+def test_validate_batch(workers):
+    so_clientes = pd.read_csv('input/clientes_com_erros.csv', dtype=str).head(10).to_csv(index=False).encode()
+    arquivos = [
+        ('clientes.csv', CLIENTES),
+        ('enderecos.csv', ENDERECOS),
+        ('clientes.csv', so_clientes),        # Mesmo nome, outro conteúdo
+        ('planilha.csv', b'a,b\n1,2\n'),      # Cabeçalho de nenhum modelo
+        ('quebrado.csv', b'\xff\xfe\x00'),     # Ilegível
+    ]
+    resumos = {resumo['indice']: resumo for resumo in validate_batch(arquivos, ResultCache(), workers)}
+    assert sorted(resumos) == list(range(len(arquivos)))
+
+    for indice, model_class in ((0, Cliente), (1, Endereco), (2, Cliente)):
+        nome, conteudo = arquivos[indice]
+        df = pd.read_csv(io.BytesIO(conteudo), dtype=str)
+        errors = validate_dataframe(df, model_class)
+        resumo = resumos[indice]
+        assert (resumo['arquivo'], resumo['erro']) == (nome, None)
+        assert resumo['registros'] == len(df)
+        assert resumo['registros_com_erros'] == len(errors)
+        assert resumo['total_erros'] == sum(len(error['erros']) for error in errors)
+    assert resumos[0]['hash'] != resumos[2]['hash']
+    assert resumos[3]['modelo'] is None and 'Cabeçalho não corresponde' in resumos[3]['erro']
+    assert resumos[4]['erro'] is not None and resumos[4]['registros'] == 0
+
+
+def resumo_falso(indice, arquivo, registros, com_erros, erros_por_campo, erro=None, modelo='clientes'):
+    return {'indice': indice, 'arquivo': arquivo, 'hash': str(indice), 'modelo': modelo, 'registros': registros,
+            'registros_com_erros': com_erros, 'total_erros': sum(erros_por_campo.values()),
+            'erros_por_campo': erros_por_campo, 'erro': erro, 'segundos': 0.01234}
+
+
+def test_summary_frame():
+    resumos = [
+        resumo_falso(0, 'b.csv', 200, 50, {'cpf': 30, 'email': 25, 'nome': 5, 'telefone': 1}),
+        resumo_falso(1, 'a.csv', 0, 0, {}, erro='Erro ao ler o arquivo: x', modelo=None),
+        resumo_falso(2, 'b.csv', 100, 0, {}),
+    ]
+    frame = summary_frame(resumos)
+    assert frame['Arquivo'].tolist() == ['a.csv', 'b.csv (envio 1)', 'b.csv (envio 3)']
+    assert frame['Taxa de Erros (%)'].tolist()[1:] == [25.0, 0.0] and pd.isna(frame['Taxa de Erros (%)'][0])
+    assert frame['Campos com Mais Erros'][1] == 'cpf (30), email (25), nome (5)'
+    assert frame['Segundos'][1] == 0.012
+    assert frame['Falha'].tolist()[0] == 'Erro ao ler o arquivo: x'
+    assert upload_labels(resumos)[1] == 'a.csv'
+
+    totais = batch_totals(resumos)
+    assert (totais['arquivos'], totais['falhas'], totais['registros'], totais['total_erros']) == (3, 1, 300, 61)
+    assert totais['taxa_erros'] == pytest.approx(50 / 3)
+    campos = top_fields(resumos, 2)
+    assert campos[['Campo', 'Erros', 'Arquivos']].values.tolist() == [['cpf', 30, 1], ['email', 25, 1]]
@@ -0,0 +1,50 @@
+import io
+import pandas as pd
+import pytest
+from models import Cliente
+from validacao import validate_dataframe
+from validacao_paralela import shard_boundaries, validate_csv_parallel
+
+TAMANHO_SHARD = 700  # bytes: vários shards mesmo num CSV pequeno
+
+
+def chaves(errors):
+    return [(e['linha'], err['loc'], err['msg']) for e in errors for err in e['erros']]
+
+
+@pytest.fixture
+def csv_multilinha(tmp_path):
+    """
+    Os clientes de exemplo com campos entre aspas que contêm quebras de linha (e aspas escapadas)
+    espalhados pelo arquivo, para que vários limites de shard caiam perto deles
+    """
+    df = pd.read_csv('input/clientes_com_erros.csv', dtype=str)
+    df.loc[::4, 'nome'] = df.loc[::4, 'nome'] + '\nSegunda linha, com vírgula'
+    df.loc[1::9, 'telefone'] = 'ramal\n"12"\n\n34'
+    df.loc[2::11, 'data_nascimento'] = '1990-01-01\n'  # Quebra de linha num campo com erro
+    caminho = tmp_path / 'clientes_multilinha.csv'
+    df.to_csv(caminho, index=False)
+    return str(caminho)
+
+
+def test_limites_nunca_cortam_registros_entre_aspas(csv_multilinha):
+    limites = shard_boundaries(csv_multilinha, TAMANHO_SHARD)
+    assert len(limites) > 3
+    with open(csv_multilinha, 'rb') as f:
+        conteudo = f.read()
+    cabecalho = conteudo[:limites[0]]
+    total = 0
+    for inicio, fim in zip(limites[:-1], limites[1:]):
+        trecho = conteudo[inicio:fim]
+        assert trecho.count(b'"') % 2 == 0
+        total += len(pd.read_csv(io.BytesIO(cabecalho + trecho), dtype=str))
+    assert total == len(pd.read_csv(csv_multilinha, dtype=str))
+
+
+@pytest.mark.parametrize('workers', [1, 3])
+def test_paridade_com_validacao_serial(csv_multilinha, workers):
+    serial = validate_dataframe(pd.read_csv(csv_multilinha, dtype=str), Cliente)
+    total, paralelo = validate_csv_parallel(csv_multilinha, Cliente, workers, TAMANHO_SHARD)
+    assert total == 105
+    assert chaves(paralelo) == chaves(serial)
+    assert any(e['linha'] > 90 for e in paralelo)  # Numeração global, não a do shard
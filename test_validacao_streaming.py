@@ -0,0 +1,132 @@
+import json
+import pytest
+from models import Cliente
+from validacao_streaming import SUFIXO_CHECKPOINT, validate_csv_incremental, validate_csv_streaming
+
+with open('input/clientes_com_erros.csv', 'rb') as _arquivo:
+    LINHAS = _arquivo.read().splitlines(keepends=True)  # Cabeçalho + 105 registros, sem campos multilinha
+
+
+@pytest.fixture
+def caminhos(tmp_path):
+    return {nome: str(tmp_path / arquivo) for nome, arquivo in
+            (('csv', 'clientes.csv'), ('erros', 'erros.csv'), ('limpos', 'limpos.csv'))}
+
+
+def gravar(caminho: str, linhas, modo='wb'):
+    with open(caminho, modo) as arquivo:
+        arquivo.write(b''.join(linhas))
+
+
+def ler(caminho: str) -> bytes:
+    with open(caminho, 'rb') as arquivo:
+        return arquivo.read()
+
+
+def completo(tmp_path, linhas):
+    """
+    Relatório e linhas limpas de uma validação do zero sobre `linhas`
+    """
+    gravar(str(tmp_path / 'referencia.csv'), linhas)
+    totais = validate_csv_streaming(str(tmp_path / 'referencia.csv'), Cliente, str(tmp_path / 'ref_erros.csv'),
+                                    chunksize=17, caminho_limpos=str(tmp_path / 'ref_limpos.csv'))
+    return totais, ler(str(tmp_path / 'ref_erros.csv')), ler(str(tmp_path / 'ref_limpos.csv'))
+
+
+def incremental(caminhos):
+    return validate_csv_incremental(caminhos['csv'], Cliente, caminhos['erros'], chunksize=17,
+                                    caminho_limpos=caminhos['limpos'])
+
+
+def alterar_checkpoint(caminhos, **valores):
+    caminho = caminhos['erros'] + SUFIXO_CHECKPOINT
+    with open(caminho, encoding='utf-8') as arquivo:
+        checkpoint = json.load(arquivo)
+    checkpoint.update(valores)
+    with open(caminho, 'w', encoding='utf-8') as arquivo:
+        json.dump(checkpoint, arquivo)
+
+
+def test_crescimento_append_only(caminhos, tmp_path):
+    gravar(caminhos['csv'], LINHAS[:41])
+    totais, motivo = incremental(caminhos)
+    assert motivo == 'sem checkpoint' and totais['registros_novos'] == 40
+
+    # Linhas novas e uma última linha ainda sendo escrita (sem '\n'), que fica para depois
+    gravar(caminhos['csv'], LINHAS[41:80] + [LINHAS[80].rstrip(b'\r\n')], 'ab')
+    totais, motivo = incremental(caminhos)
+    assert motivo is None and totais['registros_novos'] == 39
+    esperado, erros, limpos = completo(tmp_path, LINHAS[:80])
+    assert {chave: totais[chave] for chave in esperado} == esperado
+    assert ler(caminhos['erros']) == erros
+    assert ler(caminhos['limpos']) == limpos
+
+    gravar(caminhos['csv'], [LINHAS[80][len(LINHAS[80].rstrip(b'\r\n')):]] + LINHAS[81:], 'ab')
+    totais, motivo = incremental(caminhos)
+    assert motivo is None and totais['registros_novos'] == len(LINHAS) - 80
+    esperado, erros, limpos = completo(tmp_path, LINHAS)
+    assert {chave: totais[chave] for chave in esperado} == esperado
+    assert (ler(caminhos['erros']), ler(caminhos['limpos'])) == (erros, limpos)
+
+    totais, motivo = incremental(caminhos)  # Nada novo
+    assert motivo is None and totais['registros_novos'] == 0
+    assert ler(caminhos['erros']) == erros
+
+
+def test_prefixo_alterado_refaz_do_zero(caminhos, tmp_path):
+    gravar(caminhos['csv'], LINHAS[:60])
+    incremental(caminhos)
+    alterado = LINHAS[:60]
+    alterado[3] = alterado[3].replace(b'@', b'#', 1)  # Mesmo tamanho: só o hash do prefixo percebe
+    gravar(caminhos['csv'], alterado + LINHAS[60:])
+
+    totais, motivo = incremental(caminhos)
+    assert motivo == 'conteúdo já validado foi alterado'
+    esperado, erros, limpos = completo(tmp_path, alterado + LINHAS[60:])
+    assert totais['registros_novos'] == esperado['total_registros']
+    assert (ler(caminhos['erros']), ler(caminhos['limpos'])) == (erros, limpos)
+
+
+@pytest.mark.parametrize('conteudo', ['{"offset": 12', '[]', '{"versao": 2, "offset": 0}'])
+def test_checkpoint_corrompido_refaz_do_zero(caminhos, tmp_path, conteudo):
+    gravar(caminhos['csv'], LINHAS)
+    incremental(caminhos)
+    with open(caminhos['erros'] + SUFIXO_CHECKPOINT, 'w', encoding='utf-8') as arquivo:
+        arquivo.write(conteudo)
+
+    totais, motivo = incremental(caminhos)
+    assert motivo == 'sem checkpoint'
+    esperado, erros, _ = completo(tmp_path, LINHAS)
+    assert totais['registros_novos'] == esperado['total_registros']
+    assert ler(caminhos['erros']) == erros
+
+
+@pytest.mark.parametrize('valores, motivo_esperado', [
+    ({'schema': 'schema-anterior'}, 'schema do modelo alterado'),
+    ({'versao': 1}, 'checkpoint de outra versão'),
+    ({'limpos': None}, 'arquivo de linhas limpas diferente'),
+])
+def test_checkpoint_de_outro_schema_refaz_do_zero(caminhos, tmp_path, valores, motivo_esperado):
+    gravar(caminhos['csv'], LINHAS[:50])
+    incremental(caminhos)
+    gravar(caminhos['csv'], LINHAS[50:], 'ab')
+    alterar_checkpoint(caminhos, **valores)
+
+    totais, motivo = incremental(caminhos)
+    assert motivo == motivo_esperado
+    esperado, erros, limpos = completo(tmp_path, LINHAS)
+    assert totais['registros_novos'] == esperado['total_registros']
+    assert (ler(caminhos['erros']), ler(caminhos['limpos'])) == (erros, limpos)
+
+
+def test_relatorio_interrompido_e_descartado(caminhos, tmp_path):
+    gravar(caminhos['csv'], LINHAS[:50])
+    incremental(caminhos)
+    gravar(caminhos['erros'], [b'lixo de uma execucao interrompida\n'], 'ab')
+    gravar(caminhos['limpos'], [b'lixo\n'], 'ab')
+    gravar(caminhos['csv'], LINHAS[50:], 'ab')
+
+    _, motivo = incremental(caminhos)
+    assert motivo is None
+    _, erros, limpos = completo(tmp_path, LINHAS)
+    assert (ler(caminhos['erros']), ler(caminhos['limpos'])) == (erros, limpos)
@@ -0,0 +1,839 @@
+import pandas as pd
+import numpy as np
+from models import Cliente, Endereco
+from typing import List, Dict, Set, Tuple, Optional, Callable, get_args
+from types import NoneType
+from itertools import repeat
+from functools import lru_cache
+from collections import OrderedDict
+from instrumentacao import stage, timed_call
+from pydantic import ValidationError, TypeAdapter, EmailStr
+from annotated_types import MinLen, MaxLen
+import operator
+
+# Um erro de validação é representado por um "modelo" (tipo, mensagem, contexto).
+# O resultado vetorizado de um campo é o par (posições com erro, código do modelo).
+ModeloErro = Tuple[str, str, Optional[Dict]]
+
+MSG_STRING_TYPE = 'Input should be a valid string'
+
+# Modelos disponíveis para os runners de linha de comando
+MODELOS = {'clientes': Cliente, 'enderecos': Endereco}
+
+_EMAIL_ADAPTER = TypeAdapter(EmailStr)
+
+# Pré-filtro de emails com parte local simples (dot-atom) e limites de tamanho do email-validator
+_EMAIL_SIMPLES = r'[A-Za-z0-9_%+-]+(?:\.[A-Za-z0-9_%+-]+)*@[A-Za-z0-9.-]+'
+MAX_PARTE_LOCAL = 64
+MAX_EMAIL = 254
+TAMANHO_CACHE_DOMINIOS = 65536
+_DATA_ISO = r'[0-9]{4}-[0-9]{2}-[0-9]{2}'
+
+
+def get_required_fields(model_class) -> Set[str]:
+    """
+    Retorna o conjunto de campos obrigatórios do modelo Pydantic
+    """
+    return {name for name, field in model_class.model_fields.items() if field.is_required()}
+
+
+def detect_model(colunas: List[str]) -> Optional[str]:
+    """
+    Nome do modelo (chave de MODELOS) que o cabeçalho atende: todas as colunas obrigatórias
+    presentes e, entre os candidatos, o com mais colunas em comum. None se nenhum ou se empatar.
+    """
+    presentes = set(colunas)
+    candidatos = sorted(((len(presentes & set(model_class.model_fields)), nome)
+                         for nome, model_class in MODELOS.items()
+                         if get_required_fields(model_class) <= presentes), reverse=True)
+    if not candidatos or (len(candidatos) > 1 and candidatos[0][0] == candidatos[1][0]):
+        return None
+    return candidatos[0][1]
+
+
+def validate_columns(df: pd.DataFrame, model_class) -> List[str]:
+    """
+    Valida se todas as colunas obrigatórias existem no dataframe
+    Retorna lista de erros encontrados
+    """
+    with stage('colunas'):
+        required_fields = get_required_fields(model_class)
+        df_columns = set(df.columns)
+        missing_columns = required_fields - df_columns
+
+    errors = []
+    if missing_columns:
+        errors.append(f"Colunas obrigatórias faltando: {', '.join(missing_columns)}")
+
+    return errors
+
+
+def validate_dataframe_pydantic(df: pd.DataFrame, model_class) -> List[Dict]:
+    """
+    Valida linha a linha instanciando o modelo Pydantic.
+    É o caminho de referência usado para conferir a paridade do motor vetorizado.
+    """
+    errors = []
+
+    column_errors = validate_columns(df, model_class)
+    if column_errors:
+        return [{'linha': 0, 'erros': [{'loc': ('colunas',), 'msg': error}]} for error in column_errors]
+
+    with stage('validacao_pydantic', len(df)):
+        for idx, row in df.iterrows():
+            try:
+                model_class(**row.to_dict())
+            except ValidationError as e:
+                errors.append({
+                    'linha': idx + 1,  # Índice começa em 0, mas mostramos começando em 1
+                    'erros': e.errors()
+                })
+
+    return errors
+
+
+# --- Regras vetorizadas equivalentes aos field_validators de models.py ---
+
+def _erro_valor(msg: str) -> ModeloErro:
+    return ('value_error', f'Value error, {msg}', {'error': ValueError(msg)})
+
+
+def _validar_por_valor(valores: pd.Series, validador: Callable):
+    """
+    Roda o field_validator do próprio modelo uma única vez por valor distinto
+    e propaga o resultado para as linhas pelos códigos da fatoração
+    """
+    codigos, unicos = pd.factorize(valores)
+    modelos: List[ModeloErro] = []
+    indice_modelo: Dict[str, int] = {}
+    codigo_unico = np.full(len(unicos), -1, dtype=np.int64)
+
+    def validar_unicos(unicos):
+        for i, valor in enumerate(unicos):
+            try:
+                validador(valor)
+            except ValueError as e:
+                msg = str(e)
+                if msg not in indice_modelo:
+                    indice_modelo[msg] = len(modelos)
+                    modelos.append(_erro_valor(msg))
+                codigo_unico[i] = indice_modelo[msg]
+
+    timed_call(f'{validador.__qualname__} (por valor)', validar_unicos, unicos)
+
+    codigo_linha = codigo_unico[codigos]
+    return codigo_linha >= 0, codigo_linha, modelos
+
+
+def _validar_com_caminho_rapido(valores: pd.Series, usual: np.ndarray, codigo_usual: np.ndarray,
+                                modelos: List[ModeloErro], validador: Callable):
+    """
+    Junta o resultado vetorizado das linhas no formato usual (`codigo_usual`, -1 = válido)
+    com o do validador do modelo para as demais linhas
+    """
+    codigo = np.full(len(valores), -1, dtype=np.int64)
+    codigo[usual] = codigo_usual
+    if not usual.all():
+        invalidos, codigos_outros, modelos_outros = _validar_por_valor(valores[~usual], validador)
+        codigos_outros = np.where(invalidos, codigos_outros + len(modelos), -1)
+        codigo[~usual] = codigos_outros
+        modelos = modelos + modelos_outros
+    return codigo >= 0, codigo, modelos
+
+
+def _digitos_ascii(valores: pd.Series, quantidade: int) -> np.ndarray:
+    """
+    Matriz (linhas x `quantidade`) com os dígitos de valores no formato usual,
+    que só contêm `quantidade` dígitos ASCII e os separadores '.' e '-'
+    """
+    digitos = valores.str.replace('.', '', regex=False).str.replace('-', '', regex=False)
+    buffer = ''.join(digitos.tolist()).encode('ascii')
+    return np.frombuffer(buffer, dtype=np.uint8).reshape(-1, quantidade).astype(np.int64) - ord('0')
+
+
+def _validar_cpf(valores: pd.Series):
+    """
+    Tamanho, sequências repetidas e dígitos verificadores do CPF.
+    Nos CPFs no formato usual, os dígitos verificadores são calculados com somas
+    ponderadas sobre a matriz de dígitos; os demais valores passam por Cliente.validate_cpf.
+    """
+    usual = valores.str.fullmatch(r'[0-9]{3}\.?[0-9]{3}\.?[0-9]{3}-?[0-9]{2}').to_numpy(dtype=bool)
+    codigo_usual = np.full(int(usual.sum()), -1, dtype=np.int64)
+
+    if usual.any():
+        d = _digitos_ascii(valores[usual], 11)
+        repetidos = (d == d[:, :1]).all(axis=1)
+        dv1 = (d[:, :9] @ np.arange(10, 1, -1)) * 10 % 11 % 10
+        dv2 = (d[:, :10] @ np.arange(11, 1, -1)) * 10 % 11 % 10
+        codigo_usual[repetidos | (dv1 != d[:, 9]) | (dv2 != d[:, 10])] = 0
+
+    return _validar_com_caminho_rapido(valores, usual, codigo_usual, [_erro_valor('CPF inválido')],
+                                       Cliente.validate_cpf)
+
+
+def _validar_cep(valores: pd.Series):
+    """
+    CEPs no formato usual (8 dígitos, com ou sem hífen) são válidos;
+    os demais valores passam por Endereco.validate_cep
+    """
+    usual = valores.str.fullmatch(r'[0-9]{5}-?[0-9]{3}').to_numpy(dtype=bool)
+    return _validar_com_caminho_rapido(valores, usual, np.full(int(usual.sum()), -1, dtype=np.int64), [],
+                                       Endereco.validate_cep)
+
+
+def _validar_tipo_endereco(valores: pd.Series):
+    tipos_validos = ['RESIDENCIAL', 'COMERCIAL']
+    invalidos = ~valores.str.upper().isin(tipos_validos).to_numpy(dtype=bool)
+    msg = f'Tipo de endereço deve ser um dos seguintes: {", ".join(tipos_validos)}'
+    return invalidos, np.zeros(len(valores), dtype=np.int64), [_erro_valor(msg)]
+
+
+def _validar_data_nascimento(valores: pd.Series):
+    """
+    Valida o formato YYYY-MM-DD com aritmética de calendário em NumPy.
+    Os poucos valores fora desse formato (ex.: 20200101, aceito por date.fromisoformat)
+    passam por Cliente.validate_data_nascimento, uma vez por valor distinto.
+    """
+    usual = valores.str.fullmatch(_DATA_ISO).to_numpy(dtype=bool)
+    codigo_usual = np.full(int(usual.sum()), -1, dtype=np.int64)
+
+    if usual.any():
+        datas = valores[usual]
+        ano = datas.str.slice(0, 4).astype(np.int64).to_numpy()
+        mes = datas.str.slice(5, 7).astype(np.int64).to_numpy()
+        dia = datas.str.slice(8, 10).astype(np.int64).to_numpy()
+        bissexto = (ano % 4 == 0) & ((ano % 100 != 0) | (ano % 400 == 0))
+        dias_no_mes = np.array([0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])[np.clip(mes, 0, 12)]
+        dias_no_mes = dias_no_mes + ((mes == 2) & bissexto)
+        ok = (ano >= 1) & (mes >= 1) & (mes <= 12) & (dia >= 1) & (dia <= dias_no_mes)
+        codigo_usual[~ok] = 0
+
+    msg = 'Data de nascimento deve estar no formato YYYY-MM-DD'
+    return _validar_com_caminho_rapido(valores, usual, codigo_usual, [_erro_valor(msg)],
+                                       Cliente.validate_data_nascimento)
+
+
+def _erro_email(email: str) -> Optional[ModeloErro]:
+    """
+    Valida um email com o mesmo validador do EmailStr; retorna o erro ou None
+    """
+    try:
+        _EMAIL_ADAPTER.validate_python(email)
+        return None
+    except ValidationError as e:
+        err = e.errors()[0]
+        return (err['type'], err['msg'], err.get('ctx'))
+
+
+@lru_cache(maxsize=TAMANHO_CACHE_DOMINIOS)
+def _erro_dominio(dominio: str) -> Optional[ModeloErro]:
+    """
+    Valida o domínio (normalização, IDN, domínios reservados) uma única vez,
+    usando uma parte local sabidamente válida. O cache é compartilhado entre blocos e execuções.
+    """
+    return _erro_email('a@' + dominio)
+
+
+def _validar_email(valores: pd.Series):
+    """
+    Valida os emails em três etapas:
+    - cada valor distinto é considerado uma única vez (fatoração);
+    - valores com parte local simples (pré-filtro sobre a coluna) dependem só do domínio,
+      validado uma vez por domínio e guardado num cache LRU;
+    - os demais passam pelo validador completo do EmailStr.
+    As mensagens são sempre as do próprio EmailStr.
+    """
+    codigos, unicos = pd.factorize(valores)
+    unicos = pd.Series(unicos, dtype=valores.dtype)
+    arroba = unicos.str.find('@').to_numpy()
+    simples = (unicos.str.fullmatch(_EMAIL_SIMPLES).to_numpy(dtype=bool)
+               & (arroba <= MAX_PARTE_LOCAL) & (unicos.str.len().to_numpy() <= MAX_EMAIL))
+
+    erros = np.full(len(unicos), None, dtype=object)
+    if simples.any():
+        dominios_codigos, dominios = pd.factorize(unicos[simples].str.partition('@')[2])
+        erros_dominios = np.empty(len(dominios), dtype=object)
+        erros_dominios[:] = [_erro_dominio(d) for d in dominios]
+        erros[simples] = erros_dominios[dominios_codigos]
+    for i in np.flatnonzero(~simples).tolist():
+        erros[i] = _erro_email(unicos.iat[i])
+
+    modelos: List[ModeloErro] = []
+    indice_modelo: Dict[Tuple[str, str], int] = {}
+    codigo_unico = np.full(len(unicos), -1, dtype=np.int64)
+    for i, erro in enumerate(erros.tolist()):
+        if erro is None:
+            continue
+        chave = (erro[0], erro[1])
+        if chave not in indice_modelo:
+            indice_modelo[chave] = len(modelos)
+            modelos.append(erro)
+        codigo_unico[i] = indice_modelo[chave]
+
+    codigo_linha = codigo_unico[codigos]
+    return codigo_linha >= 0, codigo_linha, modelos
+
+
+# Equivalentes vetorizados dos field_validators, indexados pelo nome do validador.
+# Um modelo com validador sem equivalente aqui é validado linha a linha pelo Pydantic.
+VALIDADORES_VETORIZADOS: Dict[Tuple[type, str], Callable] = {
+    (Cliente, 'validate_cpf'): _validar_cpf,
+    (Cliente, 'validate_data_nascimento'): _validar_data_nascimento,
+    (Endereco, 'validate_cep'): _validar_cep,
+    (Endereco, 'validate_tipo_endereco'): _validar_tipo_endereco,
+}
+# Nome de cada regra nas métricas de instrumentação
+_NOMES_REGRAS = {regra: f'{modelo.__name__}.{nome}' for (modelo, nome), regra in VALIDADORES_VETORIZADOS.items()}
+
+
+# --- Normalização vetorizada: o valor que o field_validator devolve, só para valores válidos ---
+
+def _normalizar_por_valor(valores: pd.Series, normalizar: Callable) -> np.ndarray:
+    """
+    Roda o normalizador uma vez por valor distinto e propaga para as linhas
+    """
+    codigos, unicos = pd.factorize(valores)
+    return np.array([normalizar(valor) for valor in unicos], dtype=object)[codigos]
+
+
+def _normalizar_com_caminho_rapido(valores: pd.Series, usual: np.ndarray, normalizar_usual: Callable,
+                                   validador: Callable) -> pd.Series:
+    """
+    Normaliza em bloco os valores no formato usual; os demais passam pelo validador do modelo,
+    que devolve o valor normalizado, uma vez por valor distinto
+    """
+    if usual.all():
+        return normalizar_usual(valores)
+    resultado = valores.copy()
+    if usual.any():
+        resultado[usual] = normalizar_usual(valores[usual])
+    resultado[~usual] = _normalizar_por_valor(valores[~usual], validador)
+    return resultado
+
+
+def _sem_pontuacao(valores: pd.Series) -> pd.Series:
+    return valores.str.replace('.', '', regex=False).str.replace('-', '', regex=False)
+
+
+def _normalizar_cpf(valores: pd.Series) -> pd.Series:
+    usual = valores.str.fullmatch(r'[0-9]{3}\.?[0-9]{3}\.?[0-9]{3}-?[0-9]{2}').to_numpy(dtype=bool)
+    return _normalizar_com_caminho_rapido(valores, usual, _sem_pontuacao, Cliente.validate_cpf)
+
+
+def _normalizar_cep(valores: pd.Series) -> pd.Series:
+    usual = valores.str.fullmatch(r'[0-9]{5}-?[0-9]{3}').to_numpy(dtype=bool)
+    return _normalizar_com_caminho_rapido(valores, usual, _sem_pontuacao, Endereco.validate_cep)
+
+
+def _normalizar_tipo_endereco(valores: pd.Series) -> pd.Series:
+    # Mesmo str.upper usado por _validar_tipo_endereco para aceitar o valor
+    return valores.str.upper()
+
+
+def _normalizar_data_nascimento(valores: pd.Series) -> pd.Series:
+    return valores
+
+
+@lru_cache(maxsize=TAMANHO_CACHE_DOMINIOS)
+def _dominio_normalizado(dominio: str) -> str:
+    return _EMAIL_ADAPTER.validate_python('a@' + dominio).partition('@')[2]
+
+
+def _normalizar_email(valores: pd.Series) -> pd.Series:
+    """
+    Emails com parte local simples mantêm a parte local e recebem o domínio normalizado pelo
+    EmailStr, calculado uma vez por domínio; os demais passam pelo EmailStr inteiro
+    """
+    arroba = valores.str.find('@').to_numpy()
+    simples = (valores.str.fullmatch(_EMAIL_SIMPLES).to_numpy(dtype=bool)
+               & (arroba <= MAX_PARTE_LOCAL) & (valores.str.len().to_numpy() <= MAX_EMAIL))
+
+    def normalizar_simples(emails: pd.Series) -> pd.Series:
+        codigos, dominios = pd.factorize(emails.str.replace(r'^[^@]*@', '', regex=True))
+        normalizados = np.array([_dominio_normalizado(dominio) for dominio in dominios], dtype=object)
+        # Quase sempre o domínio já está normalizado: só as linhas com domínio alterado são remontadas
+        alterados = (normalizados != np.asarray(dominios, dtype=object))[codigos]
+        if not alterados.any():
+            return emails
+        resultado = emails.copy()
+        resultado[alterados] = (emails[alterados].str.replace(r'@.*$', '@', regex=True)
+                                + pd.Series(normalizados[codigos[alterados]], index=emails.index[alterados],
+                                            dtype=emails.dtype))
+        return resultado
+
+    return _normalizar_com_caminho_rapido(valores, simples, normalizar_simples, _EMAIL_ADAPTER.validate_python)
+
+
+NORMALIZADORES_VETORIZADOS: Dict[Tuple[type, str], Callable] = {
+    (Cliente, 'validate_cpf'): _normalizar_cpf,
+    (Cliente, 'validate_data_nascimento'): _normalizar_data_nascimento,
+    (Endereco, 'validate_cep'): _normalizar_cep,
+    (Endereco, 'validate_tipo_endereco'): _normalizar_tipo_endereco,
+}
+
+
+def _validadores_do_campo(model_class, campo: str) -> Optional[List[Callable]]:
+    """
+    Retorna as regras vetorizadas dos field_validators do campo,
+    ou None se algum deles não tiver equivalente vetorizado
+    """
+    regras = []
+    for nome, decorator in model_class.__pydantic_decorators__.field_validators.items():
+        if campo in decorator.info.fields:
+            regra = VALIDADORES_VETORIZADOS.get((model_class, nome))
+            if regra is None or decorator.info.mode != 'after':
+                return None
+            regras.append(regra)
+    return regras
+
+
+def _analisar_campo(field_info):
+    """
+    Retorna (anulável, é_email) para campos str/EmailStr, ou None para tipos não suportados
+    """
+    anotacao = field_info.annotation
+    argumentos = get_args(anotacao)
+    anulavel = NoneType in argumentos
+    tipos = [a for a in argumentos if a is not NoneType] if argumentos else [anotacao]
+    if tipos == [str]:
+        return anulavel, False
+    if tipos == [EmailStr]:
+        return anulavel, True
+    return None
+
+
+def suporta_validacao_vetorizada(model_class) -> bool:
+    """
+    Indica se todas as regras do modelo têm equivalente vetorizado
+    """
+    for campo, field_info in model_class.model_fields.items():
+        if _analisar_campo(field_info) is None or _validadores_do_campo(model_class, campo) is None:
+            return False
+    return True
+
+
+def _mascaras_de_tipo(serie: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Retorna as máscaras (é str, é None) da coluna, sem converter valores válidos
+    """
+    if isinstance(serie.dtype, pd.StringDtype):
+        return serie.notna().to_numpy(dtype=bool), np.zeros(len(serie), dtype=bool)
+    if serie.dtype != object:
+        return np.zeros(len(serie), dtype=bool), np.zeros(len(serie), dtype=bool)
+    valores = serie.to_numpy()
+    e_str = np.fromiter(map(isinstance, valores, repeat(str)), dtype=bool, count=len(valores))
+    e_none = np.fromiter(map(operator.is_, valores, repeat(None)), dtype=bool, count=len(valores))
+    return e_str, e_none
+
+
+def _restricoes_de_tamanho(field_info) -> Tuple[Optional[int], Optional[int]]:
+    minimo = maximo = None
+    for restricao in field_info.metadata:
+        if isinstance(restricao, MinLen):
+            minimo = restricao.min_length
+        elif isinstance(restricao, MaxLen):
+            maximo = restricao.max_length
+    return minimo, maximo
+
+
+def _plural(n: int) -> str:
+    return 'character' if n == 1 else 'characters'
+
+
+def _erros_das_strings(valores: pd.Series, field_info, regras: List[Callable]) -> Tuple[np.ndarray, List[ModeloErro]]:
+    """
+    Aplica as restrições de tamanho, o EmailStr e os validadores a valores que já são strings.
+    Retorna (código do erro por valor, -1 quando válido; modelos de erro).
+    """
+    _, e_email = _analisar_campo(field_info)
+    modelos: List[ModeloErro] = []
+    codigo = np.full(len(valores), -1, dtype=np.int64)
+    if len(valores) == 0:
+        # Ex.: coluna numérica inferida pelo read_csv, em que nenhum valor é string
+        return codigo, modelos
+
+    # Cada regra só se aplica aos valores que passaram nas anteriores
+    def pendentes():
+        return np.flatnonzero(codigo < 0)
+
+    def aplicar(posicoes, invalidos, codigos_regra, modelos_regra):
+        deslocamento = len(modelos)
+        modelos.extend(modelos_regra)
+        codigo[posicoes[invalidos]] = codigos_regra[invalidos] + deslocamento
+
+    def tamanhos(valores):
+        return valores.str.len().to_numpy(dtype=np.int64)
+
+    minimo, maximo = _restricoes_de_tamanho(field_info)
+    if minimo is not None:
+        posicoes = pendentes()
+        aplicar(posicoes, timed_call('min_length', tamanhos, valores.iloc[posicoes]) < minimo, np.zeros(len(posicoes), dtype=np.int64),
+                [('string_too_short', f'String should have at least {minimo} {_plural(minimo)}',
+                  {'min_length': minimo})])
+    if maximo is not None:
+        posicoes = pendentes()
+        aplicar(posicoes, timed_call('max_length', tamanhos, valores.iloc[posicoes]) > maximo, np.zeros(len(posicoes), dtype=np.int64),
+                [('string_too_long', f'String should have at most {maximo} {_plural(maximo)}',
+                  {'max_length': maximo})])
+
+    if e_email:
+        posicoes = pendentes()
+        aplicar(posicoes, *timed_call('EmailStr', _validar_email, valores.iloc[posicoes]))
+
+    for regra in regras:
+        posicoes = pendentes()
+        aplicar(posicoes, *timed_call(_NOMES_REGRAS.get(regra, regra.__name__), regra, valores.iloc[posicoes]))
+
+    return codigo, modelos
+
+
+class _MemoCampo:
+    """
+    Memo LRU de um campo: valor distinto -> (erro ou None, valor normalizado)
+    """
+
+    def __init__(self, max_valores: int):
+        self.max_valores = max_valores
+        self._valores: OrderedDict = OrderedDict()
+
+    def resolver(self, valores: pd.Series, validar: Callable, normalizar: Optional[Callable]):
+        """
+        Valida só os valores distintos ainda fora do memo e propaga os resultados
+        (erro e valor normalizado) para as linhas pelos códigos da fatoração
+        """
+        codigos, unicos = pd.factorize(valores)
+        unicos = list(unicos)
+        resultados = [None] * len(unicos)
+        faltando = []
+        for i, valor in enumerate(unicos):
+            resultado = self._valores.get(valor)
+            if resultado is None:
+                faltando.append(i)
+            else:
+                self._valores.move_to_end(valor)
+                resultados[i] = resultado
+
+        if faltando:
+            codigos_novos, modelos_novos = validar(pd.Series([unicos[i] for i in faltando], dtype=object))
+            for i, codigo in zip(faltando, codigos_novos.tolist()):
+                if codigo >= 0:
+                    resultados[i] = (modelos_novos[codigo], unicos[i])
+                else:
+                    resultados[i] = (None, normalizar(unicos[i]) if normalizar else unicos[i])
+                self._valores[unicos[i]] = resultados[i]
+            while len(self._valores) > self.max_valores:
+                self._valores.popitem(last=False)
+
+        modelos: List[ModeloErro] = []
+        indice_modelo: Dict[Tuple[str, str], int] = {}
+        codigo_unico = np.full(len(unicos), -1, dtype=np.int64)
+        normalizado_unico = np.empty(len(unicos), dtype=object)
+        for i, (erro, normalizado) in enumerate(resultados):
+            normalizado_unico[i] = normalizado
+            if erro is not None:
+                chave = (erro[0], erro[1])
+                if chave not in indice_modelo:
+                    indice_modelo[chave] = len(modelos)
+                    modelos.append(erro)
+                codigo_unico[i] = indice_modelo[chave]
+
+        return codigo_unico[codigos], modelos, normalizado_unico[codigos]
+
+
+class ValidationMemo:
+    """
+    Memo dos resultados de validação por valor distinto, compartilhado entre os blocos
+    de uma execução. Só é usado nas colunas de baixa cardinalidade (valores distintos
+    até `razao_maxima` das linhas) e guarda no máximo `max_valores` valores por campo.
+    """
+
+    def __init__(self, max_valores: int = 100_000, razao_maxima: float = 0.5):
+        self.max_valores = max_valores
+        self.razao_maxima = razao_maxima
+        self._campos: Dict[Tuple[str, str], _MemoCampo] = {}
+
+    def campo(self, model_class, campo: str) -> _MemoCampo:
+        chave = (model_class.__name__, campo)
+        if chave not in self._campos:
+            self._campos[chave] = _MemoCampo(self.max_valores)
+        return self._campos[chave]
+
+    def usar_para(self, valores: pd.Series) -> bool:
+        """
+        Indica se a coluna repete valores o bastante para compensar a fatoração
+        """
+        if len(valores) == 0:
+            return False
+        return valores.nunique() <= self.razao_maxima * len(valores)
+
+
+def _normalizador_do_campo(model_class, campo: str) -> Optional[Callable]:
+    """
+    Função que aplica ao valor válido a mesma normalização do modelo: o EmailStr
+    (domínio em minúsculas) e os field_validators do campo, na ordem do modelo
+    (ex.: CPF só com dígitos, tipo_endereco em maiúsculas).
+    Retorna None quando o campo não altera o valor.
+    """
+    etapas = []
+    analise = _analisar_campo(model_class.model_fields[campo])
+    if analise is not None and analise[1]:
+        etapas.append(_EMAIL_ADAPTER.validate_python)
+    etapas.extend(getattr(model_class, nome)
+                  for nome, decorator in model_class.__pydantic_decorators__.field_validators.items()
+                  if campo in decorator.info.fields)
+    if not etapas:
+        return None
+
+    def normalizar(valor):
+        for etapa in etapas:
+            valor = etapa(valor)
+        return valor
+
+    return normalizar
+
+
+def _normalizador_vetorizado_do_campo(model_class, campo: str) -> Optional[Callable]:
+    """
+    Versão vetorizada de _normalizador_do_campo: recebe a série de valores válidos do campo
+    e devolve a série normalizada. Se algum field_validator do campo não tiver normalizador
+    vetorizado, o campo inteiro usa o normalizador do modelo, uma vez por valor distinto.
+    Retorna None quando o campo não altera o valor.
+    """
+    etapas = []
+    analise = _analisar_campo(model_class.model_fields[campo])
+    if analise is not None and analise[1]:
+        etapas.append(_normalizar_email)
+    for nome, decorator in model_class.__pydantic_decorators__.field_validators.items():
+        if campo in decorator.info.fields:
+            etapa = NORMALIZADORES_VETORIZADOS.get((model_class, nome))
+            if etapa is None:
+                por_valor = _normalizador_do_campo(model_class, campo)
+                return lambda valores: pd.Series(_normalizar_por_valor(valores, por_valor), index=valores.index)
+            etapas.append(etapa)
+    if not etapas:
+        return None
+
+    def normalizar(valores: pd.Series) -> pd.Series:
+        for etapa in etapas:
+            valores = timed_call(f'{etapa.__name__} (normalização)', etapa, valores)
+        return valores
+
+    return normalizar
+
+
+def normalize_dataframe(df: pd.DataFrame, model_class,
+                        normalizados: Optional[Dict[str, np.ndarray]] = None) -> pd.DataFrame:
+    """
+    Valores normalizados das linhas de `df`, que devem ser válidas.
+    As colunas já normalizadas pelo memo (`normalizados`, alinhado a `df`) são reaproveitadas;
+    nas demais, o normalizador roda uma vez por valor distinto.
+    """
+    normalizados = normalizados or {}
+    resultado = df.copy(deep=False)
+    for campo in model_class.model_fields:
+        if campo not in df.columns:
+            continue
+        if campo in normalizados:
+            resultado[campo] = pd.array(normalizados[campo], dtype=df[campo].dtype)
+            continue
+        normalizar = _normalizador_do_campo(model_class, campo)
+        if normalizar is None or len(df) == 0:
+            continue
+        codigos, unicos = pd.factorize(df[campo])
+        unicos_normalizados = np.array([normalizar(valor) for valor in unicos], dtype=object)
+        valores = np.where(codigos >= 0, unicos_normalizados[np.maximum(codigos, 0)], None)
+        resultado[campo] = pd.array(valores, dtype=df[campo].dtype)
+    return resultado
+
+
+def _erros_do_campo(serie: pd.Series, field_info, regras: List[Callable],
+                    memo_campo: Optional[_MemoCampo] = None, normalizar: Optional[Callable] = None,
+                    normalizar_coluna: Optional[Callable] = None):
+    """
+    Aplica as regras do campo à coluna inteira.
+    Com `memo_campo`, as regras rodam só nos valores distintos ainda não vistos.
+    Com `normalizar_coluna` (e sem memo), os valores válidos são normalizados em bloco logo em seguida.
+    Retorna (posições, códigos, modelos de erro, valores normalizados ou None),
+    no máximo um erro por linha, como no Pydantic.
+    """
+    anulavel, _ = _analisar_campo(field_info)
+    e_str, e_none = timed_call('string_type', _mascaras_de_tipo, serie)
+
+    modelos: List[ModeloErro] = [('string_type', MSG_STRING_TYPE, None)]
+    codigo = np.full(len(serie), -1, dtype=np.int64)
+    codigo[~e_str & ~(e_none & anulavel)] = 0
+
+    posicoes_str = np.flatnonzero(e_str)
+    valores = serie.iloc[posicoes_str]
+    normalizados = None
+    if memo_campo is not None:
+        codigos_str, modelos_str, normalizados_str = memo_campo.resolver(
+            valores, lambda unicos: _erros_das_strings(unicos, field_info, regras), normalizar)
+        normalizados = serie.to_numpy(dtype=object, copy=True)
+        normalizados[posicoes_str] = normalizados_str
+    else:
+        codigos_str, modelos_str = _erros_das_strings(valores, field_info, regras)
+
+    codigo[posicoes_str] = np.where(codigos_str >= 0, codigos_str + len(modelos), -1)
+    modelos.extend(modelos_str)
+
+    if normalizar_coluna is not None and normalizados is None:
+        # Só as strings válidas passam pelo normalizador; as demais células ficam como estão
+        validas = posicoes_str[codigos_str < 0]
+        if len(validas) == len(serie):
+            normalizados = normalizar_coluna(serie).array
+        else:
+            coluna = serie.copy()
+            if len(validas):
+                coluna.iloc[validas] = normalizar_coluna(serie.iloc[validas]).array
+            normalizados = coluna.array
+
+    posicoes = np.flatnonzero(codigo >= 0)
+    return posicoes, codigo[posicoes], modelos, normalizados
+
+
+def validate_dataframe_columnar(df: pd.DataFrame, model_class, memo: Optional[ValidationMemo] = None,
+                                normalizados: Optional[Dict[str, np.ndarray]] = None):
+    """
+    Valida o dataframe coluna a coluna.
+    Com `memo`, as colunas de baixa cardinalidade são validadas uma vez por valor distinto.
+    Com `normalizados`, cada coluna que o modelo normaliza recebe ali, na mesma passada,
+    os valores normalizados alinhados a `df` (células com erro mantêm o valor original):
+    do memo nas colunas de baixa cardinalidade, dos normalizadores vetorizados nas demais.
+    Retorna (posições, índices dos campos, códigos de erro, modelos de erro, campos),
+    com os arrays paralelos ordenados por linha e campo.
+    """
+    with stage('validacao', len(df)):
+        campos = list(model_class.model_fields)
+        todos_modelos: List[ModeloErro] = []
+        todas_posicoes, todos_campos, todos_codigos = [], [], []
+
+        for i, campo in enumerate(campos):
+            if campo not in df.columns:
+                continue  # Campo opcional ausente assume o valor padrão (None)
+            field_info = model_class.model_fields[campo]
+            memo_campo = None
+            # O email tem cache próprio por domínio e quase não repete valores
+            if memo is not None and not _analisar_campo(field_info)[1] and memo.usar_para(df[campo]):
+                memo_campo = memo.campo(model_class, campo)
+            normalizar_coluna = None
+            if normalizados is not None:
+                normalizar_coluna = _normalizador_vetorizado_do_campo(model_class, campo)
+            posicoes, codigos, modelos, normalizados_campo = _erros_do_campo(
+                df[campo], field_info, _validadores_do_campo(model_class, campo),
+                memo_campo, _normalizador_do_campo(model_class, campo), normalizar_coluna)
+            if normalizados is not None and normalizados_campo is not None:
+                normalizados[campo] = normalizados_campo
+            todas_posicoes.append(posicoes)
+            todos_campos.append(np.full(len(posicoes), i, dtype=np.int64))
+            todos_codigos.append(codigos + len(todos_modelos))
+            todos_modelos.extend(modelos)
+
+        if not todas_posicoes:
+            vazio = np.empty(0, dtype=np.int64)
+            return vazio, vazio, vazio, todos_modelos, campos
+
+        posicoes = np.concatenate(todas_posicoes)
+        indices_campos = np.concatenate(todos_campos)
+        codigos = np.concatenate(todos_codigos)
+        ordem = np.lexsort((indices_campos, posicoes))
+        return posicoes[ordem], indices_campos[ordem], codigos[ordem], todos_modelos, campos
+
+
+def validate_and_normalize(df: pd.DataFrame, model_class, memo: Optional[ValidationMemo] = None):
+    """
+    Valida e normaliza numa única passada pelas colunas, sem instanciar o modelo por linha
+    (só para modelos com suporta_validacao_vetorizada).
+    Retorna o resultado de validate_dataframe_columnar e o dataframe alinhado a `df` com os
+    valores que o modelo devolveria: CPF e CEP só com dígitos, tipo_endereco em maiúsculas,
+    email com o domínio normalizado. Células com erro mantêm o valor original.
+    """
+    normalizados: Dict[str, np.ndarray] = {}
+    resultado = validate_dataframe_columnar(df, model_class, memo, normalizados)
+    return resultado, normalize_dataframe(df, model_class, normalizados)
+
+
+def error_inputs(df: pd.DataFrame, posicoes: np.ndarray, indices_campos: np.ndarray, campos: List[str]) -> np.ndarray:
+    """
+    Busca os valores de entrada dos erros, de uma vez por campo e só nas posições com erro
+    """
+    entradas = np.empty(len(posicoes), dtype=object)
+    for i in np.unique(indices_campos).tolist():
+        selecao = indices_campos == i
+        entradas[selecao] = df[campos[i]].iloc[posicoes[selecao]].to_numpy(dtype=object)
+    return entradas
+
+
+def build_error_dicts(linhas: np.ndarray, indices_campos: np.ndarray, codigos: np.ndarray,
+                      modelos: List[ModeloErro], campos: List[str], entradas: np.ndarray) -> List[Dict]:
+    """
+    Monta o formato [{'linha', 'erros'}] a partir dos arrays paralelos de erros,
+    já ordenados por linha (numerada a partir de 1)
+    """
+    erros = []
+    for i, codigo, entrada in zip(indices_campos.tolist(), codigos.tolist(), entradas.tolist()):
+        tipo, msg, ctx = modelos[codigo]
+        erro = {'type': tipo, 'loc': (campos[i],), 'msg': msg, 'input': entrada}
+        if ctx is not None:
+            erro['ctx'] = ctx
+        erros.append(erro)
+
+    errors = []
+    numeros, inicios = np.unique(linhas, return_index=True)
+    fins = np.append(inicios[1:], len(linhas))
+    for linha, inicio, fim in zip(numeros.tolist(), inicios.tolist(), fins.tolist()):
+        errors.append({'linha': linha, 'erros': erros[inicio:fim]})
+
+    return errors
+
+
+def expand_errors(df: pd.DataFrame, posicoes: np.ndarray, indices_campos: np.ndarray,
+                  codigos: np.ndarray, modelos: List[ModeloErro], campos: List[str]) -> List[Dict]:
+    """
+    Converte os arrays paralelos de erros (ordenados por linha) no formato
+    [{'linha', 'erros'}] usado pela interface e por print_validation_errors
+    """
+    if len(posicoes) == 0:
+        return []
+
+    with stage('coleta_erros', len(posicoes)):
+        entradas = error_inputs(df, posicoes, indices_campos, campos)
+        # Índice começa em 0, mas mostramos começando em 1
+        linhas = df.index.to_numpy()[posicoes].astype(np.int64) + 1
+        return build_error_dicts(linhas, indices_campos, codigos, modelos, campos, entradas)
+
+
+def validate_dataframe(df: pd.DataFrame, model_class) -> List[Dict]:
+    """
+    Valida o dataframe usando as regras do modelo Pydantic especificado.
+    As regras são aplicadas coluna a coluna; só as linhas com erro viram dicionários.
+    Retorna uma lista de dicionários com os erros encontrados.
+    """
+    column_errors = validate_columns(df, model_class)
+    if column_errors:
+        return [{'linha': 0, 'erros': [{'loc': ('colunas',), 'msg': error}]} for error in column_errors]
+
+    if not suporta_validacao_vetorizada(model_class):
+        return validate_dataframe_pydantic(df, model_class)
+
+    return expand_errors(df, *validate_dataframe_columnar(df, model_class))
+
+
+def comparar_com_pydantic(df: pd.DataFrame, model_class) -> List[Tuple]:
+    """
+    Compara (linha, loc, msg) do motor vetorizado com a validação linha a linha.
+    Retorna as diferenças encontradas (lista vazia quando há paridade).
+    """
+    def chaves(errors):
+        return {(e['linha'], err['loc'], err['msg']) for e in errors for err in e['erros']}
+
+    vetorizado = chaves(validate_dataframe(df, model_class))
+    referencia = chaves(validate_dataframe_pydantic(df, model_class))
+    return sorted(vetorizado ^ referencia, key=str)
+
+
+if __name__ == "__main__":
+    # Conferência de paridade com os arquivos de exemplo
+    for caminho, modelo in [('input/clientes_com_erros.csv', Cliente), ('input/enderecos_com_erros.csv', Endereco)]:
+        diferencas = comparar_com_pydantic(pd.read_csv(caminho), modelo)
+        print(f"{caminho}: {'paridade OK' if not diferencas else diferencas}")
@@ -0,0 +1,295 @@
+import pandas as pd
+import numpy as np
+import argparse
+import io
+import os
+import time
+from statistics import NormalDist
+from typing import Dict, Iterator, Optional, Tuple
+from validacao import (MODELOS, ValidationMemo, validate_columns, validate_dataframe_columnar,
+                      suporta_validacao_vetorizada, validate_dataframe_pydantic)
+from validacao_streaming import CHUNKSIZE_PADRAO, validate_csv_streaming
+from leitura import read_header
+from instrumentacao import stage
+
+CONFIANCA_PADRAO = 0.95
+TAMANHO_BLOCO_PADRAO = 8 * 1024  # bytes por bloco sorteado (~50 linhas de clientes)
+BLOCOS_POR_RODADA = 16
+ESTRATOS_PADRAO = 32
+AMOSTRA_MINIMA = 200  # linhas antes da primeira decisão
+LINHAS_POR_RODADA = 1000  # no modo em memória
+
+
+def wilson_interval(erros: int, total: int, z: float) -> Tuple[float, float]:
+    """
+    Intervalo de Wilson para a proporção erros/total (bom mesmo com taxas perto de 0)
+    """
+    if total == 0:
+        return 0.0, 1.0
+    p = erros / total
+    denominador = 1 + z * z / total
+    centro = (p + z * z / (2 * total)) / denominador
+    margem = z * np.sqrt(p * (1 - p) / total + z * z / (4 * total * total)) / denominador
+    return float(max(0.0, centro - margem)), float(min(1.0, centro + margem))
+
+
+def cluster_interval(erros: np.ndarray, linhas: np.ndarray, z: float) -> Tuple[float, float]:
+    """
+    Intervalo para a taxa total sum(erros)/sum(linhas) de uma amostra de grupos (blocos do arquivo).
+    Linhas vizinhas se parecem mais entre si, então a variância vem do estimador de razão entre
+    os grupos e vira um tamanho de amostra efetivo para o intervalo de Wilson.
+    Com um grupo por linha, é o intervalo de Wilson comum com n - 1 linhas (a correção da variância amostral).
+    """
+    total, grupos = int(linhas.sum()), len(linhas)
+    if total == 0:
+        return 0.0, 1.0
+    taxa = erros.sum() / total
+    if grupos < 2:
+        return wilson_interval(int(erros.sum()), total, z)
+    variancia = grupos / (grupos - 1) * np.sum((erros - taxa * linhas) ** 2) / total ** 2
+    if 0 < taxa < 1 and variancia > 0:
+        efetivo = min(total, taxa * (1 - taxa) / variancia)
+    else:
+        # Sem variação entre os grupos não há como medir a correlação: cada grupo conta como uma linha
+        efetivo = grupos
+    return wilson_interval(int(round(taxa * efetivo)), max(1, int(round(efetivo))), z)
+
+
+def _z_da_rodada(confianca: float, rodada: int) -> float:
+    """
+    Quantil normal da rodada `rodada` (a partir de 1). O nível de erro de cada olhada é
+    (1 - confianca) * 6 / (pi² * rodada²), que somado sobre todas as rodadas não passa de
+    1 - confianca: parar na primeira rodada decisiva mantém a confiança nominal.
+    """
+    alfa = (1 - confianca) * 6 / (np.pi ** 2 * rodada ** 2)
+    return NormalDist().inv_cdf(1 - alfa / 2)
+
+
+def stratified_order(n: int, estratos: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    Permutação de range(n) em que qualquer prefixo é uma amostra estratificada por posição:
+    os itens são divididos em `estratos` faixas contíguas, embaralhados dentro de cada faixa
+    e intercalados proporcionalmente ao tamanho das faixas
+    """
+    estratos = max(1, min(estratos, n))
+    faixa = np.arange(n) * estratos // n
+    tamanhos = np.bincount(faixa, minlength=estratos)
+    inicio_faixa = np.concatenate([[0], np.cumsum(tamanhos)[:-1]])
+    posto = np.empty(n, dtype=np.float64)
+    for f in range(estratos):
+        posto[inicio_faixa[f]:inicio_faixa[f] + tamanhos[f]] = (rng.permutation(tamanhos[f]) + rng.random(tamanhos[f])) / tamanhos[f]
+    return np.argsort(posto, kind='stable')
+
+
+def _erros_da_amostra(df: pd.DataFrame, grupos: np.ndarray, model_class,
+                      memo: ValidationMemo) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Por grupo da amostra (`grupos` numera os grupos de cada linha a partir de 0):
+    linhas, linhas com erro e, por campo, linhas com erro naquele campo (grupos x campos)
+    """
+    campos = list(model_class.model_fields)
+    if suporta_validacao_vetorizada(model_class):
+        posicoes, indices_campos, _, _, campos = validate_dataframe_columnar(df, model_class, memo)
+    else:
+        errors = validate_dataframe_pydantic(df, model_class)
+        pares = [(error['linha'] - 1, campos.index(err['loc'][0])) for error in errors for err in error['erros']
+                 if err['loc'] and err['loc'][0] in campos]
+        posicoes = df.index.get_indexer([rotulo for rotulo, _ in pares]).astype(np.int64)
+        indices_campos = np.array([i for _, i in pares], dtype=np.int64)
+    n_grupos = int(grupos.max()) + 1 if len(grupos) else 0
+    pares_unicos = np.unique(posicoes * len(campos) + indices_campos)
+    por_campo = np.bincount(grupos[pares_unicos // len(campos)] * len(campos) + pares_unicos % len(campos),
+                            minlength=n_grupos * len(campos)).reshape(n_grupos, len(campos))
+    linhas_com_erro = np.bincount(grupos[np.unique(posicoes)], minlength=n_grupos)
+    return np.bincount(grupos, minlength=n_grupos), linhas_com_erro, por_campo
+
+
+def sequential_gate(amostras: Iterator[Tuple[pd.DataFrame, np.ndarray]], model_class, limite: float,
+                    confianca: float = CONFIANCA_PADRAO, amostra_minima: int = AMOSTRA_MINIMA,
+                    grupos_minimos: int = 1, amostra_maxima: Optional[int] = None) -> Dict:
+    """
+    Valida as amostras (dataframe, grupo de cada linha) em rodadas e decide se a taxa de linhas
+    com erro está acima de `limite`. Depois de cada rodada com pelo menos `amostra_minima` linhas
+    e `grupos_minimos` grupos: 'rejeitar' se o limite inferior do intervalo passa do limite,
+    'aprovar' se o superior fica abaixo; senão, segue para a próxima. Se as amostras acabam
+    (todas as linhas foram validadas), a taxa é exata e decide sozinha. Com `amostra_maxima`
+    atingida sem decisão, o resultado é 'inconclusivo'.
+    """
+    memo = ValidationMemo()
+    campos = list(model_class.model_fields)
+    linhas, com_erro, por_campo = [], [], []
+    total, rodada = 0, 0
+    decisao, exata, z = 'inconclusivo', True, 0.0
+
+    for amostra, grupos in amostras:
+        with stage('amostragem', len(amostra)):
+            linhas_grupo, erros_grupo, campos_grupo = _erros_da_amostra(amostra, grupos, model_class, memo)
+        linhas.append(linhas_grupo)
+        com_erro.append(erros_grupo)
+        por_campo.append(campos_grupo)
+        total += len(amostra)
+        if total < amostra_minima or sum(map(len, linhas)) < grupos_minimos:
+            continue
+        rodada += 1
+        z = _z_da_rodada(confianca, rodada)
+        inferior, superior = cluster_interval(np.concatenate(com_erro), np.concatenate(linhas), z)
+        if inferior > limite:
+            decisao, exata = 'rejeitar', False
+            break
+        if superior <= limite:
+            decisao, exata = 'aprovar', False
+            break
+        if amostra_maxima is not None and total >= amostra_maxima:
+            exata = False
+            break
+    else:
+        # Amostras esgotadas: todas as linhas foram validadas
+        if total:
+            decisao = 'rejeitar' if sum(map(np.sum, com_erro)) / total > limite else 'aprovar'
+
+    linhas = np.concatenate(linhas) if linhas else np.empty(0, dtype=np.int64)
+    com_erro = np.concatenate(com_erro) if com_erro else np.empty(0, dtype=np.int64)
+    por_campo = np.vstack(por_campo) if por_campo else np.empty((0, len(campos)), dtype=np.int64)
+
+    def resumo(erros: np.ndarray) -> Dict:
+        taxa = float(erros.sum() / total) if total else 0.0
+        return {'linhas_com_erro': int(erros.sum()), 'taxa_erro': taxa,
+                'intervalo': (taxa, taxa) if exata else cluster_interval(erros, linhas, z)}
+
+    return {
+        'decisao': decisao,
+        'exata': exata,
+        'limite': limite,
+        'confianca': confianca,
+        'rodadas': rodada,
+        'amostra': total,
+        'grupos': len(linhas),
+        **resumo(com_erro),
+        'campos': {campo: resumo(por_campo[:, i]) for i, campo in enumerate(campos) if por_campo[:, i].any()},
+    }
+
+
+def gate_dataframe(df: pd.DataFrame, model_class, limite: float, confianca: float = CONFIANCA_PADRAO,
+                   estratos: int = ESTRATOS_PADRAO, semente: Optional[int] = None, **kwargs) -> Dict:
+    """
+    Portão de qualidade sobre um dataframe já em memória: valida linhas sorteadas
+    (estratificadas por posição) em vez do dataframe inteiro
+    """
+    column_errors = validate_columns(df, model_class)
+    if column_errors:
+        return {'decisao': 'rejeitar', 'erros_colunas': column_errors}
+    ordem = stratified_order(len(df), estratos, np.random.default_rng(semente))
+    # Linhas sorteadas individualmente: cada uma é o seu próprio grupo
+    amostras = ((df.iloc[np.sort(ordem[inicio:inicio + LINHAS_POR_RODADA])],
+                 np.arange(min(LINHAS_POR_RODADA, len(df) - inicio)))
+                for inicio in range(0, len(df), LINHAS_POR_RODADA))
+    return sequential_gate(amostras, model_class, limite, confianca, **kwargs)
+
+
+def _ler_bloco(arquivo, inicio: int, fim: int, tamanho: int) -> bytes:
+    """
+    Linhas que começam em [inicio, fim): cada linha do arquivo pertence a exatamente um bloco,
+    então sortear blocos sem reposição é sortear linhas sem reposição, em grupos
+    """
+    arquivo.seek(inicio - 1)
+    dados = arquivo.read(fim - inicio + 1)
+    primeira = dados.find(b'\n')  # dados[0] é o byte anterior ao bloco
+    if primeira < 0 or primeira == len(dados) - 1:
+        return b''
+    if not dados.endswith(b'\n') and arquivo.tell() < tamanho:
+        dados += arquivo.readline()  # Completa a última linha iniciada no bloco
+    return dados[primeira + 1:]
+
+
+def _amostras_do_csv(caminho: str, model_class, tamanho_bloco: int, estratos: int,
+                     rng: np.random.Generator, progresso: Dict) -> Iterator[Tuple[pd.DataFrame, np.ndarray]]:
+    colunas = read_header(caminho)
+    do_modelo = [coluna for coluna in colunas if coluna in model_class.model_fields]
+    tamanho = os.path.getsize(caminho)
+    with open(caminho, 'rb') as arquivo:
+        inicio_dados = len(arquivo.readline())
+        n_blocos = max(1, -(-(tamanho - inicio_dados) // tamanho_bloco))
+        progresso['blocos_total'] = n_blocos
+        ordem = stratified_order(n_blocos, estratos, rng)
+        for rodada in range(0, n_blocos, BLOCOS_POR_RODADA):
+            blocos = [_ler_bloco(arquivo, inicio_dados + b * tamanho_bloco,
+                                 min(inicio_dados + (b + 1) * tamanho_bloco, tamanho), tamanho)
+                      for b in ordem[rodada:rodada + BLOCOS_POR_RODADA]]
+            progresso['blocos_lidos'] = min(rodada + BLOCOS_POR_RODADA, n_blocos)
+            progresso['bytes_lidos'] = progresso.get('bytes_lidos', 0) + sum(map(len, blocos))
+            blocos = [bloco for bloco in blocos if bloco.strip()]
+            if not blocos:
+                continue
+            # Cada bloco é um grupo da amostra: as linhas dele foram sorteadas juntas
+            partes = [pd.read_csv(io.BytesIO(bloco), header=None, names=colunas, dtype=str) for bloco in blocos]
+            grupos = np.repeat(np.arange(len(partes)), [len(parte) for parte in partes])
+            yield pd.concat(partes, ignore_index=True)[do_modelo], grupos
+
+
+def gate_csv(caminho: str, model_class, limite: float, confianca: float = CONFIANCA_PADRAO,
+             tamanho_bloco: int = TAMANHO_BLOCO_PADRAO, estratos: int = ESTRATOS_PADRAO,
+             semente: Optional[int] = None, **kwargs) -> Dict:
+    """
+    Portão de qualidade de um CSV de qualquer tamanho sem lê-lo inteiro.
+    O arquivo é dividido em blocos de `tamanho_bloco` bytes; os blocos são sorteados em ordem
+    estratificada pela posição no arquivo (um trecho ruim no fim não escapa da amostra),
+    lidos com seek e validados em rodadas até a decisão (ver sequential_gate).
+    Supõe que não há quebras de linha dentro de campos entre aspas.
+    """
+    inicio = time.perf_counter()
+    column_errors = validate_columns(pd.DataFrame(columns=read_header(caminho)), model_class)
+    if column_errors:
+        return {'decisao': 'rejeitar', 'erros_colunas': column_errors}
+
+    progresso: Dict = {}
+    amostras = _amostras_do_csv(caminho, model_class, tamanho_bloco, estratos, np.random.default_rng(semente), progresso)
+    # Nenhuma decisão antes de cada estrato do arquivo ter contribuído com um bloco
+    kwargs.setdefault('grupos_minimos', estratos)
+    resultado = sequential_gate(amostras, model_class, limite, confianca, **kwargs)
+    tamanho = os.path.getsize(caminho)
+    resultado.update(progresso)
+    resultado['fracao_lida'] = progresso.get('bytes_lidos', 0) / tamanho if tamanho else 1.0
+    if resultado['amostra']:
+        resultado['linhas_estimadas'] = int(round(resultado['amostra'] / max(resultado['fracao_lida'], 1e-12)))
+    resultado['segundos'] = round(time.perf_counter() - inicio, 3)
+    return resultado
+
+
+def _percentual(intervalo: Tuple[float, float]) -> str:
+    return f"[{100 * intervalo[0]:.2f}%, {100 * intervalo[1]:.2f}%]"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Decide por amostragem se a taxa de erro do arquivo está abaixo do limite")
+    parser.add_argument('arquivo', help="CSV de entrada")
+    parser.add_argument('modelo', choices=sorted(MODELOS), help="Modelo usado na validação")
+    parser.add_argument('--limite', type=float, default=0.05, help="Taxa máxima de linhas com erro (0 a 1)")
+    parser.add_argument('--confianca', type=float, default=CONFIANCA_PADRAO, help="Confiança da decisão")
+    parser.add_argument('--bloco', type=int, default=TAMANHO_BLOCO_PADRAO, help="Bytes por bloco sorteado")
+    parser.add_argument('--max-amostra', type=int, help="Linhas no máximo antes de desistir (inconclusivo)")
+    parser.add_argument('--semente', type=int, help="Semente do sorteio, para repetir a amostra")
+    parser.add_argument('--saida', help="Se aprovado, valida o arquivo inteiro e grava os erros neste CSV")
+    parser.add_argument('--chunksize', type=int, default=CHUNKSIZE_PADRAO, help="Linhas por bloco na validação completa")
+    args = parser.parse_args()
+
+    resultado = gate_csv(args.arquivo, MODELOS[args.modelo], args.limite, args.confianca, args.bloco,
+                         semente=args.semente, amostra_maxima=args.max_amostra)
+    if resultado.get('erros_colunas'):
+        for error in resultado['erros_colunas']:
+            print(error)
+        raise SystemExit(1)
+
+    print(f"Decisão: {resultado['decisao']} ({'taxa exata' if resultado['exata'] else 'por amostragem'}, "
+          f"{resultado['segundos']}s)")
+    print(f"Amostra: {resultado['amostra']} linhas ({100 * resultado['fracao_lida']:.2f}% do arquivo, "
+          f"~{resultado.get('linhas_estimadas', 0)} linhas no total)")
+    print(f"Taxa de linhas com erro: {100 * resultado['taxa_erro']:.2f}% {_percentual(resultado['intervalo'])}; "
+          f"limite {100 * args.limite:.2f}%")
+    for campo, info in sorted(resultado['campos'].items(), key=lambda item: -item[1]['taxa_erro']):
+        print(f"  - {campo}: {100 * info['taxa_erro']:.2f}% {_percentual(info['intervalo'])}")
+
+    if resultado['decisao'] != 'aprovar':
+        raise SystemExit(1)
+    if args.saida:
+        totais = validate_csv_streaming(args.arquivo, MODELOS[args.modelo], args.saida, args.chunksize)
+        print(f"Validação completa: {totais['total_registros']} registros, {totais['total_erros']} erros em {args.saida}")
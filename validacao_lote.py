@@ -0,0 +1,125 @@
+import pandas as pd
+import contextvars
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterator, List, Tuple
+from validacao import MODELOS, detect_model
+from leitura import read_header
+from cache_validacao import ResultCache, content_hash
+
+WORKERS_LOTE = 4
+CAMPOS_NO_RESUMO = 3  # campos com mais erros listados por arquivo
+
+Upload = Tuple[str, bytes]  # (nome do arquivo, conteúdo)
+
+
+def validate_upload(nome: str, conteudo: bytes, cache: ResultCache) -> Dict:
+    """
+    Identifica o modelo pelo cabeçalho, lê e valida um arquivo do lote.
+    O dataframe e os erros ficam no cache (chaveados pelo hash), para o detalhamento na tela;
+    o retorno é só o resumo. Falhas de leitura viram o campo 'erro' do resumo.
+    """
+    inicio = time.perf_counter()
+    resumo = {'arquivo': nome, 'hash': content_hash(conteudo), 'modelo': None, 'registros': 0,
+              'registros_com_erros': 0, 'total_erros': 0, 'erros_por_campo': {}, 'erro': None}
+    try:
+        colunas = read_header(conteudo)
+        resumo['modelo'] = detect_model(colunas)
+        if resumo['modelo'] is None:
+            resumo['erro'] = (f"Cabeçalho não corresponde a nenhum modelo ({', '.join(sorted(MODELOS))}): "
+                              f"{', '.join(colunas)}")
+        else:
+            model_class = MODELOS[resumo['modelo']]
+            df = cache.get_frame(resumo['hash'], conteudo, model_class)
+            erros = cache.get_errors(resumo['hash'], df, model_class)
+            if 0 in erros.error_rows():
+                resumo['erro'] = '; '.join(err['msg'] for err in erros.expand_row(0)['erros'])
+            else:
+                resumo['registros'] = len(df)
+                resumo['registros_com_erros'] = erros.rows_with_errors()
+                resumo['total_erros'] = len(erros)
+                resumo['erros_por_campo'] = erros.errors_per_field().to_dict()
+    except Exception as e:
+        resumo['erro'] = f"Erro ao ler o arquivo: {e}"
+    resumo['segundos'] = time.perf_counter() - inicio
+    return resumo
+
+
+def validate_batch(arquivos: List[Upload], cache: ResultCache, workers: int = WORKERS_LOTE) -> Iterator[Dict]:
+    """
+    Valida os arquivos em paralelo, `workers` por vez, e devolve os resumos na ordem em que terminam.
+    Cada worker lê e valida um arquivo inteiro, então a leitura de um arquivo acontece enquanto
+    outro é validado; a leitura pelo pyarrow e as operações vetorizadas liberam o GIL.
+    Os maiores arquivos entram primeiro, para o lote não terminar esperando um arquivo grande.
+    Threads (e não processos) para que os resultados fiquem no cache da sessão sem serem copiados;
+    cada tarefa roda numa cópia do contexto atual, então a instrumentação ativa também mede o lote.
+    Cada resumo traz 'indice', a posição do arquivo em `arquivos`: dois envios com o mesmo nome
+    continuam distintos.
+    """
+    ordem = sorted(enumerate(arquivos), key=lambda item: len(item[1][1]), reverse=True)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='validacao_lote') as executor:
+        futuros = {executor.submit(contextvars.copy_context().run, validate_upload, nome, conteudo, cache): indice
+                   for indice, (nome, conteudo) in ordem}
+        for futuro in as_completed(futuros):
+            yield {**futuro.result(), 'indice': futuros[futuro]}
+
+
+def upload_labels(resumos: List[Dict]) -> Dict[int, str]:
+    """
+    Nome de cada arquivo do lote pelo índice do envio; nomes repetidos ganham o número do envio
+    """
+    contagem = Counter(resumo['arquivo'] for resumo in resumos)
+    return {resumo['indice']: resumo['arquivo'] if contagem[resumo['arquivo']] == 1
+            else f"{resumo['arquivo']} (envio {resumo['indice'] + 1})" for resumo in resumos}
+
+
+def summary_frame(resumos: List[Dict]) -> pd.DataFrame:
+    """
+    Uma linha por arquivo: totais, taxa de erros e os campos com mais erros
+    """
+    linhas = []
+    rotulos = upload_labels(resumos)
+    for resumo in sorted(resumos, key=lambda resumo: (resumo['arquivo'], resumo['indice'])):
+        campos = sorted(resumo['erros_por_campo'].items(), key=lambda item: item[1], reverse=True)
+        linhas.append({
+            'Arquivo': rotulos[resumo['indice']],
+            'Modelo': resumo['modelo'],
+            'Registros': resumo['registros'],
+            'Registros com Erros': resumo['registros_com_erros'],
+            'Taxa de Erros (%)': round(resumo['registros_com_erros'] / resumo['registros'] * 100, 2)
+                                 if resumo['registros'] else None,
+            'Erros': resumo['total_erros'],
+            'Campos com Mais Erros': ', '.join(f"{campo} ({total})" for campo, total in campos[:CAMPOS_NO_RESUMO]),
+            'Segundos': round(resumo['segundos'], 3),
+            'Falha': resumo['erro'],
+        })
+    return pd.DataFrame(linhas)
+
+
+def top_fields(resumos: List[Dict], n: int = 10) -> pd.DataFrame:
+    """
+    Campos com mais erros no lote, por modelo, e em quantos arquivos cada um falhou
+    """
+    linhas = [{'Modelo': resumo['modelo'], 'Campo': campo, 'Erros': total}
+              for resumo in resumos for campo, total in resumo['erros_por_campo'].items() if campo != 'colunas']
+    if not linhas:
+        return pd.DataFrame(columns=['Modelo', 'Campo', 'Erros', 'Arquivos'])
+    campos = pd.DataFrame(linhas).groupby(['Modelo', 'Campo'])['Erros'].agg(Erros='sum', Arquivos='size')
+    return campos.sort_values('Erros', ascending=False).head(n).reset_index()
+
+
+def batch_totals(resumos: List[Dict]) -> Dict:
+    """
+    Totais do lote inteiro
+    """
+    registros = sum(resumo['registros'] for resumo in resumos)
+    com_erros = sum(resumo['registros_com_erros'] for resumo in resumos)
+    return {
+        'arquivos': len(resumos),
+        'falhas': sum(resumo['erro'] is not None for resumo in resumos),
+        'registros': registros,
+        'registros_com_erros': com_erros,
+        'taxa_erros': com_erros / registros * 100 if registros else 0.0,
+        'total_erros': sum(resumo['total_erros'] for resumo in resumos),
+    }
@@ -0,0 +1,147 @@
+import pandas as pd
+import numpy as np
+import argparse
+import io
+import os
+from itertools import repeat
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Optional, Tuple
+from validacao import (MODELOS, ValidationMemo, validate_columns, validate_dataframe_columnar, error_inputs,
+                       build_error_dicts, suporta_validacao_vetorizada, validate_dataframe_pydantic)
+from leitura import pa, read_arrow_csv, read_header
+
+TAMANHO_SHARD_PADRAO = 64 * 1024 * 1024  # bytes de CSV por shard
+_BLOCO_LEITURA = 16 * 1024 * 1024
+
+
+def shard_boundaries(caminho: str, tamanho_shard: int = TAMANHO_SHARD_PADRAO) -> List[int]:
+    """
+    Divide o arquivo em faixas de bytes de aproximadamente `tamanho_shard`.
+    Cada limite cai numa quebra de linha fora de aspas (paridade das aspas desde o início),
+    então um registro com quebra de linha entre aspas nunca é cortado ao meio.
+    Retorna os offsets [início dos dados, ..., fim do arquivo].
+    """
+    tamanho = os.path.getsize(caminho)
+    with open(caminho, 'rb') as f:
+        cabecalho = f.readline()
+        aspas = cabecalho.count(b'"')
+        pos = f.tell()
+        limites = [pos]
+
+        while pos < tamanho:
+            alvo = min(pos + tamanho_shard, tamanho)
+            while pos < alvo:
+                bloco = f.read(min(_BLOCO_LEITURA, alvo - pos))
+                aspas += bloco.count(b'"')
+                pos += len(bloco)
+            # Avança até a próxima quebra de linha que não esteja dentro de aspas
+            while pos < tamanho:
+                linha = f.readline()
+                aspas += linha.count(b'"')
+                pos += len(linha)
+                if aspas % 2 == 0:
+                    break
+            limites.append(pos)
+
+    return limites
+
+
+# Memo dos valores já validados, um por processo worker, reaproveitado entre os shards
+_memo: Optional[ValidationMemo] = None
+
+
+def _validar_shard(caminho: str, inicio: int, fim: int, colunas: List[str], model_class):
+    """
+    Lê e valida uma faixa de bytes do arquivo no processo do worker.
+    Devolve só o número de linhas e os erros em arrays compactos, nunca o dataframe.
+    """
+    with open(caminho, 'rb') as f:
+        f.seek(inicio)
+        dados = f.read(fim - inicio)
+    lidas = [coluna for coluna in colunas if coluna in model_class.model_fields]
+    if pa is not None:
+        df = read_arrow_csv(dados, lidas, nomes=colunas)
+    else:
+        df = pd.read_csv(io.BytesIO(dados), header=None, names=colunas, usecols=lidas, dtype=str)
+
+    global _memo
+    if _memo is None:
+        _memo = ValidationMemo()
+
+    if not suporta_validacao_vetorizada(model_class):
+        return len(df), validate_dataframe_pydantic(df, model_class)
+
+    posicoes, indices_campos, codigos, modelos, campos = validate_dataframe_columnar(df, model_class, _memo)
+    entradas = error_inputs(df, posicoes, indices_campos, campos)
+    return len(df), (posicoes, indices_campos, codigos, modelos, entradas)
+
+
+def _juntar_resultados(resultados, model_class) -> Tuple[int, List[Dict]]:
+    """
+    Junta os resultados dos shards na ordem original, tornando as linhas absolutas
+    """
+    campos = list(model_class.model_fields)
+    deslocamento = 0
+    todas_linhas, todos_campos, todos_codigos, todas_entradas = [], [], [], []
+    todos_modelos = []
+    errors_pydantic = []
+
+    for total, resultado in resultados:
+        if isinstance(resultado, list):
+            for error in resultado:
+                errors_pydantic.append({'linha': error['linha'] + deslocamento, 'erros': error['erros']})
+        else:
+            posicoes, indices_campos, codigos, modelos, entradas = resultado
+            todas_linhas.append(posicoes + deslocamento + 1)
+            todos_campos.append(indices_campos)
+            todos_codigos.append(codigos + len(todos_modelos))
+            todas_entradas.append(entradas)
+            todos_modelos.extend(modelos)
+        deslocamento += total
+
+    if errors_pydantic or not todas_linhas:
+        return deslocamento, errors_pydantic
+
+    errors = build_error_dicts(np.concatenate(todas_linhas), np.concatenate(todos_campos),
+                               np.concatenate(todos_codigos), todos_modelos, campos,
+                               np.concatenate(todas_entradas))
+    return deslocamento, errors
+
+
+def validate_csv_parallel(caminho: str, model_class, workers: Optional[int] = None,
+                          tamanho_shard: int = TAMANHO_SHARD_PADRAO) -> Tuple[int, List[Dict]]:
+    """
+    Valida o CSV em paralelo num ProcessPoolExecutor com `workers` processos (padrão: todos os núcleos).
+    Cada worker lê e valida seu próprio shard; o resultado é idêntico ao de
+    validate_dataframe(pd.read_csv(caminho, dtype=str), model_class).
+    Retorna (total de registros, lista de erros no formato [{'linha', 'erros'}]).
+    """
+    colunas = read_header(caminho)
+    column_errors = validate_columns(pd.DataFrame(columns=colunas), model_class)
+    if column_errors:
+        return 0, [{'linha': 0, 'erros': [{'loc': ('colunas',), 'msg': error}]} for error in column_errors]
+
+    limites = shard_boundaries(caminho, tamanho_shard)
+    faixas = [(inicio, fim) for inicio, fim in zip(limites[:-1], limites[1:]) if fim > inicio]
+    if not faixas:
+        return 0, []
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # map devolve os resultados na ordem dos shards
+        resultados = executor.map(_validar_shard, repeat(caminho),
+                                  [inicio for inicio, _ in faixas], [fim for _, fim in faixas],
+                                  repeat(colunas), repeat(model_class))
+        return _juntar_resultados(resultados, model_class)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Valida um CSV em paralelo usando vários processos")
+    parser.add_argument('arquivo', help="CSV de entrada")
+    parser.add_argument('modelo', choices=sorted(MODELOS), help="Modelo usado na validação")
+    parser.add_argument('--workers', type=int, default=None, help="Número de processos (padrão: núcleos da máquina)")
+    parser.add_argument('--shard-mb', type=int, default=TAMANHO_SHARD_PADRAO // (1024 * 1024), help="Tamanho de cada shard em MB")
+    args = parser.parse_args()
+
+    total, erros = validate_csv_parallel(args.arquivo, MODELOS[args.modelo], args.workers, args.shard_mb * 1024 * 1024)
+    print(f"Registros: {total}")
+    print(f"Registros com erros: {len(erros)}")
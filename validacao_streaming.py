@@ -0,0 +1,350 @@
+import pandas as pd
+import numpy as np
+import argparse
+import contextlib
+import csv
+import hashlib
+import io
+import json
+import os
+from typing import Dict, Iterator, Optional, Tuple
+from validacao import (MODELOS, ValidationMemo, validate_columns, validate_dataframe_columnar, error_inputs,
+                       normalize_dataframe, suporta_validacao_vetorizada, validate_dataframe_pydantic)
+from leitura import read_header
+from instrumentacao import enable, stage, count_rows
+
+CHUNKSIZE_PADRAO = 100_000
+COLUNAS_RELATORIO = ['linha', 'campo', 'tipo', 'mensagem', 'valor']
+SUFIXO_CHECKPOINT = '.checkpoint.json'
+BLOCO_HASH = 1 << 20  # bytes lidos por vez ao calcular o hash do prefixo
+VERSAO_CHECKPOINT = 2  # muda quando o formato do checkpoint ou do relatório muda
+CHAVES_CHECKPOINT = {'versao', 'arquivo', 'modelo', 'schema', 'limpos', 'offset', 'linhas', 'hash_cabecalho',
+                     'hash_prefixo', 'tamanho_erros', 'tamanho_limpos', 'totais'}
+
+
+def read_csv_chunks(caminho: str, chunksize: int = CHUNKSIZE_PADRAO, model_class=None, **kwargs) -> Iterator[pd.DataFrame]:
+    """
+    Lê o CSV em blocos de até `chunksize` linhas.
+    Todas as colunas são lidas como texto, para que o tipo inferido não mude de um bloco para outro.
+    Com `model_class`, só as colunas do modelo são lidas.
+    O índice de cada bloco continua a numeração do anterior, então as linhas ficam absolutas.
+    """
+    if model_class is not None:
+        kwargs.setdefault('usecols', [coluna for coluna in read_header(caminho) if coluna in model_class.model_fields])
+    return pd.read_csv(caminho, chunksize=chunksize, dtype=str, **kwargs)
+
+
+def _linhas_de_erro(df: pd.DataFrame, model_class, memo: Optional[ValidationMemo] = None,
+                    normalizados: Optional[Dict[str, np.ndarray]] = None) -> Iterator[list]:
+    """
+    Gera as linhas do relatório (linha, campo, tipo, mensagem, valor) de um bloco.
+    Com `normalizados`, guarda ali os valores normalizados das colunas, da mesma passada.
+    """
+    if not suporta_validacao_vetorizada(model_class):
+        for error in validate_dataframe_pydantic(df, model_class):
+            for err in error['erros']:
+                yield [error['linha'], err['loc'][0], err['type'], err['msg'], err['input']]
+        return
+
+    posicoes, indices_campos, codigos, modelos, campos = validate_dataframe_columnar(df, model_class, memo, normalizados)
+    entradas = error_inputs(df, posicoes, indices_campos, campos)
+    rotulos = df.index.to_numpy()[posicoes] + 1
+    for linha, i, codigo, entrada in zip(rotulos.tolist(), indices_campos.tolist(), codigos.tolist(), entradas.tolist()):
+        tipo, msg, _ = modelos[codigo]
+        yield [linha, campos[i], tipo, msg, entrada]
+
+
+def validate_csv_streaming(caminho: str, model_class, caminho_erros: str,
+                           chunksize: int = CHUNKSIZE_PADRAO, caminho_limpos: Optional[str] = None) -> Dict[str, int]:
+    """
+    Valida um CSV maior que a memória, bloco a bloco.
+    Os erros são gravados em `caminho_erros` (CSV, um erro por linha) à medida que aparecem;
+    só o bloco atual fica em memória, além do memo dos valores já validados, que é
+    compartilhado entre os blocos.
+    Com `caminho_limpos`, as linhas sem erro são gravadas ali já normalizadas (CPF/CEP só com
+    dígitos, tipo_endereco em maiúsculas...), com a coluna 'linha', na mesma passada da validação.
+    Retorna os totais da validação.
+    """
+    totais = {'total_registros': 0, 'registros_com_erros': 0, 'total_erros': 0}
+
+    with open(caminho_erros, 'w', newline='', encoding='utf-8') as arquivo, \
+            (open(caminho_limpos, 'w', newline='', encoding='utf-8') if caminho_limpos else contextlib.nullcontext()) as limpos:
+        writer = csv.writer(arquivo)
+        writer.writerow(COLUNAS_RELATORIO)
+
+        # Primeiro valida as colunas pelo cabeçalho
+        column_errors = validate_columns(pd.DataFrame(columns=read_header(caminho)), model_class)
+        if column_errors:
+            for error in column_errors:
+                writer.writerow([0, 'colunas', 'missing', error, ''])
+            totais['total_erros'] = len(column_errors)
+            return totais
+
+        _gravar_erros(read_csv_chunks(caminho, chunksize, model_class), model_class, writer, totais, limpos)
+
+    return totais
+
+
+def _gravar_erros(blocos: Iterator[pd.DataFrame], model_class, writer, totais: Dict[str, int], limpos=None):
+    """
+    Valida os blocos em sequência, grava os erros com `writer` e soma os totais em `totais`.
+    Com o arquivo `limpos`, grava nele as linhas válidas normalizadas de cada bloco.
+    """
+    memo = ValidationMemo()
+    while True:
+        with stage('leitura_csv'):
+            chunk = next(blocos, None)
+        if chunk is None:
+            break
+        count_rows('leitura_csv', len(chunk))
+        normalizados = {} if limpos is not None else None
+        linhas_com_erro = set()
+        for registro in _linhas_de_erro(chunk, model_class, memo, normalizados):
+            writer.writerow(registro)
+            linhas_com_erro.add(registro[0])
+            totais['total_erros'] += 1
+        if limpos is not None:
+            with stage('normalizacao'):
+                validas = ~np.isin(chunk.index.to_numpy() + 1, np.fromiter(linhas_com_erro, dtype=np.int64))
+                bloco_limpo = normalize_dataframe(chunk[validas], model_class,
+                                                  {campo: valores[validas] for campo, valores in normalizados.items()})
+                bloco_limpo.insert(0, 'linha', chunk.index.to_numpy()[validas] + 1)
+                bloco_limpo.to_csv(limpos, header=totais['total_registros'] == 0, index=False)
+        totais['total_registros'] += len(chunk)
+        totais['registros_com_erros'] += len(linhas_com_erro)
+
+
+# --- Validação incremental de arquivos append-only ---
+
+class _TrechoComHash(io.RawIOBase):
+    """
+    Leitura do arquivo da posição atual até `fim`, somando ao `hash` os bytes lidos
+    """
+
+    def __init__(self, arquivo, fim: int, hash_conteudo):
+        self.arquivo = arquivo
+        self.restante = fim - arquivo.tell()
+        self.hash = hash_conteudo
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        dados = self.arquivo.read(min(len(buffer), max(self.restante, 0)))
+        buffer[:len(dados)] = dados
+        self.hash.update(dados)
+        self.restante -= len(dados)
+        return len(dados)
+
+
+def _fim_das_linhas_completas(arquivo, inicio: int, tamanho: int) -> int:
+    """
+    Posição logo depois do último '\\n' em [inicio, tamanho): uma linha final sem quebra
+    ainda pode estar sendo escrita e fica para a próxima execução
+    """
+    fim = tamanho
+    while fim > inicio:
+        bloco_inicio = max(inicio, fim - BLOCO_HASH)
+        arquivo.seek(bloco_inicio)
+        posicao = arquivo.read(fim - bloco_inicio).rfind(b'\n')
+        if posicao >= 0:
+            return bloco_inicio + posicao + 1
+        fim = bloco_inicio
+    return inicio
+
+
+def _hash_prefixo(arquivo, fim: int):
+    hash_conteudo = hashlib.blake2b()
+    arquivo.seek(0)
+    restante = fim
+    while restante > 0:
+        dados = arquivo.read(min(BLOCO_HASH, restante))
+        if not dados:
+            break
+        hash_conteudo.update(dados)
+        restante -= len(dados)
+    return hash_conteudo
+
+
+def read_checkpoint(caminho_checkpoint: str) -> Optional[Dict]:
+    """
+    O checkpoint gravado, ou None quando ele não existe, está corrompido ou incompleto
+    """
+    try:
+        with open(caminho_checkpoint, encoding='utf-8') as arquivo:
+            checkpoint = json.load(arquivo)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(checkpoint, dict) or not CHAVES_CHECKPOINT <= checkpoint.keys():
+        return None
+    return checkpoint
+
+
+def schema_hash(model_class) -> str:
+    """
+    Hash do schema do modelo: campos, tipos e restrições. Um modelo alterado invalida o checkpoint.
+    """
+    return hashlib.blake2b(json.dumps(model_class.model_json_schema(), sort_keys=True).encode()).hexdigest()
+
+
+def _gravar_checkpoint(caminho_checkpoint: str, checkpoint: Dict):
+    # Grava em um temporário e troca, para que uma interrupção não deixe o checkpoint pela metade
+    temporario = caminho_checkpoint + '.tmp'
+    with open(temporario, 'w', encoding='utf-8') as arquivo:
+        json.dump(checkpoint, arquivo, indent=2)
+    os.replace(temporario, caminho_checkpoint)
+
+
+def _motivo_validacao_completa(checkpoint: Optional[Dict], caminho: str, model_class, caminho_erros: str,
+                               caminho_limpos: Optional[str], hash_cabecalho: str, tamanho: int) -> Optional[str]:
+    """
+    Por que o checkpoint não pode ser usado, ou None quando pode (falta conferir o prefixo)
+    """
+    if checkpoint is None:
+        return 'sem checkpoint'
+    if checkpoint['versao'] != VERSAO_CHECKPOINT:
+        return 'checkpoint de outra versão'
+    if checkpoint['arquivo'] != os.path.abspath(caminho) or checkpoint['modelo'] != model_class.__name__:
+        return 'checkpoint de outro arquivo ou modelo'
+    if checkpoint['schema'] != schema_hash(model_class):
+        return 'schema do modelo alterado'
+    if not os.path.exists(caminho_erros) or os.path.getsize(caminho_erros) < checkpoint['tamanho_erros']:
+        return 'relatório de erros ausente ou truncado'
+    if checkpoint['limpos'] != (os.path.abspath(caminho_limpos) if caminho_limpos else None):
+        return 'arquivo de linhas limpas diferente'
+    if caminho_limpos and (not os.path.exists(caminho_limpos)
+                           or os.path.getsize(caminho_limpos) < checkpoint['tamanho_limpos']):
+        return 'arquivo de linhas limpas ausente ou truncado'
+    if checkpoint['hash_cabecalho'] != hash_cabecalho:
+        return 'cabeçalho alterado'
+    if tamanho < checkpoint['offset']:
+        return 'arquivo menor que o trecho já validado'
+    return None
+
+
+def validate_csv_incremental(caminho: str, model_class, caminho_erros: str, chunksize: int = CHUNKSIZE_PADRAO,
+                             caminho_checkpoint: Optional[str] = None,
+                             caminho_limpos: Optional[str] = None) -> Tuple[Dict[str, int], Optional[str]]:
+    """
+    Valida só as linhas acrescentadas ao CSV desde a última execução.
+    O checkpoint (padrão: `caminho_erros` + '.checkpoint.json') guarda o offset em bytes do fim do
+    trecho validado, o número de linhas, o hash do cabeçalho, o hash do conteúdo até o offset e o
+    hash do schema do modelo. Se o cabeçalho, o prefixo ou o modelo mudaram, o arquivo foi truncado
+    ou o relatório não confere, a validação é refeita do zero; senão, a leitura começa no offset e
+    os erros das novas linhas são acrescentados ao relatório existente, com a numeração de linhas
+    continuando a anterior. Com `caminho_limpos`, as novas linhas válidas são acrescentadas ali,
+    normalizadas, como em validate_csv_streaming.
+    Retorna os totais acumulados (com 'registros_novos') e o motivo da validação completa,
+    ou None quando ela foi incremental.
+    """
+    caminho_checkpoint = caminho_checkpoint or caminho_erros + SUFIXO_CHECKPOINT
+    checkpoint = read_checkpoint(caminho_checkpoint)
+
+    with open(caminho, 'rb') as arquivo:
+        cabecalho = arquivo.readline()
+        hash_cabecalho = hashlib.blake2b(cabecalho).hexdigest()
+        tamanho = os.fstat(arquivo.fileno()).st_size
+        motivo = _motivo_validacao_completa(checkpoint, caminho, model_class, caminho_erros, caminho_limpos,
+                                            hash_cabecalho, tamanho)
+        if motivo is None:
+            with stage('hash_prefixo', checkpoint['linhas']):
+                hash_conteudo = _hash_prefixo(arquivo, checkpoint['offset'])
+            if hash_conteudo.hexdigest() != checkpoint['hash_prefixo']:
+                motivo = 'conteúdo já validado foi alterado'
+
+        if motivo is None:
+            inicio, linhas = checkpoint['offset'], checkpoint['linhas']
+            totais = {chave: checkpoint['totais'][chave] for chave in ('total_registros', 'registros_com_erros', 'total_erros')}
+            # Descarta o que tenha sido gravado depois do último checkpoint (execução interrompida)
+            with open(caminho_erros, 'r+b') as relatorio:
+                relatorio.truncate(checkpoint['tamanho_erros'])
+            if caminho_limpos:
+                with open(caminho_limpos, 'r+b') as limpos:
+                    limpos.truncate(checkpoint['tamanho_limpos'])
+            modo = 'a'
+        else:
+            hash_conteudo = hashlib.blake2b(cabecalho)
+            inicio, linhas = len(cabecalho), 0
+            totais = {'total_registros': 0, 'registros_com_erros': 0, 'total_erros': 0}
+            modo = 'w'
+
+        fim = _fim_das_linhas_completas(arquivo, inicio, tamanho)
+        with open(caminho_erros, modo, newline='', encoding='utf-8') as arquivo_erros, \
+                (open(caminho_limpos, modo, newline='', encoding='utf-8') if caminho_limpos
+                 else contextlib.nullcontext()) as limpos:
+            writer = csv.writer(arquivo_erros)
+            if motivo is not None:
+                writer.writerow(COLUNAS_RELATORIO)
+                column_errors = validate_columns(pd.DataFrame(columns=read_header(caminho)), model_class)
+                if column_errors:
+                    for error in column_errors:
+                        writer.writerow([0, 'colunas', 'missing', error, ''])
+                    totais['total_erros'] = len(column_errors)
+                    if os.path.exists(caminho_checkpoint):
+                        os.remove(caminho_checkpoint)
+                    return {**totais, 'registros_novos': 0}, motivo
+
+            anteriores = totais['total_registros']
+            if fim > inicio:
+                colunas = read_header(caminho)
+                arquivo.seek(inicio)
+                trecho = io.BufferedReader(_TrechoComHash(arquivo, fim, hash_conteudo), BLOCO_HASH)
+                try:
+                    leitor = pd.read_csv(trecho, header=None, names=colunas, dtype=str, chunksize=chunksize)
+                    do_modelo = [coluna for coluna in colunas if coluna in model_class.model_fields]
+                    blocos = (bloco[do_modelo].set_axis(bloco.index + linhas) for bloco in leitor)
+                    _gravar_erros(blocos, model_class, writer, totais, limpos)
+                except pd.errors.EmptyDataError:  # Só linhas em branco no trecho novo
+                    pass
+                # O hash tem que cobrir todo o trecho, mesmo o que o leitor não chegou a pedir
+                while trecho.read(BLOCO_HASH):
+                    pass
+            arquivo_erros.flush()
+            tamanho_erros = arquivo_erros.tell()
+            if limpos is not None:
+                limpos.flush()
+            tamanho_limpos = limpos.tell() if limpos is not None else 0
+
+    _gravar_checkpoint(caminho_checkpoint, {
+        'versao': VERSAO_CHECKPOINT,
+        'arquivo': os.path.abspath(caminho),
+        'modelo': model_class.__name__,
+        'schema': schema_hash(model_class),
+        'limpos': os.path.abspath(caminho_limpos) if caminho_limpos else None,
+        'offset': fim,
+        'linhas': linhas + totais['total_registros'] - anteriores,
+        'hash_cabecalho': hash_cabecalho,
+        'hash_prefixo': hash_conteudo.hexdigest(),
+        'tamanho_erros': tamanho_erros,
+        'tamanho_limpos': tamanho_limpos,
+        'totais': totais,
+    })
+    return {**totais, 'registros_novos': totais['total_registros'] - anteriores}, motivo
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Valida um CSV grande em blocos, gravando os erros em disco")
+    parser.add_argument('arquivo', help="CSV de entrada")
+    parser.add_argument('modelo', choices=sorted(MODELOS), help="Modelo usado na validação")
+    parser.add_argument('saida', help="CSV onde os erros serão gravados")
+    parser.add_argument('--chunksize', type=int, default=CHUNKSIZE_PADRAO, help="Linhas por bloco")
+    parser.add_argument('--limpos', help="CSV onde as linhas válidas são gravadas já normalizadas")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Valida só as linhas acrescentadas desde a última execução (arquivos append-only)")
+    parser.add_argument('--checkpoint', help="Arquivo do checkpoint incremental (padrão: <saida>.checkpoint.json)")
+    parser.add_argument('--metricas', help="Grava os tempos por etapa e por validador (.json, ou .prom para o formato do Prometheus)")
+    args = parser.parse_args()
+
+    instrumentacao = enable() if args.metricas else None
+    if args.incremental:
+        totais, motivo = validate_csv_incremental(args.arquivo, MODELOS[args.modelo], args.saida, args.chunksize,
+                                                  args.checkpoint, args.limpos)
+        print(f"Validação completa ({motivo})" if motivo else f"Validação incremental: {totais['registros_novos']} registros novos")
+    else:
+        totais = validate_csv_streaming(args.arquivo, MODELOS[args.modelo], args.saida, args.chunksize, args.limpos)
+    print(f"Registros: {totais['total_registros']}")
+    print(f"Registros com erros: {totais['registros_com_erros']}")
+    print(f"Erros gravados em {args.saida}: {totais['total_erros']}")
+    if instrumentacao is not None:
+        instrumentacao.dump(args.metricas)
+        print(f"Métricas gravadas em {args.metricas}")
@@ -0,0 +1,276 @@
+import pandas as pd
+import numpy as np
+from datetime import date
+from types import NoneType
+from typing import Annotated, Callable, Dict, List, Optional, Tuple, get_args
+from pydantic import TypeAdapter, ValidationError
+from annotated_types import Ge, Gt, Le, Lt
+from models import Anuncio, LinhaPedido, MESES, DIAS_DA_SEMANA, TOLERANCIA_VALOR
+from validacao import ModeloErro, _DATA_ISO, _erro_valor, validate_columns, expand_errors
+from instrumentacao import stage, timed_call
+
+# Validação vetorizada de modelos com campos tipados (int, float, date, str), em vez de só texto
+# como em validacao.py. Cada coluna é convertida para o tipo do campo: o formato usual de forma
+# vetorizada e o resto pelo Pydantic, uma vez por valor distinto, com as mesmas mensagens do modelo.
+
+_INTEIRO = r'[0-9]{1,15}'
+_DECIMAL = r'-?[0-9]{1,15}(?:\.[0-9]+)?'
+_RESTRICOES = {Ge: lambda v, r: v >= r.ge, Gt: lambda v, r: v > r.gt, Le: lambda v, r: v <= r.le, Lt: lambda v, r: v < r.lt}
+
+
+# --- Conversão vetorizada do formato usual de cada tipo ---
+# Cada conversor recebe só strings e retorna (máscara do formato usual, valores convertidos).
+
+def _converter_inteiros(valores: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+    usual = valores.str.fullmatch(_INTEIRO).to_numpy(dtype=bool, na_value=False)
+    convertidos = np.full(len(valores), np.nan)
+    convertidos[usual] = valores[usual].astype('int64').to_numpy()
+    return usual, convertidos
+
+
+def _converter_decimais(valores: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+    usual = valores.str.fullmatch(_DECIMAL).to_numpy(dtype=bool, na_value=False)
+    convertidos = np.full(len(valores), np.nan)
+    convertidos[usual] = valores[usual].astype('float64').to_numpy()
+    return usual, convertidos
+
+
+def _converter_datas(valores: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+    datas = pd.to_datetime(valores, format='%Y-%m-%d', errors='coerce')
+    usual = valores.str.fullmatch(_DATA_ISO).to_numpy(dtype=bool, na_value=False) & datas.notna().to_numpy()
+    return usual, datas.to_numpy(dtype='datetime64[ns]')
+
+
+def _converter_textos(valores: pd.Series) -> Tuple[np.ndarray, None]:
+    # O texto já está no tipo certo; a coluna tipada reaproveita a original
+    return np.ones(len(valores), dtype=bool), None
+
+
+_CONVERSORES = {int: _converter_inteiros, float: _converter_decimais, date: _converter_datas, str: _converter_textos}
+_VAZIOS = {int: np.nan, float: np.nan, date: np.datetime64('NaT', 'ns'), str: None}
+_DTYPES = {int: 'Int64', float: 'float64', date: 'datetime64[ns]'}
+
+
+def _ja_convertida(serie: pd.Series, tipo: type) -> bool:
+    """
+    Coluna que já chega no tipo do campo (ex.: inteiros de um Parquet)
+    """
+    if tipo is int:
+        return pd.api.types.is_integer_dtype(serie.dtype)
+    if tipo is float:
+        return pd.api.types.is_integer_dtype(serie.dtype) or pd.api.types.is_float_dtype(serie.dtype)
+    return False
+
+
+def _tipo_do_campo(field_info) -> Tuple[type, bool]:
+    """
+    Retorna (tipo base, anulável) do campo
+    """
+    argumentos = get_args(field_info.annotation)
+    tipos = [a for a in argumentos if a is not NoneType] if argumentos else [field_info.annotation]
+    return tipos[0], NoneType in argumentos
+
+
+def _adaptador(field_info) -> TypeAdapter:
+    """
+    TypeAdapter com o tipo e as restrições (ge, max_length...) do campo
+    """
+    if field_info.metadata:
+        return TypeAdapter(Annotated[(field_info.annotation, *field_info.metadata)])
+    return TypeAdapter(field_info.annotation)
+
+
+def _dentro_das_restricoes(usual: np.ndarray, convertidos: Optional[np.ndarray], field_info) -> np.ndarray:
+    """
+    Restringe `usual` aos valores que atendem às restrições numéricas do campo;
+    restrições de outros tipos mandam tudo para o Pydantic
+    """
+    for restricao in field_info.metadata:
+        conferir = _RESTRICOES.get(type(restricao))
+        if conferir is None or convertidos is None:
+            return np.zeros(len(usual), dtype=bool)
+        usual = usual & conferir(convertidos, restricao)
+    return usual
+
+
+def _validar_com_pydantic(valores: pd.Series, adaptador: TypeAdapter):
+    """
+    Valida com o Pydantic uma vez por valor distinto.
+    Retorna (código do erro por linha, -1 = válido), os modelos de erro e os valores convertidos.
+    """
+    codigos, unicos = pd.factorize(valores, use_na_sentinel=False)
+    modelos: List[ModeloErro] = []
+    indice_modelo: Dict[Tuple[str, str], int] = {}
+    codigo_unico = np.full(len(unicos), -1, dtype=np.int64)
+    convertido_unico = np.empty(len(unicos), dtype=object)
+
+    def validar_unicos(unicos):
+        for i, valor in enumerate(unicos):
+            try:
+                convertido_unico[i] = adaptador.validate_python(None if pd.isna(valor) else valor)
+            except ValidationError as e:
+                erro = e.errors()[0]
+                chave = (erro['type'], erro['msg'])
+                if chave not in indice_modelo:
+                    indice_modelo[chave] = len(modelos)
+                    modelos.append((erro['type'], erro['msg'], erro.get('ctx')))
+                codigo_unico[i] = indice_modelo[chave]
+
+    timed_call('pydantic (por valor)', validar_unicos, unicos)
+    return codigo_unico[codigos], modelos, convertido_unico[codigos]
+
+
+def _converter_campo(serie: pd.Series, field_info) -> Tuple[np.ndarray, List[ModeloErro], np.ndarray]:
+    """
+    Converte a coluna para o tipo do campo.
+    Retorna (código do erro por linha, -1 = válido), os modelos de erro e os valores convertidos
+    (vazio nas linhas com erro ou nulas; campos de texto mantêm a coluna original).
+    """
+    tipo, anulavel = _tipo_do_campo(field_info)
+    codigo = np.full(len(serie), -1, dtype=np.int64)
+    convertidos = np.full(len(serie), _VAZIOS[tipo], dtype=np.array([_VAZIOS[tipo]]).dtype)
+
+    nulos = serie.isna().to_numpy()
+    usual = np.zeros(len(serie), dtype=bool)
+    if _ja_convertida(serie, tipo):
+        posicoes = np.flatnonzero(~nulos)
+        convertidos_str = serie.iloc[posicoes].to_numpy(dtype='float64')
+        usual_str = _dentro_das_restricoes(np.ones(len(posicoes), dtype=bool), convertidos_str, field_info)
+    elif pd.api.types.is_string_dtype(serie.dtype):
+        posicoes = np.flatnonzero(~nulos)
+        usual_str, convertidos_str = timed_call(f'{tipo.__name__}_parsing', _CONVERSORES[tipo], serie.iloc[posicoes])
+        usual_str = _dentro_das_restricoes(usual_str, convertidos_str, field_info)
+    else:
+        posicoes = usual_str = convertidos_str = None
+    if posicoes is not None:
+        usual[posicoes[usual_str]] = True
+        if convertidos_str is not None:
+            convertidos[posicoes[usual_str]] = convertidos_str[usual_str]
+    if anulavel:
+        usual |= nulos
+
+    modelos: List[ModeloErro] = []
+    if not usual.all():
+        outros = np.flatnonzero(~usual)
+        codigo[outros], modelos, convertidos_outros = _validar_com_pydantic(serie.iloc[outros], _adaptador(field_info))
+        validos = codigo[outros] < 0
+        convertidos[outros[validos]] = [_VAZIOS[tipo] if v is None else v for v in convertidos_outros[validos]]
+    return codigo, modelos, convertidos
+
+
+# --- Validadores entre campos, equivalentes aos field_validators que usam info.data ---
+# Cada um recebe o valor do campo e os dos campos anteriores de que depende e retorna a máscara de erro.
+
+def _ano_mes_errado(ano_mes: pd.Series, datas: pd.Series) -> np.ndarray:
+    datas = pd.DatetimeIndex(datas)
+    esperado = datas.year.astype(str) + ' | ' + np.array(MESES, dtype=object)[datas.month - 1]
+    return ano_mes.to_numpy(dtype=object) != esperado.to_numpy(dtype=object)
+
+
+def _dia_da_semana_errado(dias: pd.Series, datas: pd.Series) -> np.ndarray:
+    esperado = np.array(DIAS_DA_SEMANA, dtype=object)[pd.DatetimeIndex(datas).dayofweek]
+    return dias.to_numpy(dtype=object) != esperado
+
+
+def _cliques_acima_das_impressoes(cliques: pd.Series, impressoes: pd.Series) -> np.ndarray:
+    return (cliques.notna() & (cliques > impressoes)).to_numpy(dtype=bool, na_value=False)
+
+
+def _valor_total_errado(valor: pd.Series, quantidade: pd.Series, preco: pd.Series) -> np.ndarray:
+    esperado = quantidade.to_numpy(dtype='float64') * preco.to_numpy(dtype='float64')
+    return np.abs(valor.to_numpy(dtype='float64') - esperado) > TOLERANCIA_VALOR
+
+
+# (modelo, validador) -> (campo, campos de que depende, regra, mensagem)
+VALIDADORES_CRUZADOS: Dict[Tuple[type, str], Tuple[str, Tuple[str, ...], Callable, str]] = {
+    (Anuncio, 'validate_ano_mes'): ('Ano_Mes', ('Date',), _ano_mes_errado,
+                                    'Ano_Mes não corresponde ao mês de Date'),
+    (Anuncio, 'validate_dia_da_semana'): ('Dia_da_Semana', ('Date',), _dia_da_semana_errado,
+                                          'Dia_da_Semana não corresponde ao dia de Date'),
+    (Anuncio, 'validate_link_clicks'): ('Link_clicks', ('Impressions',), _cliques_acima_das_impressoes,
+                                        'Link_clicks não pode ser maior que Impressions'),
+    (LinhaPedido, 'validate_valor_total'): ('ValorTotal', ('Quantidade', 'PrecoUnitario'), _valor_total_errado,
+                                            'ValorTotal deve ser igual a Quantidade * PrecoUnitario'),
+}
+
+
+def validate_typed_columnar(df: pd.DataFrame, model_class):
+    """
+    Valida o dataframe coluna a coluna, convertendo cada campo para o tipo do modelo.
+    Como no Pydantic, um validador entre campos só roda quando o campo e aqueles de que ele
+    depende são válidos.
+    Retorna a tupla de validate_dataframe_columnar (posições, índices dos campos, códigos,
+    modelos, campos) e o dataframe tipado, com uma coluna 'valida' por linha.
+    """
+    with stage('validacao', len(df)):
+        campos = list(model_class.model_fields)
+        tipado = pd.DataFrame(index=df.index)
+        codigos_campo: Dict[str, np.ndarray] = {}
+        todos_modelos: List[ModeloErro] = []
+
+        for campo in campos:
+            if campo not in df.columns:
+                continue  # Campo opcional ausente assume o valor padrão (None)
+            field_info = model_class.model_fields[campo]
+            codigo, modelos, convertidos = _converter_campo(df[campo], field_info)
+            codigos_campo[campo] = np.where(codigo >= 0, codigo + len(todos_modelos), -1)
+            todos_modelos.extend(modelos)
+            tipo = _tipo_do_campo(field_info)[0]
+            tipado[campo] = df[campo] if tipo is str else pd.array(convertidos, dtype=_DTYPES[tipo])
+
+        for (modelo, nome), (campo, dependencias, regra, msg) in VALIDADORES_CRUZADOS.items():
+            if modelo is not model_class or any(c not in codigos_campo for c in (campo, *dependencias)):
+                continue
+            conferir = codigos_campo[campo] < 0
+            for dependencia in dependencias:
+                conferir &= codigos_campo[dependencia] < 0
+            errado = np.zeros(len(df), dtype=bool)
+            errado[conferir] = timed_call(f'{modelo.__name__}.{nome}', lambda linhas: regra(
+                tipado[campo].iloc[linhas], *(tipado[c].iloc[linhas] for c in dependencias)), np.flatnonzero(conferir))
+            codigos_campo[campo][errado] = len(todos_modelos)
+            todos_modelos.append(_erro_valor(msg))
+
+        todas_posicoes, todos_campos, todos_codigos = [], [], []
+        for i, campo in enumerate(campos):
+            if campo in codigos_campo:
+                posicoes = np.flatnonzero(codigos_campo[campo] >= 0)
+                todas_posicoes.append(posicoes)
+                todos_campos.append(np.full(len(posicoes), i, dtype=np.int64))
+                todos_codigos.append(codigos_campo[campo][posicoes])
+        posicoes = np.concatenate(todas_posicoes) if todas_posicoes else np.empty(0, dtype=np.int64)
+        indices_campos = np.concatenate(todos_campos) if todos_campos else np.empty(0, dtype=np.int64)
+        codigos = np.concatenate(todos_codigos) if todos_codigos else np.empty(0, dtype=np.int64)
+        ordem = np.lexsort((indices_campos, posicoes))
+
+        valida = np.ones(len(df), dtype=bool)
+        valida[posicoes] = False
+        tipado['valida'] = valida
+        return (posicoes[ordem], indices_campos[ordem], codigos[ordem], todos_modelos, campos), tipado
+
+
+def validate_typed(df: pd.DataFrame, model_class) -> Tuple[List[Dict], Optional[pd.DataFrame]]:
+    """
+    Valida o dataframe e retorna os erros no formato [{'linha', 'erros'}] e o dataframe tipado
+    (None quando faltam colunas obrigatórias)
+    """
+    column_errors = validate_columns(df, model_class)
+    if column_errors:
+        return [{'linha': 0, 'erros': [{'loc': ('colunas',), 'msg': error}]} for error in column_errors], None
+    resultado, tipado = validate_typed_columnar(df, model_class)
+    return expand_errors(df, *resultado), tipado
+
+
+def comparar_com_pydantic(df: pd.DataFrame, model_class) -> List[Tuple]:
+    """
+    Compara (linha, loc, msg) da validação vetorizada com o modelo instanciado linha a linha.
+    Células vazias viram None, que é como os campos opcionais do modelo as representam.
+    """
+    vetorizado = {(e['linha'], err['loc'], err['msg']) for e in validate_typed(df, model_class)[0] for err in e['erros']}
+    referencia = set()
+    registros = df.astype(object).where(df.notna(), None).to_dict('records')
+    for linha, registro in zip(df.index + 1, registros):
+        try:
+            model_class(**registro)
+        except ValidationError as e:
+            referencia |= {(linha, err['loc'], err['msg']) for err in e.errors()}
+    return sorted(vetorizado ^ referencia, key=str)
@@ -1,26 +1,14 @@
-import pandas as pd
 from models import Cliente, Endereco
+from validacao import validate_dataframe
+from leitura import read_csv_typed
+from integridade import check_referential_integrity, integrity_errors
+from deduplicacao import find_duplicates
+from instrumentacao import enable
+from error_store import ErrorStore
+from relatorio_erros import FORMATOS, write_store_report
 from typing import List, Dict
-from pydantic import ValidationError
-
-def validate_dataframe(df: pd.DataFrame, model_class) -> List[Dict]:
-    """
-    Valida cada linha do dataframe usando o modelo Pydantic especificado.
-    Retorna uma lista de dicionários com os erros encontrados.
-    """
-    errors = []
-    
-    for idx, row in df.iterrows():
-        try:
-            # Converte a linha do dataframe para dicionário e valida
-            model_class(**row.to_dict())
-        except ValidationError as e:
-            errors.append({
-                'linha': idx + 1,  # +1 porque o índice começa em 0
-                'erros': e.errors()
-            })
-    
-    return errors
+import argparse
+import os
 
 def print_validation_errors(errors: List[Dict]):
     """
@@ -38,16 +26,62 @@ def print_validation_errors(errors: List[Dict]):
             msg = err['msg']
             print(f"  - Campo '{campo}': {msg}")
 
+parser = argparse.ArgumentParser(description="Valida os arquivos de clientes e endereços em output/")
+parser.add_argument('--metricas', help="Grava os tempos por etapa e por validador (.json, ou .prom para o formato do Prometheus)")
+parser.add_argument('--relatorio', help="Pasta onde os erros são gravados (erros_clientes e erros_enderecos, "
+                                        "um erro por linha com os valores originais) em vez de impressos")
+parser.add_argument('--formato', choices=list(FORMATOS), default='csv', help="Formato dos relatórios de --relatorio")
+args = parser.parse_args()
+instrumentacao = enable() if args.metricas else None
+
+def write_report(erros: ErrorStore, df, nome: str):
+    """
+    Grava o relatório de erros de um arquivo na pasta de --relatorio
+    """
+    caminho = os.path.join(args.relatorio, f"erros_{nome}.{args.formato}")
+    total = write_store_report(erros, caminho, df, args.formato)
+    print(f"{total} erros em {erros.rows_with_errors()} linhas gravados em {caminho}")
+
+if args.relatorio:
+    os.makedirs(args.relatorio, exist_ok=True)
+
 # Carregar os dataframes
-df_clientes = pd.read_csv('output/clientes_com_erros.csv')
-df_enderecos = pd.read_csv('output/enderecos_com_erros.csv')
+df_clientes = read_csv_typed('output/clientes_com_erros.csv', Cliente)
+df_enderecos = read_csv_typed('output/enderecos_com_erros.csv', Endereco)
 
 # Validar dados dos clientes
 print("Validando dados dos clientes...")
-erros_clientes = validate_dataframe(df_clientes, Cliente)
-print_validation_errors(erros_clientes)
+if args.relatorio:
+    write_report(ErrorStore.from_dataframe(df_clientes, Cliente), df_clientes, 'clientes')
+else:
+    erros_clientes = validate_dataframe(df_clientes, Cliente)
+    print_validation_errors(erros_clientes)
 
 # Validar dados dos endereços
 print("\nValidando dados dos endereços...")
-erros_enderecos = validate_dataframe(df_enderecos, Endereco)
-print_validation_errors(erros_enderecos) 
\ No newline at end of file
+if args.relatorio:
+    erros_enderecos = ErrorStore.from_dataframe(df_enderecos, Endereco)
+else:
+    erros_enderecos = validate_dataframe(df_enderecos, Endereco)
+    print_validation_errors(erros_enderecos) 
+# Cruzar os IDs entre os dois arquivos
+print("\nVerificando integridade entre clientes e endereços...")
+integridade = check_referential_integrity(df_clientes, df_enderecos)
+if args.relatorio:
+    # Os endereços órfãos entram no mesmo relatório dos erros do modelo Endereco
+    write_report(erros_enderecos.with_errors(integrity_errors(integridade, df_enderecos)), df_enderecos, 'enderecos')
+else:
+    print_validation_errors(integrity_errors(integridade, df_enderecos))
+print(f"\nClientes sem endereço: {len(integridade['clientes_sem_endereco'])}")
+
+# Procurar clientes duplicados
+print("\nProcurando clientes duplicados...")
+duplicados = find_duplicates(df_clientes)
+for cluster, grupo in duplicados.groupby('cluster'):
+    print(f"  - Grupo {cluster}:")
+    for membro in grupo.itertuples(index=False):
+        print(f"      Linha {membro[0]} ({membro.id_cliente}): chaves {membro.chaves}")
+
+if instrumentacao is not None:
+    instrumentacao.dump(args.metricas)
+    print(f"\nMétricas gravadas em {args.metricas}")